@@ -0,0 +1,107 @@
+"""
+Benchmark: cold start with a large catalog.
+
+Compares parsing the whole catalog from JSON into dicts against mapping a
+catalog snapshot and decoding only what the first requests touch, both
+in-process and as the wall time of a fresh interpreter running load_catalog().
+
+Usage: python benchmarks/bench_cold_start.py [products]
+"""
+
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from data.catalog import CatalogSnapshot, ProductCatalog, write_catalog_snapshot  # noqa: E402
+
+logging.disable(logging.INFO)
+
+CATEGORIES = ['Electronics', 'Clothing', 'Books', 'Home & Garden', 'Beauty', 'Sports']
+
+
+def make_products(count: int, rng: random.Random) -> list:
+    return [
+        {
+            'id': product_id,
+            'name': f"Product {product_id}",
+            'price': rng.randint(50, 50000),
+            'description': f"Description of product {product_id} with some marketing text",
+            'image': f"https://example.com/images/{product_id}.jpg",
+            'category': CATEGORIES[product_id % len(CATEGORIES)],
+            'stock': rng.randint(0, 100)
+        }
+        for product_id in range(1, count + 1)
+    ]
+
+
+def startup_wall_time(path: str) -> float:
+    """Wall time of a fresh interpreter importing storage and loading the catalog."""
+    env = dict(os.environ, CATALOG_SNAPSHOT_PATH=path, TELEGRAM_BOT_TOKEN='0:bench')
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, '-c', 'from data import storage; storage.load_catalog(); storage.get_product_by_id(1)'],
+        cwd=BASE_DIR, env=env, check=True
+    )
+    return time.perf_counter() - started
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    rng = random.Random(42)
+    products = make_products(count, rng)
+    lookups = [rng.randint(1, count) for _ in range(1000)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, 'catalog.json')
+        snapshot_path = os.path.join(directory, 'catalog.snapshot')
+        with open(json_path, 'w') as f:
+            json.dump({'categories': CATEGORIES, 'products': products}, f)
+
+        started = time.perf_counter()
+        write_catalog_snapshot(snapshot_path, products, CATEGORIES)
+        write = time.perf_counter() - started
+        print(f"{count} products: json {os.path.getsize(json_path) // 1024} KiB, "
+              f"snapshot {os.path.getsize(snapshot_path) // 1024} KiB (written in {write:.2f} s)")
+        del products
+
+        started = time.perf_counter()
+        with open(json_path) as f:
+            loaded = json.load(f)['products']
+        parse = time.perf_counter() - started
+        by_id = {p['id']: p for p in loaded}
+        print(f"json load:       {parse * 1000:8.1f} ms")
+        del loaded, by_id
+
+        started = time.perf_counter()
+        catalog = ProductCatalog()
+        snapshot = CatalogSnapshot(snapshot_path)
+        catalog.attach(snapshot)
+        attach = time.perf_counter() - started
+        print(f"snapshot attach: {attach * 1000:8.1f} ms")
+
+        started = time.perf_counter()
+        for product_id in lookups:
+            catalog.get(product_id)
+        lookup = time.perf_counter() - started
+        print(f"first lookups:   {lookup / len(lookups) * 1e6:8.1f} us each (binary search + decode)")
+
+        started = time.perf_counter()
+        books = catalog.in_category('Books')
+        print(f"category scan:   {(time.perf_counter() - started) * 1000:8.1f} ms ({len(books)} products decoded)")
+        snapshot.close()
+
+        missing = os.path.join(directory, 'missing.snapshot')
+        print(f"process start (sample data):   {startup_wall_time(missing) * 1000:6.0f} ms")
+        print(f"process start ({count} mapped): {startup_wall_time(snapshot_path) * 1000:6.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: order journal write throughput and recovery time.
+
+Writes N orders with four transitions each (created, payment proof, approved,
+delivered) and measures how long startup recovery takes when replaying the full
+journal, when loading the latest snapshot and replaying only the tail, and when
+delivered orders older than JOURNAL_ARCHIVE_AFTER are also moved to the archive. Orders are
+spread over the last DAYS days.
+
+Usage: python benchmarks/bench_journal_recovery.py [orders] [snapshot_every]
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import JOURNAL_ARCHIVE_AFTER  # noqa: E402
+from data.journal import OrderJournal  # noqa: E402
+
+logging.disable(logging.INFO)
+
+DAYS = 365
+
+
+def write_history(directory: str, count: int, snapshot_every: int, archive_after: float):
+    orders = {}
+    state = {'counter': 1000}
+    journal = OrderJournal(
+        directory,
+        snapshot_source=lambda: (orders, state['counter']),
+        snapshot_every=snapshot_every,
+        archive_after=archive_after
+    )
+    journal.recover()
+
+    started = time.perf_counter()
+    first_created = time.time() - DAYS * 86400
+    for i in range(count):
+        order_id = f"ORD{state['counter']}"
+        state['counter'] += 1
+        order = {
+            'user_id': 100000 + i % 5000,
+            'username': f"user{i % 5000}",
+            'first_name': "Customer",
+            'items': [{'id': i % 50, 'name': f"Product {i % 50}", 'price': 100 + i % 50}],
+            'total': 100 + i % 50,
+            'payment_method': 'telebirr',
+            'status': 'pending_proof',
+            'created_at': first_created + DAYS * 86400 * i / count
+        }
+        orders[order_id] = order
+        journal.append('created', order_id, order)
+
+        changes = {'status': 'pending_approval', 'payment_proof': f"file{i}"}
+        order.update(changes)
+        journal.append('payment_proof_received', order_id, changes)
+
+        changes = {'status': 'approved', 'approved_at': time.time()}
+        order.update(changes)
+        journal.append('approved', order_id, changes)
+
+        changes = {'status': 'delivered'}
+        order.update(changes)
+        journal.append('delivered', order_id, changes)
+    elapsed = time.perf_counter() - started
+
+    # Simulate a crash: no final snapshot, only what was already fsync'ed or flushed
+    journal.sync()
+    journal._file.close()
+    return elapsed, journal.seq
+
+
+def recover(directory: str):
+    journal = OrderJournal(directory)
+    started = time.perf_counter()
+    orders, _ = journal.recover()
+    elapsed = time.perf_counter() - started
+    journal._file.close()
+    archived = sum(1 for _ in journal.read_archive())
+    return elapsed, len(orders), archived, journal.last_recovery
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    snapshot_every = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+
+    cases = (
+        ("full replay", 10 ** 12, None),
+        (f"snapshot every {snapshot_every}", snapshot_every, None),
+        (f"snapshot every {snapshot_every}, archiving", snapshot_every, JOURNAL_ARCHIVE_AFTER)
+    )
+    for label, every, archive_after in cases:
+        with tempfile.TemporaryDirectory() as directory:
+            write_s, records = write_history(directory, count, every, archive_after)
+            recover_s, recovered, archived, stats = recover(directory)
+            assert recovered + archived >= count, (recovered, archived, count)
+            print(f"{label}:")
+            print(f"  write   {records} records in {write_s:.2f} s ({records / write_s:,.0f} records/s)")
+            print(f"  recover {recovered} orders in {recover_s * 1000:.0f} ms "
+                  f"(snapshot {stats['snapshot_ms']:.0f} ms, replayed {stats['replayed']} records "
+                  f"in {stats['replay_ms']:.0f} ms), {archived} in the archive")
+
+
+if __name__ == '__main__':
+    main()
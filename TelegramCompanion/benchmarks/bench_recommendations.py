@@ -0,0 +1,72 @@
+"""
+Benchmark: "frequently bought together" update and query cost.
+
+Feeds synthetic approved orders (popularity skewed towards a few products, as
+in real shops) into CoPurchaseIndex and times the per-order update and the
+per-product and per-cart top-k queries.
+
+Usage: python benchmarks/bench_recommendations.py [orders] [products]
+"""
+
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.recommendations import CoPurchaseIndex  # noqa: E402
+
+logging.disable(logging.INFO)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    product_count = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    rng = random.Random(42)
+    weights = [1 / (rank + 1) for rank in range(product_count)]
+    product_ids = list(range(1, product_count + 1))
+
+    orders = [
+        {'items': [{'id': product_id} for product_id in rng.choices(product_ids, weights, k=rng.randint(1, 6))]}
+        for _ in range(count)
+    ]
+
+    index = CoPurchaseIndex()
+    timings = []
+    started = time.perf_counter()
+    for i, order in enumerate(orders):
+        before = time.perf_counter()
+        index.record_order(f"ORD{i}", order)
+        timings.append(time.perf_counter() - before)
+    total = time.perf_counter() - started
+    timings.sort()
+    print(f"recorded {count} orders in {total:.2f} s: {total / count * 1e6:.1f} us/order avg, "
+          f"p99 {timings[int(count * 0.99)] * 1e6:.1f} us")
+    print(f"{len(index)} products, {index.pairs()} co-occurrence pairs stored "
+          f"({index.pairs() / max(len(index), 1):.0f} per product vs {product_count} dense)")
+
+    queries = [rng.choice(product_ids) for _ in range(100000)]
+    started = time.perf_counter()
+    for product_id in queries:
+        index.suggest(product_id)
+    elapsed = time.perf_counter() - started
+    print(f"suggest(product):  {elapsed / len(queries) * 1e6:.2f} us/query")
+
+    carts = [rng.choices(product_ids, weights, k=rng.randint(1, 8)) for _ in range(20000)]
+    started = time.perf_counter()
+    for cart in carts:
+        index.suggest_for_cart(cart)
+    elapsed = time.perf_counter() - started
+    print(f"suggest_for_cart:  {elapsed / len(carts) * 1e6:.2f} us/query")
+
+    # Sanity check against a full recount for the most popular product
+    exact = sorted(index.counts[1].items(), key=lambda pair: -pair[1])[:index.top_k]
+    cached = [(other_id, count) for count, other_id in index.top[1]]
+    print(f"top-{index.top_k} cache matches full sort: "
+          f"{[count for _, count in exact] == [count for _, count in cached]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark: sales report latency over a year of orders.
+
+Feeds a year of synthetic approved orders into SalesAnalytics and times the
+incremental update per order and /sales_report queries over several ranges.
+
+Usage: python benchmarks/bench_sales_report.py [orders] [products]
+"""
+
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.analytics import SalesAnalytics, parse_range, day_number  # noqa: E402
+
+logging.disable(logging.INFO)
+
+METHODS = ['telebirr', 'mpesa', 'cbe', 'dashen', 'coop']
+CATEGORIES = ['Electronics', 'Clothing', 'Books', 'Home & Garden', 'Beauty', 'Sports']
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    product_count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    rng = random.Random(42)
+    now = time.time()
+
+    # Orders are approved in time order, oldest first
+    approved_at = sorted(now - rng.random() * 365 * 86400 for _ in range(count))
+
+    analytics = SalesAnalytics()
+    started = time.perf_counter()
+    for i in range(count):
+        items = []
+        for _ in range(rng.randint(1, 4)):
+            product_id = rng.randrange(product_count)
+            items.append({
+                'id': product_id,
+                'name': f"Product {product_id}",
+                'price': 100 + product_id,
+                'category': CATEGORIES[product_id % len(CATEGORIES)]
+            })
+        analytics.record_order(f"ORD{i}", {
+            'items': items,
+            'total': sum(item['price'] for item in items),
+            'payment_method': rng.choice(METHODS),
+            'approved_at': approved_at[i]
+        })
+    ingest = time.perf_counter() - started
+    print(f"ingested {count} orders ({analytics.size} lines) in {ingest:.2f} s "
+          f"({ingest / count * 1e6:.1f} us/order)")
+
+    current_day = day_number(now)
+    for text in ('today', '7d', '30d', '1y', 'all'):
+        start_day, end_day = parse_range(text, current_day)
+        timings = []
+        for _ in range(20):
+            started = time.perf_counter()
+            report = analytics.report(start_day, end_day)
+            timings.append(time.perf_counter() - started)
+        print(f"report {text:>5}: {min(timings) * 1000:7.2f} ms "
+              f"({report['orders']} orders, {report['revenue']} ETB)")
+
+    start_day, end_day = parse_range('1y', current_day)
+    started = time.perf_counter()
+    csv_bytes = analytics.export_csv(start_day, end_day)
+    print(f"csv export 1y: {(time.perf_counter() - started) * 1000:.0f} ms ({len(csv_bytes) // 1024} KiB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Micro-benchmark: render cost of large carts and order lists.
+
+Compares the old += string building with the compiled templates in
+utils/templates.py.
+
+Usage: python benchmarks/bench_templates.py [items]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import BOT_MESSAGES  # noqa: E402
+from utils.templates import messages  # noqa: E402
+
+STATUSES = ['pending_approval', 'approved', 'preparing', 'shipped', 'delivered', 'declined']
+
+
+def legacy_cart(cart_items, products):
+    total = 0
+    message = BOT_MESSAGES['cart_header']
+    for item_id in cart_items:
+        product = next((p for p in products if p['id'] == item_id), None)
+        if product:
+            message += f"- {product['name']} ({product['price']} ETB)\n"
+            total += product['price']
+    message += BOT_MESSAGES['total_label'].format(total=total)
+    return message
+
+
+def template_cart(cart_items, products, locale='en'):
+    products_by_id = {p['id']: p for p in products}
+    lines = [products_by_id[item_id] for item_id in cart_items if item_id in products_by_id]
+    total = sum(product['price'] for product in lines)
+    return "".join([
+        messages.text(locale, 'cart_header'),
+        messages.render_lines(locale, 'cart_line', lines),
+        messages.render(locale, 'total_label', total=total)
+    ])
+
+
+def legacy_orders(orders):
+    orders_text = "📋 **Your Orders:**\n\n"
+    for order_id, order in orders:
+        status_emoji = {
+            'pending_approval': '⏳',
+            'approved': '✅',
+            'preparing': '📦',
+            'shipped': '🚚',
+            'delivered': '🏠',
+            'declined': '❌'
+        }.get(order['status'], '❓')
+        status_text = {
+            'pending_approval': 'Pending Payment Approval',
+            'approved': 'Payment Approved - Preparing Order',
+            'preparing': 'Preparing for Shipment',
+            'shipped': 'Shipped - On the Way',
+            'delivered': 'Delivered',
+            'declined': 'Payment Declined'
+        }.get(order['status'], 'Unknown Status')
+        orders_text += f"{status_emoji} **{order_id}**\n"
+        orders_text += f"💰 {order['total']} ETB\n"
+        orders_text += f"📊 Status: {status_text}\n\n"
+    return orders_text
+
+
+def template_orders(orders, locale='en'):
+    return messages.text(locale, 'orders_header') + messages.render_orders(locale, orders)
+
+
+def bench(label, func, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"{label:<34} {seconds * 1000:9.3f} ms")
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    products = [{'id': i, 'name': f"Product {i}", 'price': 100 + i} for i in range(size)]
+    cart_items = [i % size for i in range(size)]
+    orders = [
+        (f"ORD{1000 + i}", {'total': 500 + i, 'status': STATUSES[i % len(STATUSES)]})
+        for i in range(size)
+    ]
+
+    assert legacy_cart(cart_items, products) == template_cart(cart_items, products)
+    assert legacy_orders(orders) == template_orders(orders)
+
+    number = max(1, 20000 // size)
+    print(f"{size} cart items / orders, best of 5")
+    bench("cart: += concatenation", lambda: legacy_cart(cart_items, products), max(1, number // 50))
+    bench("cart: compiled templates", lambda: template_cart(cart_items, products), number)
+    bench("cart: compiled templates (am)", lambda: template_cart(cart_items, products, 'am'), number)
+    bench("orders: += concatenation", lambda: legacy_orders(orders), number)
+    bench("orders: compiled templates", lambda: template_orders(orders), number)
+    bench("orders: compiled templates (am)", lambda: template_orders(orders, 'am'), number)
+
+
+if __name__ == '__main__':
+    main()
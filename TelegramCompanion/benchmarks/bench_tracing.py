@@ -0,0 +1,128 @@
+"""
+Benchmark: per-update cost of tracing.
+
+Feeds the same mix of updates (/start, category page, add to cart, cart) through
+the real user handlers with the Bot API answered in-process, and compares the
+time per update without the tracing middleware, with it installed but
+sampling nothing, at the configured sample rate, and with every update traced.
+The cases take turns on small batches so drift in machine speed hits them all
+alike.
+
+Usage: python benchmarks/bench_tracing.py [updates] [sample_rate]
+"""
+
+import asyncio
+import contextvars
+import itertools
+import logging
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('ORDER_JOURNAL_DIR', tempfile.mkdtemp())
+os.environ.setdefault('CATALOG_SNAPSHOT_PATH', os.path.join(tempfile.mkdtemp(), 'catalog.snapshot'))
+
+import aiogram.bot.base  # noqa: E402
+from aiogram import Bot, Dispatcher, types  # noqa: E402
+from aiogram.contrib.fsm_storage.memory import MemoryStorage  # noqa: E402
+from config import TRACE_SAMPLE_RATE  # noqa: E402
+from data import storage as data_storage  # noqa: E402
+from handlers.user_handlers import register_user_handlers  # noqa: E402
+from utils.tracing import TracedBot, TracedStorage, TracingMiddleware, tracer  # noqa: E402
+
+logging.disable(logging.INFO)
+
+TOKEN = '123456:ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghi'
+BATCH = 200  # updates per turn of each case
+message_ids = itertools.count(1)
+
+
+async def fake_make_request(session, server, token, method, data=None, files=None, **kwargs):
+    """Answer Bot API calls in-process, the way Telegram would shape them."""
+    if method.startswith(('send', 'edit')):
+        chat_id = int((data or {}).get('chat_id', 1))
+        return {'message_id': next(message_ids), 'date': 0, 'chat': {'id': chat_id, 'type': 'private'}, 'text': ''}
+    return True
+
+
+def make_updates(count: int) -> list:
+    update_ids = itertools.count(1)
+    updates = []
+    for i in range(count):
+        user_id = 1000 + i % 500
+        user = {'id': user_id, 'is_bot': False, 'first_name': 'User', 'language_code': 'en'}
+        chat = {'id': user_id, 'type': 'private'}
+        kind = i % 4
+        if kind == 0:
+            message = {'message_id': next(message_ids), 'date': 0, 'chat': chat, 'from': user, 'text': '/start',
+                       'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}]}
+            updates.append(types.Update(update_id=next(update_ids), message=message))
+            continue
+        data = ['catp_1_Electronics~home', 'add_2~catp_1_Electronics~home', 'cart~home'][kind - 1]
+        message = {'message_id': next(message_ids), 'date': 0, 'chat': chat, 'text': 'menu',
+                   'from': {'id': 1, 'is_bot': True, 'first_name': 'bot'}}
+        callback = {'id': str(i), 'from': user, 'chat_instance': '1', 'data': data, 'message': message}
+        updates.append(types.Update(update_id=next(update_ids), callback_query=callback))
+    return updates
+
+
+def make_dispatcher(traced: bool) -> Dispatcher:
+    bot = TracedBot(token=TOKEN)
+    dp = Dispatcher(bot, storage=TracedStorage(MemoryStorage()))
+    if traced:
+        dp.middleware.setup(TracingMiddleware())
+    register_user_handlers(dp, bot)
+    return dp
+
+
+async def run(dp: Dispatcher, updates: list, sample_rate: float) -> float:
+    """Process `updates` in order; returns the total time taken."""
+    Bot.set_current(dp.bot)
+    Dispatcher.set_current(dp)
+    tracer.sample_rate = sample_rate
+    base = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    for update in updates:
+        # One task per update, as aiogram does when polling
+        await loop.create_task(dp.updates_handler.notify(update), context=base.copy())
+    return time.perf_counter() - started
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    sample_rate = float(sys.argv[2]) if len(sys.argv) > 2 else TRACE_SAMPLE_RATE
+    aiogram.bot.base.api.make_request = fake_make_request
+    tracer.path = os.path.join(tempfile.mkdtemp(), 'traces.jsonl')
+    data_storage.load_catalog()
+    data_storage.cart.clear()
+
+    updates = make_updates(count)
+    plain, traced = make_dispatcher(False), make_dispatcher(True)
+    cases = [('no tracing', plain, 0.0), ('sampling nothing', traced, 0.0),
+             (f"sampled at {sample_rate:g}", traced, sample_rate), ('every update', traced, 1.0)]
+    await run(plain, updates[:1000], 0.0)  # warm up
+
+    totals = {name: 0.0 for name, _, _ in cases}
+    for start in range(0, count, BATCH):
+        batch = updates[start:start + BATCH]
+        for name, dp, rate in cases:
+            data_storage.cart.clear()
+            totals[name] += await run(dp, batch, rate)
+
+    baseline = totals['no tracing']
+    print(f"{count} updates through the user handlers")
+    for name, _, _ in cases:
+        print(f"  {name:<20} {totals[name] / count * 1e6:8.1f} us/update  "
+              f"overhead {(totals[name] / baseline - 1) * 100:+6.1f}%")
+    print(f"  traces exported: {tracer.exported}")
+    tracer.close()
+    for dp in (plain, traced):
+        await (await dp.bot.get_session()).close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,146 @@
+"""
+Benchmark: Bot API transport against a local stand-in server.
+
+Starts an aiohttp server on localhost that answers Bot API methods the way
+Telegram does (after a configurable service time) and sends bursts of
+sendMessage/answerCallbackQuery calls through:
+
+- aiogram's default session with keep-alive disabled (a new connection per
+  request, as when idle connections expire between bursts),
+- aiogram's default session,
+- PooledBot with its tuned pool.
+
+Reports requests per second, p50/p99 latency and connections opened (counted
+with the same hooks /api_stats uses). With idle_seconds set, every bot then
+sits idle that long and serves one more burst; past aiohttp's 15-second
+default keep-alive the default session has to open its connections again.
+
+Connections here are plain HTTP on loopback and client and server share one
+process, so the burst numbers mostly measure per-request CPU cost; against
+api.telegram.org over TLS a new connection costs one to two extra round-trips.
+
+Usage: python benchmarks/bench_transport.py [requests] [concurrency] [service_ms] [idle_seconds]
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from aiohttp import web  # noqa: E402
+from aiogram import Bot  # noqa: E402
+from aiogram.bot.api import TelegramAPIServer  # noqa: E402
+from utils.transport import PoolMetrics, PooledBot  # noqa: E402
+
+logging.disable(logging.WARNING)
+
+TOKEN = '123456:ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghi'
+ROUNDS = 5
+
+
+def stand_in_app(service_time: float) -> web.Application:
+    """Answer /bot<token>/<method> like the Bot API does."""
+    async def handle(request: web.Request):
+        method = request.match_info['method']
+        await asyncio.sleep(service_time)
+        if method == 'sendMessage':
+            data = await request.post()
+            result = {'message_id': 1, 'date': int(time.time()), 'text': data.get('text', ''),
+                      'chat': {'id': int(data.get('chat_id', 1)), 'type': 'private'}}
+        else:
+            result = True
+        return web.json_response({'ok': True, 'result': result})
+
+    app = web.Application()
+    app.router.add_post('/bot{token}/{method}', handle)
+    return app
+
+
+async def burst(bot: Bot, count: int, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def call(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            if i % 2:
+                await bot.send_message(1000 + i % 500, f"Order update {i}")
+            else:
+                await bot.answer_callback_query(str(i))
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(call(i) for i in range(count)))
+    return latencies
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    service_time = (float(sys.argv[3]) if len(sys.argv) > 3 else 2.0) / 1000
+    idle = float(sys.argv[4]) if len(sys.argv) > 4 else 0.0
+
+    runner = web.AppRunner(stand_in_app(service_time), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    no_keepalive = Bot(TOKEN, server=TelegramAPIServer.from_base(url))
+    no_keepalive._connector_init['force_close'] = True
+    cases = [
+        ('default, no keep-alive', no_keepalive),
+        ('aiogram default session', Bot(TOKEN, server=TelegramAPIServer.from_base(url))),
+        ('PooledBot', PooledBot(TOKEN, server_url=url))
+    ]
+
+    # Count connections for every case the same way PooledBot does
+    metrics = {}
+    for name, bot in cases:
+        await burst(bot, min(count, 500), concurrency)  # warm up
+        session = await bot.get_session()
+        metrics[name] = getattr(bot, 'metrics', None) or PoolMetrics()
+        if not hasattr(bot, 'metrics'):
+            config = metrics[name].trace_config()
+            config.freeze()
+            session._trace_configs.append(config)
+    warm = {name: (m.connections_created, m.connections_reused) for name, m in metrics.items()}
+
+    # Take turns so drift on the machine hits every case alike
+    rates = {name: [] for name, _ in cases}
+    latencies = {name: [] for name, _ in cases}
+    for _ in range(ROUNDS):
+        for name, bot in cases:
+            started = time.perf_counter()
+            latencies[name] += await burst(bot, count // ROUNDS, concurrency)
+            rates[name].append(count // ROUNDS / (time.perf_counter() - started))
+
+    print(f"{count} Bot API calls, {concurrency} concurrent, {service_time * 1000:g} ms service time")
+    for name, _ in cases:
+        ordered = sorted(latencies[name])
+        created = metrics[name].connections_created - warm[name][0]
+        reused = metrics[name].connections_reused - warm[name][1]
+        print(f"  {name:<26} {sorted(rates[name])[ROUNDS // 2]:8.0f} req/s  "
+              f"p50 {ordered[len(ordered) // 2] * 1000:6.2f} ms  p99 {ordered[int(len(ordered) * 0.99)] * 1000:6.2f} ms  "
+              f"{created:>5} connections opened, {reused / max(1, created + reused) * 100:5.1f}% reuse")
+
+    if idle:
+        opened = {name: metrics[name].connections_created for name, _ in cases}
+        await asyncio.sleep(idle)
+        print(f"\nBurst of {concurrency} after {idle:g} s idle:")
+        for name, bot in cases:
+            started = time.perf_counter()
+            await burst(bot, concurrency, concurrency)
+            print(f"  {name:<26} {(time.perf_counter() - started) * 1000:6.1f} ms, "
+                  f"{metrics[name].connections_created - opened[name]:>3} new connections")
+
+    for _, bot in cases:
+        await (await bot.get_session()).close()
+    await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,257 @@
+"""
+Replay recorded updates against the bot and report per-handler latency.
+
+Feeds a recording made with RECORD_UPDATES (see utils/update_recorder.py) into
+the Dispatcher from bot.py, set up exactly as in production, while the Bot API
+is answered in-process (optionally after a simulated round-trip). Orders, users
+and broadcasts go to temporary directories and the catalog snapshot is copied,
+so a replay never touches live data.
+
+Updates are replayed at the recorded pace divided by --speed, or back to back
+with --speed 0 (one at a time, which also makes --allocations exact). The
+report lists calls and p50/p95/p99/max latency per handler, plus allocated
+memory per call with --allocations. Save results with --json and compare a
+later run against them with --baseline to spot regressions before deploying.
+
+Usage: python benchmarks/replay_updates.py RECORDING.jsonl.gz [--speed N] [--latency MS]
+       [--allocations] [--throttle] [--json OUT] [--baseline PREVIOUS]
+"""
+
+import argparse
+import asyncio
+import contextvars
+import itertools
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+WORK_DIR = tempfile.mkdtemp(prefix='replay-')
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', '123456:ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghi')
+os.environ['ORDER_JOURNAL_DIR'] = os.path.join(WORK_DIR, 'journal')
+os.environ['USER_REGISTRY_PATH'] = os.path.join(WORK_DIR, 'users.jsonl')
+os.environ['BROADCAST_DIR'] = os.path.join(WORK_DIR, 'broadcast')
+os.environ['RECORD_UPDATES'] = 'false'
+os.environ.setdefault('TRACE_SAMPLE_RATE', '0')
+
+import config  # noqa: E402
+
+# Replay against a copy of the catalog: admin commands in the recording may edit it
+if os.path.exists(config.CATALOG_SNAPSHOT_PATH):
+    shutil.copy(config.CATALOG_SNAPSHOT_PATH, os.path.join(WORK_DIR, 'catalog.snapshot'))
+config.CATALOG_SNAPSHOT_PATH = os.environ['CATALOG_SNAPSHOT_PATH'] = os.path.join(WORK_DIR, 'catalog.snapshot')
+
+import aiogram.bot.base  # noqa: E402
+from aiogram import Bot, Dispatcher, types  # noqa: E402
+from aiogram.dispatcher.handler import current_handler  # noqa: E402
+from aiogram.dispatcher.middlewares import BaseMiddleware  # noqa: E402
+import bot as bot_module  # noqa: E402
+from utils.update_recorder import read_recording  # noqa: E402
+
+# bot.py logs at INFO; keep the report readable
+logging.getLogger().setLevel(logging.WARNING)
+
+message_ids = itertools.count(1)
+api_calls = Counter()
+
+
+def make_api(latency: float):
+    """In-process stand-in for the Bot API, shaped like Telegram's answers."""
+    async def make_request(session, server, token, method, data=None, files=None, **kwargs):
+        api_calls[method] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        data = data or {}
+        chat_id = data.get('chat_id', 1)
+        message = {'message_id': next(message_ids), 'date': int(time.time()), 'text': str(data.get('text', '')),
+                   'chat': {'id': int(chat_id) if str(chat_id).lstrip('-').isdigit() else 1, 'type': 'private'}}
+        if method == 'getMe':
+            return {'id': 1, 'is_bot': True, 'first_name': 'Yene Gebeya', 'username': 'yenegebeya_bot'}
+        if method == 'sendMediaGroup':
+            return [message]
+        if method == 'copyMessage':
+            return {'message_id': message['message_id']}
+        if method.startswith(('send', 'edit', 'forward')):
+            return message
+        return True
+    return make_request
+
+
+class HandlerTimingMiddleware(BaseMiddleware):
+    """Time every handler call (and whole updates), optionally with tracemalloc deltas."""
+
+    def __init__(self, allocations: bool):
+        super().__init__()
+        self.allocations = allocations
+        self.latencies = defaultdict(list)  # handler name -> seconds
+        self.allocated = defaultdict(list)  # handler name -> (retained bytes, peak bytes)
+        self._update = contextvars.ContextVar('replay_update', default=None)
+        self._handler = contextvars.ContextVar('replay_handler', default=None)
+
+    def _memory(self):
+        if not self.allocations:
+            return 0
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def _finish(self, name: str, started: float, memory: int):
+        self.latencies[name].append(time.perf_counter() - started)
+        if self.allocations:
+            current, peak = tracemalloc.get_traced_memory()
+            self.allocated[name].append((current - memory, peak - memory))
+
+    async def on_pre_process_update(self, update: types.Update, data: dict):
+        self._update.set(time.perf_counter())
+
+    async def on_post_process_update(self, update: types.Update, results, data: dict):
+        started = self._update.get()
+        if started is not None:
+            self.latencies['(whole update)'].append(time.perf_counter() - started)
+
+    async def _start(self):
+        handler = current_handler.get(None)
+        name = f"{handler.__module__.rsplit('.', 1)[-1]}.{handler.__name__}" if handler else 'unknown'
+        self._handler.set((name, time.perf_counter(), self._memory()))
+
+    async def _end(self):
+        running = self._handler.get()
+        if running is not None:
+            self._finish(*running)
+            self._handler.set(None)
+
+    async def on_process_message(self, message: types.Message, data: dict):
+        await self._start()
+
+    async def on_post_process_message(self, message: types.Message, results, data: dict):
+        await self._end()
+
+    async def on_process_callback_query(self, callback_query: types.CallbackQuery, data: dict):
+        await self._start()
+
+    async def on_post_process_callback_query(self, callback_query: types.CallbackQuery, results, data: dict):
+        await self._end()
+
+
+def percentile(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def replay(dp: Dispatcher, recording: list, speed: float) -> float:
+    Bot.set_current(dp.bot)
+    Dispatcher.set_current(dp)
+    base = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    if not speed:
+        for _, update in recording:
+            await loop.create_task(dp.process_updates([update]), context=base.copy())
+        return time.perf_counter() - started
+
+    tasks = []
+    for offset, update in recording:
+        delay = offset / speed - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(loop.create_task(dp.process_updates([update]), context=base.copy()))
+    await asyncio.gather(*tasks)
+    # Let timers started by handlers (digests, broadcasts) settle
+    await asyncio.sleep(0.1)
+    return time.perf_counter() - started
+
+
+def summarize(timing: HandlerTimingMiddleware) -> dict:
+    results = {}
+    for name, latencies in timing.latencies.items():
+        ordered = sorted(latencies)
+        row = {
+            'calls': len(ordered),
+            'p50_ms': percentile(ordered, 0.50) * 1000,
+            'p95_ms': percentile(ordered, 0.95) * 1000,
+            'p99_ms': percentile(ordered, 0.99) * 1000,
+            'max_ms': ordered[-1] * 1000
+        }
+        if timing.allocated.get(name):
+            allocated = timing.allocated[name]
+            row['retained_kib'] = sum(retained for retained, _ in allocated) / len(allocated) / 1024
+            row['peak_kib'] = max(peak for _, peak in allocated) / 1024
+        results[name] = row
+    return results
+
+
+def print_report(results: dict, baseline: dict = None):
+    header = f"{'handler':<40} {'calls':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    with_memory = any('peak_kib' in row for row in results.values())
+    if with_memory:
+        header += f" {'kept KiB':>9} {'peak KiB':>9}"
+    if baseline:
+        header += f" {'p95 vs base':>12}"
+    print(header)
+    for name, row in sorted(results.items(), key=lambda item: -item[1]['p95_ms'] * item[1]['calls']):
+        line = (f"{name:<40} {row['calls']:>6} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+                f"{row['p99_ms']:>8.2f} {row['max_ms']:>8.2f}")
+        if with_memory:
+            line += f" {row.get('retained_kib', 0):>9.1f} {row.get('peak_kib', 0):>9.1f}"
+        if baseline:
+            before = baseline.get(name)
+            line += f" {(row['p95_ms'] / before['p95_ms'] - 1) * 100:>+11.0f}%" if before else f" {'new':>12}"
+        print(line)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('recording')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="replay pace relative to the recording; 0 = back to back (default 1)")
+    parser.add_argument('--latency', type=float, default=0.0, help="simulated Bot API round-trip in ms")
+    parser.add_argument('--allocations', action='store_true', help="measure memory allocated per handler")
+    parser.add_argument('--throttle', action='store_true', help="keep the anti-flood middleware installed")
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--baseline', help="compare with results saved by --json")
+    args = parser.parse_args()
+
+    recording = [(offset, types.Update(**update)) for offset, update in read_recording(args.recording)]
+    if not recording:
+        sys.exit(f"No updates in {args.recording}")
+
+    aiogram.bot.base.api.make_request = make_api(args.latency / 1000)
+    bot_module.setup_dispatcher(throttle=args.throttle)
+    timing = HandlerTimingMiddleware(args.allocations)
+    bot_module.dp.middleware.setup(timing)
+
+    if args.allocations:
+        tracemalloc.start()
+    elapsed = await replay(bot_module.dp, recording, args.speed)
+    if args.allocations:
+        tracemalloc.stop()
+
+    pace = 'back to back' if not args.speed else f"at {args.speed:g}x"
+    print(f"Replayed {len(recording)} updates {pace} in {elapsed:.2f} s "
+          f"({len(recording) / elapsed:.0f} updates/s), {sum(api_calls.values())} Bot API calls\n")
+    results = summarize(timing)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    print(f"\nBot API calls: {', '.join(f'{method} {count}' for method, count in api_calls.most_common())}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if bot_module.data_storage.order_journal:
+        await bot_module.data_storage.order_journal.aclose()
+    await (await bot_module.bot.get_session()).close()
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,142 @@
+"""
+Stress test: cart and order mutations under rapid taps from many users.
+
+Every simulated user taps "add to cart" several times, then "Buy Now", then
+double-taps a payment method, the way an impatient customer on a slow network
+does. The updates of all users are interleaved (each user's own taps stay in
+order, as Telegram delivers them) and fed in polling-sized batches through the
+real user handlers, with Bot API calls answered after a random delay.
+
+Afterwards every user must have exactly one order holding every item they
+added. Lost adds, missing orders and duplicate orders are counted for aiogram's
+default Dispatcher and for SerializedDispatcher.
+
+Usage: python benchmarks/stress_update_queue.py [users] [adds_per_user]
+"""
+
+import asyncio
+import contextvars
+import itertools
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('CATALOG_SNAPSHOT_PATH', os.path.join(tempfile.mkdtemp(), 'catalog.snapshot'))
+
+import aiogram.bot.base  # noqa: E402
+from aiogram import Bot, Dispatcher, types  # noqa: E402
+from aiogram.contrib.fsm_storage.memory import MemoryStorage  # noqa: E402
+from data import storage as data_storage  # noqa: E402
+from handlers.user_handlers import register_user_handlers  # noqa: E402
+from utils.update_queue import SerializedDispatcher  # noqa: E402
+
+logging.disable(logging.WARNING)
+
+TOKEN = '123456:ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghi'
+BATCH = 100  # updates per getUpdates response
+MAX_API_LATENCY = 0.005  # seconds
+message_ids = itertools.count(1)
+
+
+async def slow_make_request(session, server, token, method, data=None, files=None, **kwargs):
+    """Answer Bot API calls after a random round-trip delay."""
+    await asyncio.sleep(random.uniform(0, MAX_API_LATENCY))
+    if method.startswith(('send', 'edit')):
+        chat_id = int((data or {}).get('chat_id', 1))
+        return {'message_id': next(message_ids), 'date': 0, 'chat': {'id': chat_id, 'type': 'private'}, 'text': ''}
+    return True
+
+
+def make_updates(users: int, adds: int, product_ids: list, rng: random.Random) -> list:
+    """Interleave each user's taps randomly while keeping every user's own order."""
+    per_user = []
+    for user_id in range(1000, 1000 + users):
+        user = {'id': user_id, 'is_bot': False, 'first_name': 'User', 'language_code': 'en'}
+        taps = [f"add_{rng.choice(product_ids)}~cart~home" for _ in range(adds)]
+        taps += ['checkout~cart~home', 'pay_telebirr', 'pay_telebirr']
+        per_user.append([(user, data) for data in taps])
+
+    update_ids = itertools.count(1)
+    updates = []
+    while per_user:
+        taps = rng.choice(per_user)
+        user, data = taps.pop(0)
+        if not taps:
+            per_user.remove(taps)
+        chat = {'id': user['id'], 'type': 'private'}
+        message = {'message_id': next(message_ids), 'date': 0, 'chat': chat, 'text': 'menu',
+                   'from': {'id': 1, 'is_bot': True, 'first_name': 'bot'}}
+        update_id = next(update_ids)
+        callback = {'id': str(update_id), 'from': user, 'chat_instance': '1', 'data': data, 'message': message}
+        updates.append(types.Update(update_id=update_id, callback_query=callback))
+    return updates
+
+
+async def run(dp: Dispatcher, updates: list) -> float:
+    """Feed the updates in batches the way polling does: each batch is its own task."""
+    Bot.set_current(dp.bot)
+    Dispatcher.set_current(dp)
+    data_storage.cart.clear()
+    data_storage.pending_payments.clear()
+    base = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    tasks = []
+    for start in range(0, len(updates), BATCH):
+        tasks.append(loop.create_task(dp.process_updates(updates[start:start + BATCH]), context=base.copy()))
+        await asyncio.sleep(0)  # the next getUpdates round-trip
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - started
+
+
+def check(users: int, adds: int) -> Counter:
+    problems = Counter()
+    orders_by_user = Counter(order['user_id'] for order in data_storage.pending_payments.values())
+    for user_id in range(1000, 1000 + users):
+        problems['lost adds'] += adds - len(data_storage.cart.get(user_id, []))
+        orders = orders_by_user[user_id]
+        problems['missing orders'] += orders == 0
+        problems['duplicate orders'] += max(0, orders - 1)
+    for order in data_storage.pending_payments.values():
+        problems['orders with missing items'] += len(order['items']) != adds
+    return problems
+
+
+async def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    adds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    rng = random.Random(42)
+    aiogram.bot.base.api.make_request = slow_make_request
+
+    data_storage.load_catalog()
+    product_ids = [product['id'] for product in data_storage.products if not product.get('variants')]
+    for product_id in product_ids:
+        data_storage.get_product_by_id(product_id)['stock'] = users * adds
+    updates = make_updates(users, adds, product_ids, rng)
+    print(f"{users} users x ({adds} adds + checkout + double-tapped payment) = {len(updates)} updates")
+
+    for name, dispatcher_class in (('Dispatcher', Dispatcher), ('SerializedDispatcher', SerializedDispatcher)):
+        bot = Bot(token=TOKEN)
+        dp = dispatcher_class(bot, storage=MemoryStorage())
+        register_user_handlers(dp, bot)
+        elapsed = await run(dp, updates)
+        problems = check(users, adds)
+        verdict = 'OK' if not any(problems.values()) else 'BROKEN'
+        print(f"\n{name}: {verdict} in {elapsed:.2f} s ({len(updates) / elapsed:.0f} updates/s)")
+        for problem in ('lost adds', 'missing orders', 'duplicate orders', 'orders with missing items'):
+            print(f"  {problem:<26} {problems[problem]}")
+        if isinstance(dp, SerializedDispatcher):
+            stats = dp.user_queues.stats()
+            print(f"  peak pending {stats['peak_queued']}, peak per user {stats['peak_user_depth']}, "
+                  f"wait p95 {stats['wait_p95'] * 1000:.1f} ms")
+        await (await bot.get_session()).close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
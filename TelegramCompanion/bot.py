@@ -1,11 +1,23 @@
 import logging
 import asyncio
 import os
-from aiogram import Bot, Dispatcher
+from aiogram import Dispatcher
 from aiogram.contrib.fsm_storage.memory import MemoryStorage
-from config import API_TOKEN
+from config import API_TOKEN, RECORD_UPDATES
+from data import storage as data_storage
+from data.analytics import SalesAnalytics, sales
+from data.recommendations import CoPurchaseIndex, recommendations
+from data.users import user_registry
 from handlers.user_handlers import register_user_handlers
 from handlers.admin_handlers import register_admin_handlers
+from utils.broadcast import broadcaster
+from utils.order_routing import order_router
+from utils.throttling import ThrottlingMiddleware
+from utils.tracing import TracedStorage, TracingMiddleware, tracer
+from utils.transport import PooledBot
+from utils.update_queue import SerializedDispatcher
+from utils.update_recorder import UpdateRecorderMiddleware, update_recorder
+from utils.user_tracking import UserRegistryMiddleware
 
 # Configure logging
 logging.basicConfig(
@@ -15,22 +27,87 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Initialize bot and dispatcher
-bot = Bot(token=API_TOKEN)
-storage = MemoryStorage()
-dp = Dispatcher(bot, storage=storage)
+bot = PooledBot(token=API_TOKEN)
+storage = TracedStorage(MemoryStorage())
+dp = SerializedDispatcher(bot, storage=storage)
+
+async def rebuild_analytics():
+    """Rebuild sales rollups and recommendations from the order history without holding up polling."""
+    # Read the archive and aggregate in a worker thread; orders approved meanwhile
+    # are recorded into the live instance and re-recorded after the swap
+    live = {order_id: dict(order) for order_id, order in data_storage.pending_payments.items()}
+    
+    def build():
+        history = data_storage.order_history(live)
+        fresh_sales = SalesAnalytics()
+        fresh_sales.rebuild(history, data_storage.get_product_category)
+        fresh_recommendations = CoPurchaseIndex()
+        fresh_recommendations.rebuild(history)
+        return fresh_sales, fresh_recommendations
+    
+    try:
+        fresh_sales, fresh_recommendations = await asyncio.get_event_loop().run_in_executor(None, build)
+        sales.adopt(fresh_sales)
+        sales.rebuild(data_storage.pending_payments, data_storage.get_product_category)
+        recommendations.adopt(fresh_recommendations)
+        recommendations.rebuild(data_storage.pending_payments)
+    except Exception as e:
+        logger.error(f"Failed to rebuild analytics: {e}")
+
+async def on_startup(dp: Dispatcher):
+    """Route recovered pending orders, resume an interrupted broadcast and rebuild analytics."""
+    asyncio.get_event_loop().create_task(rebuild_analytics())
+    await order_router.route_recovered(dp.bot)
+    await broadcaster.resume(dp.bot)
+
+async def on_shutdown(dp: Dispatcher):
+    """Flush the order journal and persist catalog edits before exiting."""
+    if data_storage.order_journal:
+        await data_storage.order_journal.aclose()
+    try:
+        await asyncio.get_event_loop().run_in_executor(None, data_storage.save_catalog)
+    except Exception as e:
+        logger.error(f"Failed to save catalog snapshot: {e}")
+    user_registry.close()
+    tracer.close()
+    update_recorder.close()
+
+def setup_dispatcher(throttle: bool = True):
+    """Load persisted state, install middlewares and register handlers on `dp`."""
+    # Map the catalog snapshot (products are decoded on first access)
+    data_storage.load_catalog()
+    
+    # Recover orders before accepting updates, then stock taken by approvals
+    # the catalog snapshot missed (only after a crash)
+    data_storage.open_order_journal()
+    data_storage.reapply_stock_changes()
+    user_registry.load()
+    
+    # Record updates before anything can drop them
+    if RECORD_UPDATES:
+        dp.middleware.setup(UpdateRecorderMiddleware())
+    
+    # Drop floods before any handler filters run
+    if throttle:
+        dp.middleware.setup(ThrottlingMiddleware())
+    dp.middleware.setup(UserRegistryMiddleware())
+    if tracer.enabled:
+        dp.middleware.setup(TracingMiddleware())
+    
+    # Register handlers
+    register_user_handlers(dp, bot)
+    register_admin_handlers(dp, bot)
 
 def main():
     """Main function to start the bot."""
     try:
-        # Register handlers
-        register_user_handlers(dp, bot)
-        register_admin_handlers(dp, bot)
+        setup_dispatcher()
         
         logger.info("Starting Yene Gebeya Telegram Bot...")
         
         # Start polling
         from aiogram import executor
-        executor.start_polling(dp, skip_updates=True)
+        executor.start_polling(dp, skip_updates=True, on_startup=on_startup, on_shutdown=on_shutdown)
         
     except Exception as e:
         logger.error(f"Error starting bot: {e}")
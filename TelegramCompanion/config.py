@@ -7,6 +7,112 @@ API_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', 'YOUR_BOT_TOKEN_HERE')
 # Admin configuration
 ADMIN_IDS = [7007277566]  # Admin Telegram user IDs
 
+# Admin digest configuration
+# When enabled, pending-approval orders are buffered for ADMIN_DIGEST_WINDOW
+# seconds and each admin receives one paginated summary per window.
+ADMIN_DIGEST_ENABLED = os.getenv('ADMIN_DIGEST_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+ADMIN_DIGEST_WINDOW = int(os.getenv('ADMIN_DIGEST_WINDOW', '60'))  # seconds
+ADMIN_DIGEST_PAGE_SIZE = 5  # orders per digest page
+
+# Order routing configuration
+# 'round_robin' or 'least_outstanding' send each order to one admin;
+# 'broadcast' sends it to all admins (claims still prevent double reviews).
+ORDER_ROUTING_STRATEGY = os.getenv('ORDER_ROUTING_STRATEGY', 'round_robin')
+ORDER_CLAIM_TIMEOUT = int(os.getenv('ORDER_CLAIM_TIMEOUT', '900'))  # seconds before an unclaimed order is reassigned
+
+# Throttling configuration
+# (tokens per second, burst size) per command or callback prefix; anything not
+# listed shares the 'default' bucket. Admins are never throttled.
+THROTTLE_RATES = {
+    'default': (1.0, 5),
+    'start': (0.2, 2),
+    'add': (2.0, 6),
+    'checkout': (0.5, 2),
+    'pay': (0.5, 2)
+}
+THROTTLE_COALESCE_WINDOW = 1.0  # seconds; identical callbacks within it are dropped
+THROTTLE_IDLE_TTL = 600  # seconds before an idle user's buckets are evicted
+THROTTLE_MAX_USERS = 10000  # upper bound on tracked users
+
+# Order journal configuration
+ORDER_JOURNAL_DIR = os.getenv(
+    'ORDER_JOURNAL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'journal')
+)
+JOURNAL_FSYNC_BATCH = 64  # records per fsync
+JOURNAL_FSYNC_INTERVAL = 1.0  # seconds; max time a record waits for fsync
+JOURNAL_SNAPSHOT_EVERY = 50000  # records between snapshots (bounds replay on startup)
+JOURNAL_ARCHIVE_AFTER = 30 * 24 * 3600  # seconds before a delivered, declined or abandoned order moves to the archive
+
+# User registry and broadcasts
+USER_REGISTRY_PATH = os.getenv(
+    'USER_REGISTRY_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'users.jsonl')
+)
+BROADCAST_DIR = os.getenv(
+    'BROADCAST_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'broadcast')
+)
+BROADCAST_RATE = 25  # messages per second; Telegram allows about 30 in total, the rest is left for handlers
+BROADCAST_CONCURRENCY = 10  # requests in flight
+BROADCAST_CHUNK_SIZE = 100  # recipients per checkpoint; at most one chunk is re-sent after a crash
+BROADCAST_PROGRESS_INTERVAL = 5  # seconds between progress message edits
+
+# "Frequently bought together" recommendations
+RECOMMENDATIONS_TOP_K = 5  # partners cached per product
+RECOMMENDATIONS_MAX_ITEMS = 20  # distinct products per order counted as pairs (bounds the per-order update)
+RECOMMENDATIONS_BUTTONS = 2  # "add also" buttons under a product or cart
+
+# Catalog snapshot (memory-mapped at startup, products are decoded lazily)
+CATALOG_SNAPSHOT_PATH = os.getenv(
+    'CATALOG_SNAPSHOT_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'catalog.snapshot')
+)
+# Load the built-in sample products when there is no catalog snapshot yet
+LOAD_SAMPLE_DATA = os.getenv('LOAD_SAMPLE_DATA', 'true').lower() in ('1', 'true', 'yes')
+
+# Update recording for offline replay (benchmarks/replay_updates.py)
+RECORD_UPDATES = os.getenv('RECORD_UPDATES', 'false').lower() in ('1', 'true', 'yes')
+RECORD_DIR = os.getenv(
+    'RECORD_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'recordings')
+)
+RECORD_FLUSH_EVERY = 64  # updates between sync flushes (lost at most on a crash)
+
+# Update processing: each user's updates run in order, different users in parallel
+UPDATE_CONCURRENCY = int(os.getenv('UPDATE_CONCURRENCY', '64'))  # handlers running at once across all users
+
+# Bot API transport (see utils/transport.py)
+# Self-hosted Bot API server, e.g. http://localhost:8081 (log the bot out of api.telegram.org first)
+BOT_API_SERVER_URL = os.getenv('BOT_API_SERVER_URL', '')
+# Keep-alive connections: every running handler, the broadcast senders and the long poll
+BOT_API_POOL_SIZE = int(os.getenv('BOT_API_POOL_SIZE', str(UPDATE_CONCURRENCY + BROADCAST_CONCURRENCY + 1)))
+BOT_API_KEEPALIVE = 60  # seconds an idle connection stays open
+BOT_API_DNS_TTL = 300  # seconds a resolved address is cached
+BOT_API_CONNECT_TIMEOUT = 5  # seconds to get a connection (from the pool or a new one)
+BOT_API_POLL_MARGIN = 10  # seconds added to the getUpdates long-poll timeout
+BOT_API_TIMEOUTS = {  # total seconds per request, by method
+    'default': 15,
+    'answerCallbackQuery': 5,
+    'deleteMessage': 10,
+    'sendPhoto': 30,
+    'editMessageMedia': 30,
+    'sendMediaGroup': 60,
+    'sendDocument': 60,
+    'copyMessage': 30
+}
+
+# On-demand profiling (/profile)
+PROFILE_MAX_SECONDS = 300  # longest profile an admin can request
+PROFILE_SAMPLE_INTERVAL = 0.005  # seconds of CPU time between stack samples (200 Hz)
+PROFILE_LAG_INTERVAL = 0.05  # seconds between event-loop lag probes
+
+# Per-update tracing (spans written as JSON lines, see utils/tracing.py)
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0.01'))  # share of updates traced; 0 disables tracing
+TRACE_PATH = os.getenv(
+    'TRACE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'traces', 'traces.jsonl')
+)
+TRACE_MAX_BYTES = 10 * 1024 * 1024  # rotate the trace file at this size
+TRACE_BACKUP_COUNT = 5  # rotated trace files kept
+
+# Sales analytics configuration
+SALES_TZ_OFFSET_HOURS = 3  # East Africa Time, used to bucket sales into days
+
 # Payment method information
 PAYMENT_METHODS = {
     "telebirr": "Telebirr: 0915794686 / 091283132",
@@ -25,14 +131,104 @@ BOT_MESSAGES = {
     'payment_prompt': "💳 Choose your payment method:",
     'order_processing': "📦 Your order is being processed. We'll contact you shortly!",
     'contact_info': "☎️ Contact us at: @Ztech7 or 0915794686",
-    'help_text': "ℹ️ How to shop:\n1. Choose a category\n2. View products\n3. Add to cart\n4. Buy now and pay\n5. Track with /myorder",
+    'help_text': "ℹ️ How to shop:\n1. Choose a category\n2. View products\n3. Add to cart\n4. Buy now and pay\n5. Track with /myorder\n\n🌐 Change language with /language",
     'unauthorized': "⛔ Not authorized.",
     'category_exists': "⚠️ Category already exists.",
     'category_added': "✅ Category '{category}' added.",
     'product_added': "✅ Product '{name}' added under '{category}'.",
     'product_format_error': "❌ Format:\n/add_product Name | Price | Desc | Image | Category",
     'added_to_cart': "✅ Added to cart!",
-    'payment_selected': "✅ Selected: {method}\n{info}\n\nAfter payment, use /myorder to track your delivery."
+    'payment_selected': "✅ Selected: {method}\n{info}\n\nAfter payment, use /myorder to track your delivery.",
+    'no_products_in_category': "📦 No products found in category '{category}'",
+    'product_caption': "**{name}**\n💵 {price} ETB{stock_info}\n\n{description}",
+    'stock_available': "\n📦 Stock: {stock} available",
+    'out_of_stock': "\n❌ Out of Stock",
+    'variant_options': "\n🎛️ Options: {axes}",
+    'choose_option': "👉 Choose {axis}",
+    'cart_line': "- {name} ({price} ETB)\n",
+    'cart_cleared': "🗑️ Cart cleared!",
+    'order_created': "✅ Order Created: {order_id}\n💰 Total: {total} ETB\n\n📱 Payment Method: {method}\n{payment_info}\n\n📸 Please send a screenshot or photo of your payment confirmation to complete your order.",
+    'order_not_found_checkout': "❌ Order not found. Please start checkout again.",
+    'payment_proof_received': "✅ Payment proof received for order {order_id}!\n📋 Your order is pending admin approval.\n🔔 You will be notified once approved.",
+    'payment_proof_prompt': "📸 Please send a photo/screenshot of your payment confirmation.",
+    'admin_new_order': "🔔 NEW ORDER - PENDING APPROVAL\n\n📋 Order ID: {order_id}\n👤 Customer: {first_name} (@{username})\n💰 Total: {total} ETB\n💳 Payment: {method}\n\n📦 Items:\n{items}\n📱 Customer ID: {user_id}",
+    'admin_order_item': "• {name} - {price} ETB\n",
+    'order_approved': "✅ ORDER APPROVED!\n\n📋 Order ID: {order_id}\n💰 Total: {total} ETB\n📦 Your order is now being prepared for shipment.\n🚚 You will receive shipping updates soon.\n\nThank you for shopping with Yene Gebeya!",
+    'order_declined': "❌ ORDER DECLINED\n\n📋 Order ID: {order_id}\n💰 Total: {total} ETB\n🔄 Your payment was not verified.\n📞 Please contact us at @Ztech7 for assistance.\n\nYou can try placing a new order with correct payment proof.",
+    'no_orders': "📦 You have no orders yet.",
+    'orders_header': "📋 **Your Orders:**\n\n",
+    'order_line': "{emoji} **{order_id}**\n💰 {total} ETB\n📊 Status: {status}\n\n",
+    'status_pending_proof': "Waiting for Payment Proof",
+    'status_pending_approval': "Pending Payment Approval",
+    'status_approved': "Payment Approved - Preparing Order",
+    'status_preparing': "Preparing for Shipment",
+    'status_shipped': "Shipped - On the Way",
+    'status_delivered': "Delivered",
+    'status_declined': "Payment Declined",
+    'status_unknown': "Unknown Status",
+    'language_prompt': "🌐 Choose your language:",
+    'language_set': "✅ Language set to English.",
+    'slow_down': "🐢 Slow down a little, please try again in a moment."
+}
+
+# Amharic translations. Keys missing here fall back to BOT_MESSAGES, which is
+# also why admin-only messages are not translated.
+BOT_MESSAGES_AM = {
+    'welcome': "👋 ወደ የኔ ገበያ እንኳን ደህና መጡ! ምድብ ይምረጡ:",
+    'cart_empty': "🧵 ጋሪዎ ባዶ ነው።",
+    'cart_header': "🛺 የእርስዎ ጋሪ:\n",
+    'total_label': "\n💵 ጠቅላላ: {total} ብር",
+    'payment_prompt': "💳 የክፍያ ዘዴ ይምረጡ:",
+    'order_processing': "📦 ትዕዛዝዎ በሂደት ላይ ነው። በቅርቡ እናገኝዎታለን!",
+    'contact_info': "☎️ ያግኙን: @Ztech7 ወይም 0915794686",
+    'help_text': "ℹ️ እንዴት እንደሚገዙ:\n1. ምድብ ይምረጡ\n2. ምርቶችን ይመልከቱ\n3. ወደ ጋሪ ያክሉ\n4. አሁን ይግዙ እና ይክፈሉ\n5. በ /myorder ይከታተሉ\n\n🌐 ቋንቋ ለመቀየር /language",
+    'added_to_cart': "✅ ወደ ጋሪ ታክሏል!",
+    'no_products_in_category': "📦 በ '{category}' ምድብ ውስጥ ምርት አልተገኘም",
+    'product_caption': "**{name}**\n💵 {price} ብር{stock_info}\n\n{description}",
+    'stock_available': "\n📦 ክምችት: {stock} ይገኛል",
+    'out_of_stock': "\n❌ ከክምችት አልቋል",
+    'variant_options': "\n🎛️ አማራጮች: {axes}",
+    'choose_option': "👉 {axis} ይምረጡ",
+    'cart_line': "- {name} ({price} ብር)\n",
+    'cart_cleared': "🗑️ ጋሪው ተጸድቷል!",
+    'order_created': "✅ ትዕዛዝ ተፈጥሯል: {order_id}\n💰 ጠቅላላ: {total} ብር\n\n📱 የክፍያ ዘዴ: {method}\n{payment_info}\n\n📸 ትዕዛዝዎን ለማጠናቀቅ የክፍያ ማረጋገጫ ፎቶ ወይም ስክሪንሾት ይላኩ።",
+    'order_not_found_checkout': "❌ ትዕዛዙ አልተገኘም። እባክዎ ግዢውን እንደገና ይጀምሩ።",
+    'payment_proof_received': "✅ ለትዕዛዝ {order_id} የክፍያ ማረጋገጫ ደርሷል!\n📋 ትዕዛዝዎ የአስተዳዳሪ ማረጋገጫ እየጠበቀ ነው።\n🔔 ሲጸድቅ እናሳውቅዎታለን።",
+    'payment_proof_prompt': "📸 እባክዎ የክፍያ ማረጋገጫ ፎቶ/ስክሪንሾት ይላኩ።",
+    'order_approved': "✅ ትዕዛዝዎ ጸድቋል!\n\n📋 የትዕዛዝ መለያ: {order_id}\n💰 ጠቅላላ: {total} ብር\n📦 ትዕዛዝዎ ለመላክ እየተዘጋጀ ነው።\n🚚 የመላኪያ መረጃ በቅርቡ ይደርስዎታል።\n\nከየኔ ገበያ ስለገዙ እናመሰግናለን!",
+    'order_declined': "❌ ትዕዛዝዎ ተቀባይነት አላገኘም\n\n📋 የትዕዛዝ መለያ: {order_id}\n💰 ጠቅላላ: {total} ብር\n🔄 ክፍያዎ አልተረጋገጠም።\n📞 ለእርዳታ @Ztech7 ያግኙን።\n\nትክክለኛ የክፍያ ማረጋገጫ በማያያዝ አዲስ ትዕዛዝ ማስገባት ይችላሉ።",
+    'no_orders': "📦 እስካሁን ምንም ትዕዛዝ የለዎትም።",
+    'orders_header': "📋 **የእርስዎ ትዕዛዞች:**\n\n",
+    'order_line': "{emoji} **{order_id}**\n💰 {total} ብር\n📊 ሁኔታ: {status}\n\n",
+    'status_pending_proof': "የክፍያ ማረጋገጫ በመጠበቅ ላይ",
+    'status_pending_approval': "የክፍያ ማረጋገጫ በመጠበቅ ላይ (አስተዳዳሪ)",
+    'status_approved': "ክፍያ ጸድቋል - ትዕዛዝ እየተዘጋጀ ነው",
+    'status_preparing': "ለመላክ እየተዘጋጀ ነው",
+    'status_shipped': "ተልኳል - በመንገድ ላይ",
+    'status_delivered': "ደርሷል",
+    'status_declined': "ክፍያ ተቀባይነት አላገኘም",
+    'status_unknown': "ያልታወቀ ሁኔታ",
+    'language_prompt': "🌐 ቋንቋ ይምረጡ:",
+    'language_set': "✅ ቋንቋ ወደ አማርኛ ተቀይሯል።",
+    'slow_down': "🐢 እባክዎ ትንሽ ቀስ ይበሉ፣ ከአፍታ በኋላ እንደገና ይሞክሩ።"
+}
+
+# Message templates per locale, compiled once at startup by utils/templates.py
+LOCALE_MESSAGES = {
+    'en': BOT_MESSAGES,
+    'am': BOT_MESSAGES_AM
+}
+DEFAULT_LOCALE = 'en'
+
+# Order status emoji shown in order listings
+ORDER_STATUS_EMOJI = {
+    'pending_proof': '💳',
+    'pending_approval': '⏳',
+    'approved': '✅',
+    'preparing': '📦',
+    'shipped': '🚚',
+    'delivered': '🏠',
+    'declined': '❌'
 }
 
 # Validate configuration
@@ -0,0 +1,307 @@
+"""
+Sales analytics backed by columnar order lines and daily rollups.
+
+Approved order lines are appended to NumPy column arrays and, at the same time,
+added to per-day rollup matrices (revenue and units per product, revenue per
+category, revenue and order count per payment method). A report over any date
+range is a slice-and-sum over the rollups, so its cost depends on the number of
+days and products, not on the number of orders.
+"""
+
+import csv
+import io
+import logging
+import time
+from datetime import date, datetime, timedelta
+import numpy as np
+from config import SALES_TZ_OFFSET_HOURS
+
+logger = logging.getLogger(__name__)
+
+EPOCH = date(1970, 1, 1)
+
+# Statuses that count as a sale
+SOLD_STATUSES = ('approved', 'preparing', 'shipped', 'delivered')
+
+
+def day_number(timestamp: float) -> int:
+    """Day index (days since 1970-01-01) in the shop's timezone."""
+    return int((timestamp + SALES_TZ_OFFSET_HOURS * 3600) // 86400)
+
+
+def day_to_date(day: int) -> date:
+    return EPOCH + timedelta(days=day)
+
+
+def date_to_day(value: date) -> int:
+    return (value - EPOCH).days
+
+
+def today() -> int:
+    return day_number(time.time())
+
+
+def parse_range(text: str, current_day: int = None):
+    """
+    Parse a report range into inclusive (start_day, end_day).
+
+    Accepts: today, yesterday, 7d, 30d, 12w, 6m, 1y, all, YYYY-MM-DD,
+    and YYYY-MM-DD..YYYY-MM-DD.
+    """
+    current_day = today() if current_day is None else current_day
+    text = (text or '30d').strip().lower()
+
+    if text == 'today':
+        return current_day, current_day
+    if text == 'yesterday':
+        return current_day - 1, current_day - 1
+    if text == 'all':
+        return None, current_day
+
+    units = {'d': 1, 'w': 7, 'm': 30, 'y': 365}
+    if text[:-1].isdigit() and text[-1] in units:
+        days = int(text[:-1]) * units[text[-1]]
+        if days <= 0:
+            raise ValueError("Range must be positive")
+        return current_day - days + 1, current_day
+
+    bounds = text.split('..')
+    if len(bounds) > 2:
+        raise ValueError(f"Invalid range: {text}")
+    days = [date_to_day(datetime.strptime(bound, '%Y-%m-%d').date()) for bound in bounds]
+    start, end = days[0], days[-1]
+    if start > end:
+        raise ValueError("Range start is after its end")
+    return start, end
+
+
+class Dimension:
+    """Maps keys (product IDs, category names, ...) to dense column indexes."""
+
+    def __init__(self):
+        self.index = {}
+        self.labels = []
+
+    def __len__(self):
+        return len(self.labels)
+
+    def get(self, key, label=None) -> int:
+        idx = self.index.get(key)
+        if idx is None:
+            idx = self.index[key] = len(self.labels)
+            self.labels.append(label if label is not None else str(key))
+        elif label is not None:
+            self.labels[idx] = label
+        return idx
+
+
+def _grow(array: np.ndarray, shape: tuple) -> np.ndarray:
+    """Return an array at least `shape` big (doubling), preserving contents."""
+    if all(have >= need for have, need in zip(array.shape, shape)):
+        return array
+    new_shape = tuple(max(have, need, have * 2) if need > have else have
+                      for have, need in zip(array.shape, shape))
+    grown = np.zeros(new_shape, dtype=array.dtype)
+    grown[tuple(slice(0, n) for n in array.shape)] = array
+    return grown
+
+
+class SalesAnalytics:
+    """Columnar order-line store with incrementally maintained daily rollups."""
+
+    LINE_COLUMNS = (
+        ('day', np.int32), ('product', np.int32), ('category', np.int32),
+        ('method', np.int32), ('units', np.int32), ('amount', np.int64)
+    )
+
+    def __init__(self, capacity: int = 1024):
+        self.products = Dimension()
+        self.categories = Dimension()
+        self.methods = Dimension()
+        self.recorded_orders = set()
+
+        # Order lines, one array per column
+        self.size = 0
+        self.lines = {name: np.zeros(capacity, dtype=dtype) for name, dtype in self.LINE_COLUMNS}
+
+        # Daily rollups: row = day - first_day
+        self.first_day = None
+        self.days = 0
+        self.product_revenue = np.zeros((0, 0), dtype=np.int64)
+        self.product_units = np.zeros((0, 0), dtype=np.int64)
+        self.category_revenue = np.zeros((0, 0), dtype=np.int64)
+        self.method_revenue = np.zeros((0, 0), dtype=np.int64)
+        self.method_orders = np.zeros((0, 0), dtype=np.int64)
+
+    # Ingestion
+
+    def _day_row(self, day: int) -> int:
+        if self.first_day is None:
+            self.first_day = day
+        if day < self.first_day:
+            # Shift existing rows down to make room for earlier days
+            shift = self.first_day - day
+            for name in ('product_revenue', 'product_units', 'category_revenue', 'method_revenue', 'method_orders'):
+                array = getattr(self, name)
+                shifted = np.zeros((array.shape[0] + shift, array.shape[1]), dtype=array.dtype)
+                shifted[shift:] = array
+                setattr(self, name, shifted)
+            self.first_day = day
+            self.days += shift
+        row = day - self.first_day
+        self.days = max(self.days, row + 1)
+        return row
+
+    def _append_line(self, day: int, product: int, category: int, method: int, units: int, amount: int):
+        if self.size == len(self.lines['day']):
+            for name in self.lines:
+                self.lines[name] = _grow(self.lines[name], (self.size * 2,))
+        for name, value in zip(('day', 'product', 'category', 'method', 'units', 'amount'),
+                               (day, product, category, method, units, amount)):
+            self.lines[name][self.size] = value
+        self.size += 1
+
+    def record_order(self, order_id: str, order: dict, category_of=None):
+        """
+        Add an approved order to the line store and rollups (idempotent per order).
+
+        category_of(product_id) is used for order items recorded without a category.
+        """
+        if order_id in self.recorded_orders:
+            return
+        self.recorded_orders.add(order_id)
+
+        timestamp = order.get('approved_at') or order.get('created_at') or time.time()
+        day = day_number(timestamp)
+        row = self._day_row(day)
+        method = self.methods.get(order['payment_method'], order['payment_method'].upper())
+
+        for item in order['items']:
+            product = self.products.get(item['id'], item.get('product_name') or item['name'])
+            category_name = item.get('category') or (category_of and category_of(item['id'])) or 'Unknown'
+            category = self.categories.get(category_name.lower(), category_name)
+            units = item.get('quantity', 1)
+            amount = item['price'] * units
+            self._append_line(day, product, category, method, units, amount)
+
+            self.product_revenue = _grow(self.product_revenue, (row + 1, product + 1))
+            self.product_units = _grow(self.product_units, (row + 1, product + 1))
+            self.category_revenue = _grow(self.category_revenue, (row + 1, category + 1))
+            self.product_revenue[row, product] += amount
+            self.product_units[row, product] += units
+            self.category_revenue[row, category] += amount
+
+        self.method_revenue = _grow(self.method_revenue, (row + 1, method + 1))
+        self.method_orders = _grow(self.method_orders, (row + 1, method + 1))
+        self.method_revenue[row, method] += order['total']
+        self.method_orders[row, method] += 1
+
+    def rebuild(self, orders: dict, category_of=None):
+        """Record every sold order, e.g. after recovering orders at startup."""
+        started = time.perf_counter()
+        # Chronological order means day rows are only ever appended, never shifted
+        sold = sorted(
+            ((order_id, order) for order_id, order in orders.items() if order.get('status') in SOLD_STATUSES),
+            key=lambda pair: pair[1].get('approved_at') or pair[1].get('created_at') or 0
+        )
+        for order_id, order in sold:
+            self.record_order(order_id, order, category_of)
+        logger.info(f"Sales rollups rebuilt from {len(self.recorded_orders)} orders "
+                    f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def adopt(self, other: 'SalesAnalytics'):
+        """Take over the lines and rollups of an instance rebuilt off the event loop."""
+        self.__dict__.update(other.__dict__)
+
+    # Reporting
+
+    def _rows(self, start_day, end_day):
+        if self.first_day is None:
+            return slice(0, 0)
+        start = 0 if start_day is None else max(start_day - self.first_day, 0)
+        end = min(end_day - self.first_day + 1, self.days)
+        return slice(start, max(start, end))
+
+    def report(self, start_day, end_day, top: int = 5) -> dict:
+        """Summarize sales between two days (inclusive); start_day None means all time."""
+        rows = self._rows(start_day, end_day)
+        product_revenue = self.product_revenue[rows].sum(axis=0)
+        product_units = self.product_units[rows].sum(axis=0)
+        category_revenue = self.category_revenue[rows].sum(axis=0)
+        method_revenue = self.method_revenue[rows].sum(axis=0)
+        method_orders = self.method_orders[rows].sum(axis=0)
+
+        best = np.argsort(-product_revenue, kind='stable')[:top]
+        categories = np.argsort(-category_revenue, kind='stable')
+        methods = np.argsort(-method_revenue, kind='stable')
+
+        if start_day is None:
+            start_day = self.first_day if self.first_day is not None else end_day
+
+        return {
+            'start': day_to_date(start_day),
+            'end': day_to_date(end_day),
+            'revenue': int(method_revenue.sum()),
+            'orders': int(method_orders.sum()),
+            'units': int(product_units.sum()),
+            'best_sellers': [
+                (self.products.labels[i], int(product_revenue[i]), int(product_units[i]))
+                for i in best if product_units[i] > 0
+            ],
+            'categories': [
+                (self.categories.labels[i], int(category_revenue[i]))
+                for i in categories if category_revenue[i] > 0
+            ],
+            'payment_methods': [
+                (self.methods.labels[i], int(method_revenue[i]), int(method_orders[i]))
+                for i in methods if method_orders[i] > 0
+            ],
+            'daily_revenue': [
+                (day_to_date(self.first_day + rows.start + offset), int(value))
+                for offset, value in enumerate(self.method_revenue[rows].sum(axis=1))
+            ]
+        }
+
+    def export_csv(self, start_day, end_day) -> bytes:
+        """Order lines between two days as CSV."""
+        columns = {name: column[:self.size] for name, column in self.lines.items()}
+        mask = columns['day'] <= end_day
+        if start_day is not None:
+            mask &= columns['day'] >= start_day
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['date', 'product', 'category', 'payment_method', 'units', 'amount_etb'])
+        for day, product, category, method, units, amount in zip(
+                *(columns[name][mask].tolist() for name in ('day', 'product', 'category', 'method', 'units', 'amount'))):
+            writer.writerow([
+                day_to_date(day).isoformat(), self.products.labels[product], self.categories.labels[category],
+                self.methods.labels[method], units, amount
+            ])
+        return buffer.getvalue().encode('utf-8')
+
+
+def render_chart_png(report: dict) -> bytes:
+    """Render daily revenue and best sellers as a PNG. Requires matplotlib."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    figure, (revenue_axis, products_axis) = plt.subplots(2, 1, figsize=(9, 8))
+    days = [day for day, _ in report['daily_revenue']]
+    revenue_axis.plot(days, [value for _, value in report['daily_revenue']], marker='.')
+    revenue_axis.set_title(f"Daily revenue (ETB) {report['start']} - {report['end']}")
+    revenue_axis.tick_params(axis='x', rotation=30)
+
+    names = [name for name, _, _ in report['best_sellers']][::-1]
+    products_axis.barh(names, [revenue for _, revenue, _ in report['best_sellers']][::-1])
+    products_axis.set_title("Best sellers by revenue (ETB)")
+
+    figure.tight_layout()
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png', dpi=100)
+    plt.close(figure)
+    return buffer.getvalue()
+
+
+sales = SalesAnalytics()
@@ -0,0 +1,301 @@
+"""
+Compact binary catalog snapshot.
+
+Layout (little-endian):
+
+    header       magic, product count, category count, string table offset/size,
+                 time the snapshot was taken
+    categories   one (offset, length) pair per category name
+    products     fixed-width records sorted by product ID
+    strings      UTF-8 string table referenced by offset/length pairs
+
+The file is memory-mapped and products are decoded into dicts only when they are
+accessed, so opening a snapshot costs the same for ten products or a million.
+"""
+
+import bisect
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from collections.abc import MutableSequence
+from data.variants import VariantMatrix
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'YGCAT02\x00'
+HEADER = struct.Struct('<8sIIQQd')
+# Version 1 had no snapshot time; its file modification time stands in
+LEGACY_MAGIC = b'YGCAT01\x00'
+LEGACY_HEADER = struct.Struct('<8sIIQQ')
+STRING_REF = struct.Struct('<II')
+# id, price, stock, category index, then (offset, length) for name, description, image, extra
+RECORD = struct.Struct('<iiiI8I')
+CORE_FIELDS = ('id', 'name', 'price', 'description', 'image', 'category', 'stock')
+
+
+def _encode_extra(value):
+    if isinstance(value, VariantMatrix):
+        return value.to_dict()
+    raise TypeError(f"Cannot store {type(value).__name__} in a catalog snapshot")
+
+
+class _StringTable:
+    """Deduplicating string table builder."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.refs = {}
+
+    def add(self, text: str):
+        ref = self.refs.get(text)
+        if ref is None:
+            encoded = text.encode('utf-8')
+            ref = self.refs[text] = (len(self.data), len(encoded))
+            self.data += encoded
+        return ref
+
+
+def write_catalog_snapshot(path: str, products, categories, saved_at: float = None):
+    """
+    Write products (iterable of dicts) and category names to a snapshot file.
+
+    saved_at (default: now) should be taken before `products` is read, so every
+    stock change made after it is known to be possibly missing from the file.
+    """
+    saved_at = time.time() if saved_at is None else saved_at
+    strings = _StringTable()
+    category_names = list(categories)
+    category_index = {name.lower(): i for i, name in enumerate(category_names)}
+
+    records = []
+    for product in sorted(products, key=lambda p: p['id']):
+        category = product['category']
+        if category.lower() not in category_index:
+            category_index[category.lower()] = len(category_names)
+            category_names.append(category)
+        extra = {key: value for key, value in product.items() if key not in CORE_FIELDS}
+        refs = (
+            strings.add(product['name']),
+            strings.add(product['description']),
+            strings.add(product['image']),
+            strings.add(json.dumps(extra, ensure_ascii=False, separators=(',', ':'), default=_encode_extra)
+                        if extra else '')
+        )
+        records.append(RECORD.pack(
+            product['id'], product['price'], product.get('stock', 0), category_index[category.lower()],
+            *(value for ref in refs for value in ref)
+        ))
+
+    category_refs = [STRING_REF.pack(*strings.add(name)) for name in category_names]
+    strings_offset = HEADER.size + STRING_REF.size * len(category_refs) + RECORD.size * len(records)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(records), len(category_refs), strings_offset, len(strings.data), saved_at))
+        f.write(b''.join(category_refs))
+        f.write(b''.join(records))
+        f.write(strings.data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    logger.info(f"Catalog snapshot with {len(records)} products written to {path}")
+
+
+class CatalogSnapshot:
+    """Read-only, memory-mapped view of a catalog snapshot."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic = self._mm[:len(MAGIC)]
+        if magic not in (MAGIC, LEGACY_MAGIC):
+            raise ValueError(f"{path} is not a catalog snapshot")
+        header = HEADER if magic == MAGIC else LEGACY_HEADER
+        fields = header.unpack_from(self._mm, 0)
+        _, self.product_count, category_count, self._strings, strings_size = fields[:5]
+        # Stock changes made after this time may be missing from the snapshot
+        self.saved_at = fields[5] if magic == MAGIC else os.path.getmtime(path)
+        if self._strings + strings_size > len(self._mm):
+            raise ValueError(f"{path} is truncated")
+
+        self._records = header.size + STRING_REF.size * category_count
+        self._category_column = None
+        self.categories = [
+            self._string(*STRING_REF.unpack_from(self._mm, header.size + i * STRING_REF.size))
+            for i in range(category_count)
+        ]
+
+    def __len__(self):
+        return self.product_count
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings + offset
+        return self._mm[start:start + length].decode('utf-8')
+
+    def product_id(self, index: int) -> int:
+        return struct.unpack_from('<i', self._mm, self._records + index * RECORD.size)[0]
+
+    def category_column(self) -> list:
+        """Category index of every record, read in one strided pass."""
+        if self._category_column is None:
+            words = RECORD.size // 4
+            region = memoryview(self._mm)[self._records:self._records + RECORD.size * self.product_count]
+            self._category_column = region.cast('I')[3::words].tolist()
+            region.release()
+        return self._category_column
+
+    def product(self, index: int) -> dict:
+        """Decode one product record into a dict."""
+        (product_id, price, stock, category, name_off, name_len, desc_off, desc_len,
+         image_off, image_len, extra_off, extra_len) = RECORD.unpack_from(self._mm, self._records + index * RECORD.size)
+        product = {
+            'id': product_id,
+            'name': self._string(name_off, name_len),
+            'price': price,
+            'description': self._string(desc_off, desc_len),
+            'image': self._string(image_off, image_len),
+            'category': self.categories[category],
+            'stock': stock
+        }
+        if extra_len:
+            product.update(json.loads(self._string(extra_off, extra_len)))
+            if 'variants' in product:
+                product['variants'] = VariantMatrix.from_dict(product['variants'])
+        return product
+
+    def find(self, product_id: int):
+        """Record index of a product ID (binary search), or None."""
+        ids = _RecordIds(self)
+        index = bisect.bisect_left(ids, product_id)
+        if index < len(self) and ids[index] == product_id:
+            return index
+        return None
+
+    def close(self):
+        self._mm.close()
+
+
+class _RecordIds:
+    """Sequence view over record IDs, for bisect."""
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return len(self.snapshot)
+
+    def __getitem__(self, index: int) -> int:
+        return self.snapshot.product_id(index)
+
+
+class ProductCatalog(MutableSequence):
+    """
+    List of product dicts that can be backed by a snapshot.
+
+    Entries are either product dicts or ints pointing at snapshot records; a
+    record is decoded the first time it is accessed and the same dict is
+    returned afterwards, so in-place edits (stock updates) stick.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._items = []
+        self._decoded = {}  # record index -> product dict
+        self._removed = set()  # record indexes removed from the catalog
+        self._added = {}  # product ID -> product dict not backed by the snapshot
+
+    def attach(self, snapshot: CatalogSnapshot):
+        """Replace the contents with the products of a snapshot."""
+        self._snapshot = snapshot
+        self._items = list(range(len(snapshot)))
+        self._decoded = {}
+        self._removed = set()
+        self._added = {}
+
+    def _resolve(self, item):
+        if isinstance(item, int):
+            product = self._decoded.get(item)
+            if product is None:
+                product = self._decoded[item] = self._snapshot.product(item)
+            return product
+        return item
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._resolve(item) for item in self._items[index]]
+        return self._resolve(self._items[index])
+
+    def __setitem__(self, index, product):
+        self._forget(self._items[index])
+        self._items[index] = product
+        self._added[product['id']] = product
+
+    def __delitem__(self, index):
+        self._forget(self._items[index])
+        del self._items[index]
+
+    def insert(self, index, product):
+        self._items.insert(index, product)
+        self._added[product['id']] = product
+
+    def __iter__(self):
+        for item in self._items:
+            yield self._resolve(item)
+
+    def _forget(self, item):
+        if isinstance(item, int):
+            self._removed.add(item)
+        elif self._added.get(item['id']) is item:
+            del self._added[item['id']]
+
+    def get(self, product_id: int):
+        """Find a product by ID without decoding the rest of the catalog."""
+        product = self._added.get(product_id)
+        if product is not None or self._snapshot is None:
+            return product
+        record = self._snapshot.find(product_id)
+        if record is not None and record not in self._removed:
+            return self._resolve(record)
+        return None
+
+    def discard(self, product_id: int):
+        """Remove a product by ID and return it, or None; does not decode other records."""
+        product = self.get(product_id)
+        if product is None:
+            return None
+        record = self._snapshot.find(product_id) if self._snapshot is not None else None
+        for index, item in enumerate(self._items):
+            if item is product or (isinstance(item, int) and item == record):
+                del self[index]
+                break
+        return product
+
+    def in_category(self, category: str) -> list:
+        """Products in a category; snapshot records are filtered before decoding."""
+        category = category.lower()
+        result = []
+        wanted = set()
+        if self._snapshot is not None:
+            wanted = {i for i, name in enumerate(self._snapshot.categories) if name.lower() == category}
+        column = self._snapshot.category_column() if wanted else ()
+        for item in self._items:
+            if isinstance(item, int):
+                if wanted and column[item] in wanted:
+                    result.append(self._resolve(item))
+            elif item['category'].lower() == category:
+                result.append(item)
+        return result
+
+    def max_id(self) -> int:
+        ids = list(self._added)
+        if self._snapshot is not None and len(self._snapshot):
+            ids.append(self._snapshot.product_id(len(self._snapshot) - 1))
+        return max(ids, default=0)
@@ -0,0 +1,313 @@
+"""
+Append-only order journal with periodic snapshots.
+
+Every order state transition is appended as one JSON line to the current journal
+segment. Writes are flushed to the OS immediately and fsync'ed in batches
+(JOURNAL_FSYNC_BATCH records or JOURNAL_FSYNC_INTERVAL seconds, whichever comes
+first). Every JOURNAL_SNAPSHOT_EVERY records the full order table is written to a
+compact snapshot and older segments are deleted, so recovery only loads the
+latest snapshot and replays the tail written after it.
+
+Orders that are finished (delivered or declined) or were abandoned before
+payment proof, and were created more than JOURNAL_ARCHIVE_AFTER seconds ago, are
+moved out of the order table into an append-only archive when a snapshot is
+taken. Approved, preparing and shipped orders stay live however old they are. Snapshot size,
+recovery time and memory then depend on recent orders, not on total history;
+the archive is only read to rebuild analytics.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from config import JOURNAL_FSYNC_BATCH, JOURNAL_FSYNC_INTERVAL, JOURNAL_SNAPSHOT_EVERY, JOURNAL_ARCHIVE_AFTER
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = 'orders.snapshot.json'
+ARCHIVE_FILE = 'orders.archive.jsonl'
+SEGMENT_PREFIX = 'orders.'
+SEGMENT_SUFFIX = '.journal'
+# Statuses that are done with once old enough; a checkout still waiting for
+# payment proof after JOURNAL_ARCHIVE_AFTER is treated as abandoned
+ARCHIVED_STATUSES = ('delivered', 'declined', 'pending_proof')
+
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+def apply_record(orders: dict, record: dict):
+    """Apply one journal record to an order table."""
+    if record['event'] == 'created':
+        orders[record['order_id']] = dict(record['data'])
+    else:
+        order = orders.get(record['order_id'])
+        if order is not None:
+            order.update(record['data'])
+
+
+def order_number(order_id: str) -> int:
+    """Numeric part of an order ID such as ORD1000."""
+    digits = order_id[3:] if order_id.startswith('ORD') else order_id
+    return int(digits) if digits.isdigit() else 0
+
+
+class OrderJournal:
+    """Durable, append-only log of order transitions."""
+
+    def __init__(self, directory: str, snapshot_source=None,
+                 fsync_batch: int = JOURNAL_FSYNC_BATCH,
+                 fsync_interval: float = JOURNAL_FSYNC_INTERVAL,
+                 snapshot_every: int = JOURNAL_SNAPSHOT_EVERY,
+                 archive_after: float = JOURNAL_ARCHIVE_AFTER):
+        self.directory = directory
+        # Callable returning (orders, order_counter) for snapshots; archived
+        # orders are removed from that live table
+        self.snapshot_source = snapshot_source
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        # None keeps every order in the snapshot
+        self.archive_after = archive_after
+
+        self.seq = 0
+        self.snapshot_seq = 0
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._sync_handle = None
+        self._snapshot_task = None
+        self.last_recovery = {}
+
+        os.makedirs(directory, exist_ok=True)
+
+    # Recovery
+
+    def _segments(self):
+        names = [
+            name for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        ]
+        return sorted(names, key=lambda name: int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+
+    def recover(self):
+        """
+        Load the latest snapshot and replay the journal tail.
+
+        Returns (orders, order_counter). Opens a fresh segment for new records.
+        """
+        started = time.perf_counter()
+        orders = {}
+        order_counter = 0
+
+        snapshot_path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            orders = snapshot['orders']
+            order_counter = snapshot['order_counter']
+            self.snapshot_seq = self.seq = snapshot['seq']
+        snapshot_loaded = time.perf_counter()
+
+        replayed = 0
+        corrupt = 0
+        segments = self._segments()
+        for index, name in enumerate(segments):
+            path = os.path.join(self.directory, name)
+            offset = 0
+            bad_offset = None
+            with open(path, 'rb') as f:
+                for line in f:
+                    if bad_offset is not None:
+                        # Valid data follows, so this was a damaged record, not a torn write
+                        logger.error(f"Skipping corrupt record at byte {bad_offset} of {name}")
+                        corrupt += 1
+                        bad_offset = None
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError("missing newline")
+                        record = json.loads(line)
+                    except ValueError:
+                        bad_offset = offset
+                        offset += len(line)
+                        continue
+                    offset += len(line)
+                    if record['seq'] <= self.seq:
+                        continue
+                    apply_record(orders, record)
+                    if record['event'] == 'created':
+                        order_counter = max(order_counter, order_number(record['order_id']) + 1)
+                    self.seq = record['seq']
+                    replayed += 1
+
+            if bad_offset is not None:
+                if index == len(segments) - 1:
+                    # A torn final write from a crash; everything before it is intact
+                    logger.warning(f"Truncating incomplete record at the end of {name}")
+                    os.truncate(path, bad_offset)
+                else:
+                    logger.error(f"Skipping corrupt record at the end of {name}")
+                    corrupt += 1
+
+        self._open_segment()
+        finished = time.perf_counter()
+
+        self.last_recovery = {
+            'orders': len(orders),
+            'snapshot_seq': self.snapshot_seq,
+            'replayed': replayed,
+            'corrupt': corrupt,
+            'snapshot_ms': (snapshot_loaded - started) * 1000,
+            'replay_ms': (finished - snapshot_loaded) * 1000,
+            'total_ms': (finished - started) * 1000
+        }
+        logger.info(
+            f"Recovered {len(orders)} orders from snapshot (seq {self.snapshot_seq}) "
+            f"and {replayed} journal records in {self.last_recovery['total_ms']:.1f} ms"
+        )
+        return orders, order_counter
+
+    # Writing
+
+    def _open_segment(self):
+        if self._file:
+            self.sync()
+            self._file.close()
+        path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{self.seq + 1}{SEGMENT_SUFFIX}")
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def append(self, event: str, order_id: str, data: dict):
+        """Append one order transition."""
+        self.seq += 1
+        record = {'seq': self.seq, 'ts': time.time(), 'event': event, 'order_id': order_id, 'data': data}
+        self._file.write(_dumps(record) + '\n')
+        self._file.flush()
+        self._unsynced += 1
+
+        if self._unsynced >= self.fsync_batch or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+        else:
+            self._schedule_sync()
+
+        if self.seq - self.snapshot_seq >= self.snapshot_every and self.snapshot_source:
+            self.snapshot()
+
+    def _schedule_sync(self):
+        if self._sync_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._sync_handle = loop.call_later(self.fsync_interval, self.sync)
+
+    def sync(self):
+        """fsync everything written so far."""
+        if self._sync_handle is not None:
+            self._sync_handle.cancel()
+            self._sync_handle = None
+        if self._file and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    # Snapshots
+
+    def _take_finished(self, orders: dict) -> dict:
+        """Remove orders due for the archive from the live table and return them."""
+        if self.archive_after is None:
+            return {}
+        cutoff = time.time() - self.archive_after
+        finished = {
+            order_id: order for order_id, order in orders.items()
+            if order.get('status') in ARCHIVED_STATUSES and order.get('created_at', 0) < cutoff
+        }
+        for order_id in finished:
+            del orders[order_id]
+        return finished
+
+    def snapshot(self):
+        """Write a snapshot of the current order table and drop replayed segments."""
+        if self._snapshot_task is not None and not self._snapshot_task.done():
+            return
+
+        orders, order_counter = self.snapshot_source()
+        archived = self._take_finished(orders)
+        seq = self.seq
+        # Orders are only ever updated with new scalar values, so a shallow copy
+        # per order is a consistent view for the writer
+        orders = {order_id: dict(order) for order_id, order in orders.items()}
+        self._open_segment()
+        self.snapshot_seq = seq
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_snapshot(orders, order_counter, seq, archived)
+            return
+        self._snapshot_task = loop.run_in_executor(
+            None, self._write_snapshot, orders, order_counter, seq, archived
+        )
+
+    def _write_archive(self, archived: dict):
+        with open(os.path.join(self.directory, ARCHIVE_FILE), 'a', encoding='utf-8') as f:
+            for order_id, order in archived.items():
+                f.write(_dumps({'order_id': order_id, 'order': order}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _write_snapshot(self, orders: dict, order_counter: int, seq: int, archived: dict = None):
+        started = time.perf_counter()
+        # Archived orders must be durable before a snapshot without them replaces
+        # the old one; a crash in between only archives them twice
+        if archived:
+            self._write_archive(archived)
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        tmp_path = f"{path}.{seq}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(_dumps({'seq': seq, 'order_counter': order_counter, 'orders': orders}))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        # Segments that end at or before the snapshot are no longer needed
+        for name in self._segments():
+            first_seq = int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            if first_seq <= seq:
+                os.remove(os.path.join(self.directory, name))
+
+        logger.info(f"Order snapshot at seq {seq} ({len(orders)} orders, {len(archived or ())} archived) "
+                    f"written in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def read_archive(self):
+        """Yield (order_id, order) for every archived order, oldest first."""
+        path = os.path.join(self.directory, ARCHIVE_FILE)
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.error(f"Skipping corrupt record in {ARCHIVE_FILE}")
+                    continue
+                yield record['order_id'], record['order']
+
+    async def aclose(self):
+        """Wait for a running snapshot, then close."""
+        if self._snapshot_task is not None:
+            await self._snapshot_task
+        self.close()
+
+    def close(self):
+        """Flush, fsync and write a final snapshot so the next start replays nothing."""
+        if self.snapshot_source and self.seq > self.snapshot_seq:
+            orders, order_counter = self.snapshot_source()
+            archived = self._take_finished(orders)
+            self.sync()
+            self._write_snapshot(orders, order_counter, self.seq, archived)
+            self.snapshot_seq = self.seq
+        if self._file:
+            self.sync()
+            self._file.close()
+            self._file = None
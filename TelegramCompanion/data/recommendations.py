@@ -0,0 +1,109 @@
+"""
+"Frequently bought together" recommendations.
+
+Every approved order increments a sparse product co-occurrence matrix (a dict
+of dicts, only pairs that were actually bought together are stored). Alongside
+it, each product keeps a cache of its top-k partners that is patched on every
+increment: counts only ever grow, so a partner can only enter the cache by
+overtaking its current minimum. Serving suggestions reads the cache and costs
+O(k), independent of the number of orders or products.
+"""
+
+import logging
+import time
+from config import RECOMMENDATIONS_TOP_K, RECOMMENDATIONS_MAX_ITEMS
+from data.analytics import SOLD_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+class CoPurchaseIndex:
+    """Sparse co-occurrence counts with an incrementally maintained top-k cache."""
+
+    def __init__(self, top_k: int = RECOMMENDATIONS_TOP_K, max_items: int = RECOMMENDATIONS_MAX_ITEMS):
+        self.top_k = top_k
+        self.max_items = max_items
+        self.counts = {}  # product_id -> {other_id: times bought together}
+        self.top = {}  # product_id -> [[count, other_id], ...], highest count first, at most top_k
+        self.recorded_orders = set()
+
+    def __len__(self):
+        return len(self.counts)
+
+    def pairs(self) -> int:
+        """Number of stored (product, partner) entries."""
+        return sum(len(partners) for partners in self.counts.values())
+
+    def _bump(self, product_id: int, other_id: int):
+        partners = self.counts.setdefault(product_id, {})
+        count = partners[other_id] = partners.get(other_id, 0) + 1
+
+        top = self.top.setdefault(product_id, [])
+        for entry in top:
+            if entry[1] == other_id:
+                entry[0] = count
+                break
+        else:
+            if len(top) < self.top_k:
+                top.append([count, other_id])
+            elif count > top[-1][0]:
+                top[-1] = [count, other_id]
+            else:
+                return
+        # Restore order after the single changed entry moved up (at most k steps)
+        index = next(i for i, entry in enumerate(top) if entry[1] == other_id)
+        while index > 0 and top[index - 1][0] < top[index][0]:
+            top[index - 1], top[index] = top[index], top[index - 1]
+            index -= 1
+
+    def record_order(self, order_id: str, order: dict):
+        """Count every pair of distinct products in an approved order (idempotent per order)."""
+        if order_id in self.recorded_orders:
+            return
+        self.recorded_orders.add(order_id)
+
+        product_ids = list(dict.fromkeys(item['id'] for item in order['items']))[:self.max_items]
+        for product_id in product_ids:
+            for other_id in product_ids:
+                if other_id != product_id:
+                    self._bump(product_id, other_id)
+
+    def rebuild(self, orders: dict):
+        """Record every sold order, e.g. after recovering orders at startup."""
+        started = time.perf_counter()
+        for order_id, order in orders.items():
+            if order.get('status') in SOLD_STATUSES:
+                self.record_order(order_id, order)
+        logger.info(f"Co-purchase index rebuilt from {len(self.recorded_orders)} orders "
+                    f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def adopt(self, other: 'CoPurchaseIndex'):
+        """Take over the counts and cache of an index rebuilt off the event loop."""
+        self.counts = other.counts
+        self.top = other.top
+        self.recorded_orders = other.recorded_orders
+
+    def suggest(self, product_id: int, limit: int = None, exclude=()) -> list:
+        """Product IDs most often bought with a product, best first."""
+        limit = self.top_k if limit is None else limit
+        result = []
+        for _, other_id in self.top.get(product_id, ()):
+            if other_id not in exclude:
+                result.append(other_id)
+                if len(result) == limit:
+                    break
+        return result
+
+    def suggest_for_cart(self, product_ids, limit: int = None) -> list:
+        """Merge the cached partners of every product in a cart, skipping what is already in it."""
+        limit = self.top_k if limit is None else limit
+        in_cart = set(product_ids)
+        scores = {}
+        for product_id in in_cart:
+            for count, other_id in self.top.get(product_id, ()):
+                if other_id not in in_cart:
+                    scores[other_id] = scores.get(other_id, 0) + count
+        return sorted(scores, key=scores.get, reverse=True)[:limit]
+
+
+recommendations = CoPurchaseIndex()
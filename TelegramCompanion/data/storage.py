@@ -4,16 +4,23 @@ In a production environment, this should be replaced with a proper database.
 """
 
 import logging
+import os
+import time
+from config import ORDER_JOURNAL_DIR, CATALOG_SNAPSHOT_PATH, LOAD_SAMPLE_DATA
+from data.catalog import CatalogSnapshot, ProductCatalog, write_catalog_snapshot
+from data.journal import OrderJournal
+from data.users import user_registry
+from utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
 # Categories storage
 categories = []
 
-# Products storage
-products = []
+# Products storage, backed by the catalog snapshot once load_catalog() has run
+products = ProductCatalog()
 
-# Shopping cart storage (user_id -> list of product_ids)
+# Shopping cart storage (user_id -> list of product_ids, or (product_id, variant) for variant products)
 cart = {}
 
 # Order history storage (for future use)
@@ -25,6 +32,12 @@ pending_payments = {}
 # Order counter for unique order IDs
 order_counter = 1000
 
+# Durable log of order transitions, set up by open_order_journal()
+order_journal = None
+
+# Memory-mapped catalog snapshot, set up by load_catalog()
+catalog_snapshot = None
+
 def initialize_sample_data():
     """Initialize with some sample data for testing purposes."""
     global categories, products
@@ -67,32 +80,183 @@ def initialize_sample_data():
     products.extend(sample_products)
     logger.info("Sample data initialized")
 
+@traced('storage.get_user_cart')
 def get_user_cart(user_id: int) -> list:
     """Get user's cart items."""
     return cart.get(user_id, [])
 
+@traced('storage.add_to_user_cart')
 def add_to_user_cart(user_id: int, product_id: int):
     """Add product to user's cart."""
     if user_id not in cart:
         cart[user_id] = []
     cart[user_id].append(product_id)
 
+@traced('storage.clear_user_cart')
 def clear_user_cart(user_id: int):
     """Clear user's cart."""
     cart[user_id] = []
 
+def cart_item_stock(item) -> int:
+    """Stock of a cart item (product ID or (product_id, variant)), 0 if it no longer exists."""
+    if isinstance(item, tuple):
+        product = products.get(item[0])
+        variants = product.get('variants') if product else None
+        return variants.available(item[1]) if variants and item[1] < len(variants) else 0
+    product = products.get(item)
+    return product.get('stock', 0) if product else 0
+
+def cart_line(item):
+    """Order line for a cart item (name, price, category...), or None if it no longer exists."""
+    if isinstance(item, tuple):
+        product_id, variant = item
+        product = products.get(product_id)
+        variants = product.get('variants') if product else None
+        if not variants or variant >= len(variants):
+            return None
+        return {
+            'id': product_id,
+            'name': f"{product['name']} ({variants.label(variant)})",
+            'product_name': product['name'],
+            'price': variants.prices[variant],
+            'category': product['category'],
+            'variant': variant
+        }
+    product = products.get(item)
+    if not product:
+        return None
+    return {'id': product['id'], 'name': product['name'], 'price': product['price'], 'category': product['category']}
+
+@traced('storage.reduce_stock')
+def reduce_stock(order_item: dict, quantity: int = 1):
+    """Take an approved order line out of stock, at variant granularity where it applies."""
+    product = products.get(order_item['id'])
+    if not product:
+        return
+    variants = product.get('variants')
+    if variants and order_item.get('variant') is not None:
+        variants.take(order_item['variant'], quantity)
+        product['stock'] = variants.total_stock()
+    else:
+        product['stock'] = max(0, product.get('stock', 0) - quantity)
+
+def load_catalog(path: str = CATALOG_SNAPSHOT_PATH):
+    """Attach the catalog snapshot, or fall back to the sample data if there is none."""
+    global catalog_snapshot
+    started = time.perf_counter()
+    if os.path.exists(path):
+        snapshot = CatalogSnapshot(path)
+        products.attach(snapshot)
+        categories[:] = snapshot.categories
+        if catalog_snapshot is not None:
+            catalog_snapshot.close()
+        catalog_snapshot = snapshot
+        logger.info(f"Catalog snapshot with {len(snapshot)} products mapped "
+                    f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+    elif LOAD_SAMPLE_DATA and not products:
+        initialize_sample_data()
+
+@traced('storage.save_catalog')
+def save_catalog(path: str = CATALOG_SNAPSHOT_PATH):
+    """Write the current categories and products to a catalog snapshot."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    write_catalog_snapshot(path, products, categories)
+    return len(products)
+
+def open_order_journal(directory: str = ORDER_JOURNAL_DIR):
+    """Recover orders from the journal and log all further transitions to it."""
+    global order_journal, order_counter
+    journal = OrderJournal(directory, snapshot_source=lambda: (pending_payments, order_counter))
+    recovered_orders, recovered_counter = journal.recover()
+    pending_payments.clear()
+    pending_payments.update(recovered_orders)
+    order_counter = max(order_counter, recovered_counter)
+    order_journal = journal
+    return journal
+
+def reapply_stock_changes() -> int:
+    """
+    Take orders approved after the catalog snapshot was saved out of stock again.
+
+    Approvals are journaled but stock is only written on shutdown or /save_catalog,
+    so after a crash the snapshot still holds the stock from before them. Returns
+    the number of orders re-applied. Archived orders are not checked.
+    """
+    # Without a snapshot the catalog is the sample data, which predates every order
+    saved_at = catalog_snapshot.saved_at if catalog_snapshot is not None else 0
+    reapplied = 0
+    for order in pending_payments.values():
+        if order.get('approved_at', 0) > saved_at:
+            for item in order['items']:
+                reduce_stock(item)
+            reapplied += 1
+    if reapplied:
+        logger.warning(f"Re-applied stock for {reapplied} orders approved after the catalog snapshot")
+    return reapplied
+
+def order_history(live: dict = None) -> dict:
+    """Archived orders plus `live` (default: the order table), e.g. to rebuild analytics."""
+    history = dict(order_journal.read_archive()) if order_journal else {}
+    history.update(pending_payments if live is None else live)
+    return history
+
+@traced('storage.next_order_id')
+def next_order_id() -> str:
+    """Reserve a unique order ID."""
+    global order_counter
+    order_id = f"ORD{order_counter}"
+    order_counter += 1
+    return order_id
+
+@traced('storage.create_order')
+def create_order(order_id: str, order: dict):
+    """Store a new order and journal its creation."""
+    order.setdefault('created_at', time.time())
+    pending_payments[order_id] = order
+    if order_journal:
+        order_journal.append('created', order_id, order)
+
+@traced('storage.update_order')
+def update_order(order_id: str, event: str, **changes):
+    """Apply a state transition to an order and journal it."""
+    order = pending_payments[order_id]
+    order.update(changes)
+    if order_journal:
+        order_journal.append(event, order_id, changes)
+    return order
+
+def get_user_language(user_id: int):
+    """Get user's preferred locale, or None if not chosen."""
+    return user_registry.language(user_id)
+
+def set_user_language(user_id: int, locale: str):
+    """Set user's preferred locale (kept in the user registry)."""
+    user_registry.set_language(user_id, locale)
+
+@traced('storage.get_product_by_id')
 def get_product_by_id(product_id: int):
     """Get product by ID."""
-    return next((p for p in products if p['id'] == product_id), None)
+    return products.get(product_id)
+
+def get_product_category(product_id: int):
+    """Get the category of a product, or None if it no longer exists."""
+    product = products.get(product_id)
+    return product['category'] if product else None
 
+@traced('storage.get_products_by_category')
 def get_products_by_category(category: str):
     """Get all products in a category."""
-    return [p for p in products if p['category'].lower() == category.lower()]
+    return products.in_category(category)
+
+def next_product_id() -> int:
+    """Next free product ID."""
+    return products.max_id() + 1
+
+@traced('storage.remove_product_by_id')
+def remove_product_by_id(product_id: int):
+    """Remove a product and return it, or None if it does not exist."""
+    return products.discard(product_id)
 
 def category_exists(category: str) -> bool:
     """Check if category exists."""
     return any(cat.lower() == category.lower() for cat in categories)
-
-# Initialize sample data when module is imported
-# Comment out the following line if you don't want sample data
-initialize_sample_data()
@@ -0,0 +1,113 @@
+"""
+Persisted registry of users who have talked to the bot.
+
+Users are kept in memory and persisted as an append-only JSON-lines file: one
+line when a user is first seen (or comes back after blocking the bot), one
+when a user is found to have blocked the bot and one when a user picks a
+language. The file is compacted on load
+once it holds more dead lines than live users.
+"""
+
+import json
+import logging
+import os
+import time
+from config import USER_REGISTRY_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class UserRegistry:
+    """Known users (user_id -> record) with blocked users pruned from broadcasts."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.users = {}  # user_id -> {'first_name', 'username', 'seen_at', 'blocked', 'language'}
+        self._file = None
+
+    def __len__(self):
+        return len(self.users)
+
+    def load(self):
+        """Read the registry file (if any) and open it for appending."""
+        lines = 0
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn last line after a crash
+                        continue
+                    lines += 1
+                    user = self.users.setdefault(record['id'], {})
+                    user.update({key: value for key, value in record.items() if key != 'id'})
+
+        if lines > 2 * len(self.users) + 1000:
+            self._compact()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        logger.info(f"User registry loaded with {len(self.users)} users ({self.active_count()} reachable)")
+
+    def _compact(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for user_id, user in self.users.items():
+                f.write(json.dumps({'id': user_id, **user}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _write(self, record: dict):
+        if self._file:
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+
+    def touch(self, user_id: int, first_name: str = None, username: str = None) -> bool:
+        """Register a user on first contact; returns True if the user is new or came back."""
+        user = self.users.get(user_id)
+        if user is not None and not user.get('blocked'):
+            return False
+        record = {'first_name': first_name, 'username': username, 'seen_at': int(time.time()), 'blocked': False}
+        self._write({'id': user_id, **record})
+        # A user coming back keeps the language they chose before
+        if user is not None and 'language' in user:
+            record['language'] = user['language']
+        self.users[user_id] = record
+        return True
+
+    def mark_blocked(self, user_id: int):
+        """Remember that a user blocked the bot, so broadcasts skip them."""
+        user = self.users.get(user_id)
+        if user is None or user.get('blocked'):
+            return
+        user['blocked'] = True
+        self._write({'id': user_id, 'blocked': True})
+
+    def language(self, user_id: int):
+        """Locale a user chose with /language, or None."""
+        user = self.users.get(user_id)
+        return user.get('language') if user else None
+
+    def set_language(self, user_id: int, locale: str):
+        """Remember a user's language across restarts."""
+        user = self.users.setdefault(user_id, {})
+        if user.get('language') == locale:
+            return
+        user['language'] = locale
+        self._write({'id': user_id, 'language': locale})
+
+    def active_ids(self) -> list:
+        """IDs of users that can receive messages, in a stable order."""
+        return sorted(user_id for user_id, user in self.users.items() if not user.get('blocked'))
+
+    def active_count(self) -> int:
+        return sum(1 for user in self.users.values() if not user.get('blocked'))
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+user_registry = UserRegistry(USER_REGISTRY_PATH)
@@ -0,0 +1,112 @@
+"""
+Product variants stored as a compact matrix.
+
+A product with option axes (e.g. Size S/M/L x Colour Red/Blue) keeps one price
+and one stock counter per option combination in flat arrays, indexed row-major
+by the chosen value of each axis. A catalog of T-shirts in 30 combinations is
+then one product with two small int arrays instead of 30 product dicts.
+"""
+
+from array import array
+
+
+class VariantMatrix:
+    """Per-variant price and stock for a product, indexed by option combination."""
+
+    __slots__ = ('axes', 'strides', 'prices', 'stock')
+
+    def __init__(self, axes: list, prices=None, stock=None):
+        """axes: [(axis_name, [value, ...]), ...]; prices/stock: flat, row-major."""
+        if not axes or any(not values for _, values in axes):
+            raise ValueError("Variants need at least one option axis with at least one value")
+        self.axes = [(name, list(values)) for name, values in axes]
+
+        # Stride of each axis in the flat index (last axis varies fastest)
+        self.strides = []
+        size = 1
+        for _, values in reversed(self.axes):
+            self.strides.insert(0, size)
+            size *= len(values)
+
+        self.prices = array('i', prices if prices is not None else [0] * size)
+        self.stock = array('i', stock if stock is not None else [0] * size)
+        if len(self.prices) != size or len(self.stock) != size:
+            raise ValueError(f"Expected {size} prices and stock values, got {len(self.prices)} and {len(self.stock)}")
+
+    def __len__(self):
+        return len(self.prices)
+
+    @classmethod
+    def uniform(cls, axes: list, price: int, stock: int = 0):
+        """All combinations at the same price and stock."""
+        size = 1
+        for _, values in axes:
+            size *= len(values)
+        return cls(axes, [price] * size, [stock] * size)
+
+    # Indexing
+
+    def index(self, choices) -> int:
+        """Flat index of a full combination of value indexes, one per axis."""
+        if len(choices) != len(self.axes):
+            raise ValueError(f"Expected {len(self.axes)} options, got {len(choices)}")
+        flat = 0
+        for choice, stride, (_, values) in zip(choices, self.strides, self.axes):
+            if not 0 <= choice < len(values):
+                raise IndexError(f"Option index {choice} out of range")
+            flat += choice * stride
+        return flat
+
+    def choices(self, index: int) -> tuple:
+        """Value indexes of each axis for a flat index."""
+        return tuple((index // stride) % len(values) for stride, (_, values) in zip(self.strides, self.axes))
+
+    def find(self, labels) -> int:
+        """Flat index from value labels (case-insensitive), e.g. ['M', 'Red']."""
+        choices = []
+        for label, (name, values) in zip(labels, self.axes):
+            lowered = [value.lower() for value in values]
+            if label.lower() not in lowered:
+                raise KeyError(f"'{label}' is not a {name} option")
+            choices.append(lowered.index(label.lower()))
+        return self.index(choices)
+
+    def label(self, index: int) -> str:
+        """Human-readable combination, e.g. 'M / Red'."""
+        return " / ".join(values[choice] for choice, (_, values) in zip(self.choices(index), self.axes))
+
+    def span(self, prefix) -> tuple:
+        """Flat index range [start, end) of all combinations starting with `prefix`."""
+        start = sum(choice * stride for choice, stride in zip(prefix, self.strides))
+        width = self.strides[len(prefix) - 1] if prefix else len(self)
+        return start, start + width
+
+    def prefix_available(self, prefix) -> bool:
+        """Whether any combination starting with `prefix` is in stock."""
+        start, end = self.span(prefix)
+        return any(self.stock[start:end])
+
+    # Stock
+
+    def available(self, index: int) -> int:
+        return self.stock[index]
+
+    def take(self, index: int, quantity: int = 1) -> int:
+        """Reduce a variant's stock (not below zero) and return the new stock."""
+        self.stock[index] = max(0, self.stock[index] - quantity)
+        return self.stock[index]
+
+    def total_stock(self) -> int:
+        return sum(self.stock)
+
+    def price_range(self) -> tuple:
+        return min(self.prices), max(self.prices)
+
+    # Serialization
+
+    def to_dict(self) -> dict:
+        return {'axes': self.axes, 'prices': self.prices.tolist(), 'stock': self.stock.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data['axes'], data['prices'], data['stock'])
@@ -1,8 +1,22 @@
+import asyncio
+import io
 import logging
+import time
 from aiogram import Bot, Dispatcher, types
-from config import BOT_MESSAGES
-from data.storage import categories, products, pending_payments
+from config import BOT_MESSAGES, PROFILE_MAX_SECONDS
+from data.storage import (
+    categories, products, pending_payments, update_order, clear_user_cart, get_product_by_id,
+    get_product_category, next_product_id, remove_product_by_id, save_catalog, reduce_stock
+)
+from data.recommendations import recommendations
+from data.variants import VariantMatrix
 from utils.decorators import admin_required
+from utils.admin_digest import admin_digest
+from utils.broadcast import broadcaster
+from utils.order_routing import order_router
+from utils.profiler import profiler
+from utils.templates import messages
+from data.analytics import sales, parse_range, render_chart_png
 
 logger = logging.getLogger(__name__)
 
@@ -82,7 +96,7 @@ def register_admin_handlers(dp: Dispatcher, bot: Bot):
                 return
             
             # Generate new product ID
-            new_id = max([p['id'] for p in products], default=0) + 1
+            new_id = next_product_id()
             
             # Create product
             new_product = {
@@ -132,6 +146,8 @@ def register_admin_handlers(dp: Dispatcher, bot: Bot):
             product_list = []
             for product in products:
                 stock_info = f" | Stock: {product.get('stock', 0)}"
+                if product.get('variants'):
+                    stock_info += f" | Variants: {len(product['variants'])}"
                 product_list.append(
                     f"ID: {product['id']} | {product['name']} | {product['price']} ETB | {product['category']}{stock_info}"
                 )
@@ -160,11 +176,7 @@ def register_admin_handlers(dp: Dispatcher, bot: Bot):
                 return
             
             # Find and remove product
-            product_to_remove = None
-            for i, product in enumerate(products):
-                if product['id'] == product_id:
-                    product_to_remove = products.pop(i)
-                    break
+            product_to_remove = remove_product_by_id(product_id)
             
             if product_to_remove:
                 await message.reply(f"✅ Product '{product_to_remove['name']}' removed successfully")
@@ -192,6 +204,23 @@ def register_admin_handlers(dp: Dispatcher, bot: Bot):
 • /add_product Name | Price | Description | Image | Category
 • /list_products - List all products
 • /remove_product <id> - Remove product by ID
+• /set_variants <id> | Size=S,M,L | Color=Red,Blue - Give a product option axes
+• /update_variant <id> <M/Red> [price=<n>] [stock=<n>] - Set one variant's price/stock
+• /save_catalog - Write the catalog snapshot now (also done on shutdown)
+
+🔬 **Diagnostics:**
+• /profile [seconds] - Sample where the bot spends time (collapsed stacks for flamegraphs)
+
+📊 **Reports:**
+• /sales_report [range] [csv|png] - Sales summary (range: today, 7d, 30d, 1y, all, YYYY-MM-DD..YYYY-MM-DD)
+• /routing_stats - Order queue depth and review latency per admin
+• /queue_stats - Updates waiting per user and handler concurrency
+• /api_stats - Bot API connection pool usage
+
+📣 **Broadcasts:**
+• /broadcast <text> - Message every customer (or reply to a message with /broadcast to copy it)
+• /broadcast_status - Show broadcast progress
+• /broadcast_cancel - Stop the running broadcast
 
 ℹ️ **Other:**
 • /admin_help - Show this help
@@ -220,14 +249,12 @@ def register_admin_handlers(dp: Dispatcher, bot: Bot):
                 return
             
             # Find and update product
-            product = None
-            for p in products:
-                if p['id'] == product_id:
-                    p['stock'] = max(0, new_stock)
-                    product = p
-                    break
-            
-            if product:
+            product = get_product_by_id(product_id)
+            
+            if product and product.get('variants'):
+                await message.reply("❌ This product has variants, use /update_variant")
+            elif product:
+                product['stock'] = max(0, new_stock)
                 await message.reply(f"✅ Stock updated for '{product['name']}': {product['stock']} units")
                 logger.info(f"Stock updated for product ID {product_id} by admin {message.from_user.id}")
             else:
@@ -266,43 +293,56 @@ def register_admin_handlers(dp: Dispatcher, bot: Bot):
         """Approve an order (Admin only)."""
         try:
             order_id = callback_query.data.split('_')[1]
+            admin_id = callback_query.from_user.id
             
             if order_id not in pending_payments:
                 await bot.answer_callback_query(callback_query.id, text="❌ Order not found")
                 return
             
-            order = pending_payments[order_id]
+            # Only one admin may act on an order, and only once
+            status = pending_payments[order_id]['status']
+            if status != 'pending_approval':
+                await bot.answer_callback_query(callback_query.id, text=f"ℹ️ Order {order_id} is already {status}")
+                return
+            claimed, holder = order_router.claim(order_id, admin_id)
+            if not claimed:
+                await bot.answer_callback_query(callback_query.id, text=f"🔒 Order {order_id} is being handled by admin {holder}")
+                return
             
-            # Update order status
-            order['status'] = 'approved'
+            # Update order status; on failure let another admin (or a retry) take it
+            try:
+                order = update_order(order_id, 'approved', status='approved', approved_at=time.time())
+            except Exception:
+                order_router.release(order_id, admin_id)
+                raise
+            order_router.complete(order_id, admin_id)
             
             # Reduce stock for ordered items
             for item in order['items']:
-                for product in products:
-                    if product['id'] == item['id']:
-                        product['stock'] = max(0, product.get('stock', 0) - 1)
-                        break
+                reduce_stock(item)
             
             # Clear user cart
-            if order['user_id'] in cart:
-                cart[order['user_id']] = []
+            clear_user_cart(order['user_id'])
+            
+            # Update sales rollups and "bought together" counts
+            sales.record_order(order_id, order, get_product_category)
+            recommendations.record_order(order_id, order)
             
             # Notify customer
-            customer_message = f"✅ ORDER APPROVED!\n\n"
-            customer_message += f"📋 Order ID: {order_id}\n"
-            customer_message += f"💰 Total: {order['total']} ETB\n"
-            customer_message += f"📦 Your order is now being prepared for shipment.\n"
-            customer_message += f"🚚 You will receive shipping updates soon.\n\n"
-            customer_message += f"Thank you for shopping with Yene Gebeya!"
+            locale = order.get('locale') or messages.locale_for_id(order['user_id'])
+            customer_message = messages.render(locale, 'order_approved', order_id=order_id, total=order['total'])
             
             await bot.send_message(order['user_id'], customer_message)
             
-            # Update admin message
-            await bot.edit_message_text(
-                f"✅ APPROVED\n\nOrder {order_id} has been approved.\nStock has been reduced.\nCustomer has been notified.",
-                callback_query.from_user.id,
-                callback_query.message.message_id
-            )
+            # Update admin message (digest messages are re-rendered in place)
+            chat_id = callback_query.from_user.id
+            message_id = callback_query.message.message_id
+            if not await admin_digest.show_page(bot, chat_id, message_id):
+                await bot.edit_message_text(
+                    f"✅ APPROVED\n\nOrder {order_id} has been approved.\nStock has been reduced.\nCustomer has been notified.",
+                    chat_id,
+                    message_id
+                )
             
             await bot.answer_callback_query(callback_query.id, text=f"✅ Order {order_id} approved")
             logger.info(f"Order {order_id} approved by admin {callback_query.from_user.id}")
@@ -317,32 +357,45 @@ def register_admin_handlers(dp: Dispatcher, bot: Bot):
         """Decline an order (Admin only)."""
         try:
             order_id = callback_query.data.split('_')[1]
+            admin_id = callback_query.from_user.id
             
             if order_id not in pending_payments:
                 await bot.answer_callback_query(callback_query.id, text="❌ Order not found")
                 return
             
-            order = pending_payments[order_id]
+            # Only one admin may act on an order, and only once
+            status = pending_payments[order_id]['status']
+            if status != 'pending_approval':
+                await bot.answer_callback_query(callback_query.id, text=f"ℹ️ Order {order_id} is already {status}")
+                return
+            claimed, holder = order_router.claim(order_id, admin_id)
+            if not claimed:
+                await bot.answer_callback_query(callback_query.id, text=f"🔒 Order {order_id} is being handled by admin {holder}")
+                return
             
-            # Update order status
-            order['status'] = 'declined'
+            # Update order status; on failure let another admin (or a retry) take it
+            try:
+                order = update_order(order_id, 'declined', status='declined', declined_at=time.time())
+            except Exception:
+                order_router.release(order_id, admin_id)
+                raise
+            order_router.complete(order_id, admin_id)
             
             # Notify customer
-            customer_message = f"❌ ORDER DECLINED\n\n"
-            customer_message += f"📋 Order ID: {order_id}\n"
-            customer_message += f"💰 Total: {order['total']} ETB\n"
-            customer_message += f"🔄 Your payment was not verified.\n"
-            customer_message += f"📞 Please contact us at @Ztech7 for assistance.\n\n"
-            customer_message += f"You can try placing a new order with correct payment proof."
+            locale = order.get('locale') or messages.locale_for_id(order['user_id'])
+            customer_message = messages.render(locale, 'order_declined', order_id=order_id, total=order['total'])
             
             await bot.send_message(order['user_id'], customer_message)
             
-            # Update admin message
-            await bot.edit_message_text(
-                f"❌ DECLINED\n\nOrder {order_id} has been declined.\nCustomer has been notified.",
-                callback_query.from_user.id,
-                callback_query.message.message_id
-            )
+            # Update admin message (digest messages are re-rendered in place)
+            chat_id = callback_query.from_user.id
+            message_id = callback_query.message.message_id
+            if not await admin_digest.show_page(bot, chat_id, message_id):
+                await bot.edit_message_text(
+                    f"❌ DECLINED\n\nOrder {order_id} has been declined.\nCustomer has been notified.",
+                    chat_id,
+                    message_id
+                )
             
             await bot.answer_callback_query(callback_query.id, text=f"❌ Order {order_id} declined")
             logger.info(f"Order {order_id} declined by admin {callback_query.from_user.id}")
@@ -351,6 +404,369 @@ def register_admin_handlers(dp: Dispatcher, bot: Bot):
             logger.error(f"Error in decline_order: {e}")
             await bot.answer_callback_query(callback_query.id, text="❌ Error declining order")
 
+    @dp.callback_query_handler(lambda c: c.data.startswith('digest_'))
+    @admin_required
+    async def turn_digest_page(callback_query: types.CallbackQuery):
+        """Switch the page of an order digest (Admin only)."""
+        try:
+            page = int(callback_query.data.split('_')[1])
+            shown = await admin_digest.show_page(
+                bot, callback_query.from_user.id, callback_query.message.message_id, page
+            )
+            if not shown:
+                await bot.answer_callback_query(callback_query.id, text="❌ Digest expired, use /pending_orders")
+                return
+            await bot.answer_callback_query(callback_query.id)
+            
+        except Exception as e:
+            logger.error(f"Error in turn_digest_page: {e}")
+            await bot.answer_callback_query(callback_query.id, text="❌ Error loading digest page")
+
+    @dp.callback_query_handler(lambda c: c.data.startswith('proofs_'))
+    @admin_required
+    async def show_digest_proofs(callback_query: types.CallbackQuery):
+        """Send payment proofs for one digest page (Admin only)."""
+        try:
+            page = int(callback_query.data.split('_')[1])
+            sent = await admin_digest.send_proofs(
+                bot, callback_query.from_user.id, callback_query.message.message_id, page
+            )
+            text = None if sent else "📭 No payment proofs on this page"
+            await bot.answer_callback_query(callback_query.id, text=text)
+            
+        except Exception as e:
+            logger.error(f"Error in show_digest_proofs: {e}")
+            await bot.answer_callback_query(callback_query.id, text="❌ Error loading payment proofs")
+
+    @dp.message_handler(commands=['sales_report'])
+    @admin_required
+    async def sales_report(message: types.Message):
+        """Show revenue, best sellers and payment mix for a date range (Admin only)."""
+        try:
+            args = message.get_args().split()
+            export = None
+            if args and args[-1].lower() in ('csv', 'png'):
+                export = args.pop().lower()
+            
+            try:
+                start_day, end_day = parse_range(args[0] if args else None)
+            except ValueError:
+                await message.reply(
+                    "❌ Usage: /sales_report [range] [csv|png]\n"
+                    "Range: today, yesterday, 7d, 4w, 6m, 1y, all or YYYY-MM-DD..YYYY-MM-DD"
+                )
+                return
+            
+            started = time.perf_counter()
+            report = sales.report(start_day, end_day)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            
+            lines = [
+                f"📊 SALES REPORT\n📅 {report['start']} → {report['end']}\n",
+                f"💰 Revenue: {report['revenue']} ETB",
+                f"📋 Orders: {report['orders']} | 📦 Items: {report['units']}\n",
+                "🏆 Best sellers:"
+            ]
+            lines.extend(
+                f"{rank}. {name} - {revenue} ETB ({units} sold)"
+                for rank, (name, revenue, units) in enumerate(report['best_sellers'], 1)
+            )
+            lines.append("\n🗂️ Categories:")
+            lines.extend(f"• {name} - {revenue} ETB" for name, revenue in report['categories'])
+            lines.append("\n💳 Payment methods:")
+            lines.extend(
+                f"• {name} - {revenue} ETB ({orders} orders, {orders * 100 // max(report['orders'], 1)}%)"
+                for name, revenue, orders in report['payment_methods']
+            )
+            lines.append(f"\n⏱️ Computed in {elapsed_ms:.1f} ms")
+            await message.reply("\n".join(lines))
+            
+            if not export:
+                return
+            
+            # Exports can take a while for long ranges, so render them off the event loop
+            loop = asyncio.get_event_loop()
+            filename = f"sales_{report['start']}_{report['end']}.{export}"
+            try:
+                if export == 'csv':
+                    data = await loop.run_in_executor(None, sales.export_csv, start_day, end_day)
+                else:
+                    data = await loop.run_in_executor(None, render_chart_png, report)
+            except ImportError:
+                await message.reply("❌ PNG charts need matplotlib installed on the server")
+                return
+            
+            await message.reply_document(types.InputFile(io.BytesIO(data), filename=filename))
+            
+        except Exception as e:
+            logger.error(f"Error in sales_report: {e}")
+            await message.reply("❌ Error building sales report")
+
+    @dp.message_handler(commands=['routing_stats'])
+    @admin_required
+    async def routing_stats(message: types.Message):
+        """Show per-admin order queue depth and review latency (Admin only)."""
+        try:
+            lines = [f"🧭 ORDER ROUTING ({order_router.strategy})\n"]
+            for admin_id, depth, reviewed, avg_latency, max_latency, reassigned in order_router.stats_snapshot():
+                lines.append(
+                    f"👤 {admin_id}\n"
+                    f"📥 Queue: {depth} | ✅ Reviewed: {reviewed} | 🔁 Reassigned away: {reassigned}\n"
+                    f"⏱️ Avg review: {avg_latency:.0f}s | Max: {max_latency:.0f}s\n"
+                )
+            unclaimed = len(order_router.expired())
+            lines.append(f"⌛ Overdue unclaimed orders: {unclaimed}")
+            await message.reply("\n".join(lines))
+            
+        except Exception as e:
+            logger.error(f"Error in routing_stats: {e}")
+            await message.reply("❌ Error loading routing stats")
+
+    @dp.message_handler(commands=['queue_stats'])
+    @admin_required
+    async def queue_stats(message: types.Message):
+        """Show update queue depth and wait times (Admin only)."""
+        try:
+            user_queues = getattr(dp, 'user_queues', None)
+            if user_queues is None:
+                await message.reply("📥 Updates are not queued per user")
+                return
+            stats = user_queues.stats()
+            await message.reply(
+                f"📥 UPDATE QUEUES\n\n"
+                f"⚙️ Running: {stats['running']}/{user_queues.concurrency}\n"
+                f"⏳ Pending: {stats['queued']} from {stats['users_waiting']} users\n"
+                f"📈 Peak pending: {stats['peak_queued']} | Peak per user: {stats['peak_user_depth']}\n"
+                f"⏱️ Wait p95: {stats['wait_p95'] * 1000:.0f} ms | Max: {stats['wait_max'] * 1000:.0f} ms\n"
+                f"✅ Processed: {stats['processed']}"
+            )
+            
+        except Exception as e:
+            logger.error(f"Error in queue_stats: {e}")
+            await message.reply("❌ Error loading queue stats")
+
+    @dp.message_handler(commands=['api_stats'])
+    @admin_required
+    async def api_stats(message: types.Message):
+        """Show Bot API connection pool usage (Admin only)."""
+        try:
+            metrics = getattr(bot, 'metrics', None)
+            if metrics is None:
+                await message.reply("🌐 The default Bot API transport is in use (no pool metrics)")
+                return
+            server = "self-hosted Bot API server" if bot.is_local_server else "api.telegram.org"
+            waited = metrics.queue_wait_total / metrics.queued * 1000 if metrics.queued else 0
+            await message.reply(
+                f"🌐 BOT API TRANSPORT ({server})\n\n"
+                f"📨 Requests: {metrics.requests} | ❌ Failed: {metrics.errors}\n"
+                f"🔌 In flight: {metrics.in_flight}/{bot.pool_size} (peak {metrics.peak_in_flight})\n"
+                f"♻️ Connections: {metrics.connections_created} opened, {metrics.connections_reused} reused "
+                f"({metrics.reuse_ratio() * 100:.0f}% reuse)\n"
+                f"⏳ Waited for a free connection: {metrics.queued}x (avg {waited:.0f} ms, "
+                f"max {metrics.queue_wait_max * 1000:.0f} ms)\n"
+                f"🧭 DNS cache: {metrics.dns_hits} hits, {metrics.dns_misses} misses"
+            )
+            
+        except Exception as e:
+            logger.error(f"Error in api_stats: {e}")
+            await message.reply("❌ Error loading API stats")
+
+    @dp.message_handler(commands=['set_variants'])
+    @admin_required
+    async def set_variants(message: types.Message):
+        """Define option axes for a product (Admin only)."""
+        try:
+            # Format: /set_variants <id> | Size=S,M,L | Color=Red,Blue
+            parts = [part.strip() for part in message.text.split(' ', 1)[-1].split('|')]
+            if len(parts) < 2 or not parts[0].isdigit():
+                await message.reply("❌ Usage: /set_variants <product_id> | Size=S,M,L | Color=Red,Blue")
+                return
+            
+            product = get_product_by_id(int(parts[0]))
+            if not product:
+                await message.reply(f"❌ Product with ID {parts[0]} not found")
+                return
+            
+            axes = []
+            for part in parts[1:]:
+                name, _, values = part.partition('=')
+                values = [value.strip() for value in values.split(',') if value.strip()]
+                if not name.strip() or not values:
+                    await message.reply(f"❌ Invalid option axis '{part}', expected Name=value1,value2")
+                    return
+                axes.append((name.strip(), values))
+            
+            # Every combination starts at the product price with no stock
+            variants = VariantMatrix.uniform(axes, product['price'])
+            product['variants'] = variants
+            product['stock'] = 0
+            await message.reply(
+                f"✅ '{product['name']}' now has {len(variants)} variants. "
+                f"Set their stock with /update_variant {product['id']} <{'/'.join(name for name, _ in axes)}> stock=<n>"
+            )
+            logger.info(f"Variants set for product ID {product['id']} by admin {message.from_user.id}")
+            
+        except Exception as e:
+            logger.error(f"Error in set_variants: {e}")
+            await message.reply("❌ Error setting variants")
+
+    @dp.message_handler(commands=['update_variant'])
+    @admin_required
+    async def update_variant(message: types.Message):
+        """Update price and/or stock of one variant (Admin only)."""
+        try:
+            command_parts = message.text.split(' ')
+            if len(command_parts) < 4:
+                await message.reply("❌ Usage: /update_variant <product_id> <M/Red> [price=<n>] [stock=<n>]")
+                return
+            
+            try:
+                product_id = int(command_parts[1])
+                changes = {}
+                for part in command_parts[3:]:
+                    key, _, value = part.partition('=')
+                    if key not in ('price', 'stock'):
+                        raise ValueError(key)
+                    changes[key] = max(0, int(value))
+            except ValueError:
+                await message.reply("❌ Expected price=<number> and/or stock=<number>")
+                return
+            
+            product = get_product_by_id(product_id)
+            variants = product.get('variants') if product else None
+            if not variants:
+                await message.reply(f"❌ Product with ID {product_id} has no variants")
+                return
+            
+            try:
+                variant = variants.find(command_parts[2].split('/'))
+            except (KeyError, ValueError) as e:
+                await message.reply(f"❌ {e.args[0]}")
+                return
+            
+            if 'price' in changes:
+                variants.prices[variant] = changes['price']
+            if 'stock' in changes:
+                variants.stock[variant] = changes['stock']
+                product['stock'] = variants.total_stock()
+            
+            await message.reply(
+                f"✅ {product['name']} ({variants.label(variant)}): "
+                f"{variants.prices[variant]} ETB, {variants.stock[variant]} units"
+            )
+            logger.info(f"Variant {variant} of product ID {product_id} updated by admin {message.from_user.id}")
+            
+        except Exception as e:
+            logger.error(f"Error in update_variant: {e}")
+            await message.reply("❌ Error updating variant")
+
+    @dp.message_handler(commands=['broadcast'])
+    @admin_required
+    async def broadcast(message: types.Message):
+        """Send a message to every registered user (Admin only)."""
+        try:
+            text = message.get_args()
+            if not text and not message.reply_to_message:
+                await message.reply("❌ Usage: /broadcast <text>, or reply to a message with /broadcast")
+                return
+            if broadcaster.running():
+                await message.reply("⏳ A broadcast is already running. See /broadcast_status or /broadcast_cancel")
+                return
+            
+            if message.reply_to_message:
+                await broadcaster.start(bot, message.chat.id, source=(message.chat.id, message.reply_to_message.message_id))
+            else:
+                await broadcaster.start(bot, message.chat.id, text=text)
+            
+        except Exception as e:
+            logger.error(f"Error in broadcast: {e}")
+            await message.reply("❌ Error starting broadcast")
+
+    @dp.message_handler(commands=['broadcast_status'])
+    @admin_required
+    async def broadcast_status(message: types.Message):
+        """Show the progress of the running broadcast (Admin only)."""
+        try:
+            if not broadcaster.running():
+                await message.reply("📣 No broadcast is running")
+                return
+            await message.reply(broadcaster.progress_text())
+            
+        except Exception as e:
+            logger.error(f"Error in broadcast_status: {e}")
+            await message.reply("❌ Error loading broadcast status")
+
+    @dp.message_handler(commands=['broadcast_cancel'])
+    @admin_required
+    async def broadcast_cancel(message: types.Message):
+        """Stop the running broadcast after the current chunk (Admin only)."""
+        try:
+            if broadcaster.cancel():
+                await message.reply("🛑 Broadcast will stop after the current chunk")
+                logger.info(f"Broadcast cancelled by admin {message.from_user.id}")
+            else:
+                await message.reply("📣 No broadcast is running")
+            
+        except Exception as e:
+            logger.error(f"Error in broadcast_cancel: {e}")
+            await message.reply("❌ Error cancelling broadcast")
+
+    @dp.message_handler(commands=['save_catalog'])
+    @admin_required
+    async def save_catalog_command(message: types.Message):
+        """Write the catalog snapshot loaded on the next startup (Admin only)."""
+        try:
+            started = time.perf_counter()
+            count = await asyncio.get_event_loop().run_in_executor(None, save_catalog)
+            await message.reply(f"💾 Catalog snapshot saved: {count} products in "
+                                f"{(time.perf_counter() - started) * 1000:.0f} ms")
+            logger.info(f"Catalog snapshot saved by admin {message.from_user.id}")
+            
+        except Exception as e:
+            logger.error(f"Error in save_catalog: {e}")
+            await message.reply("❌ Error saving catalog snapshot")
+
+    async def send_profile(message: types.Message, task: asyncio.Task):
+        """Reply with a finished profile's summary and collapsed stacks."""
+        try:
+            summary, stacks = await task
+            filename = f"profile-{time.strftime('%Y%m%d-%H%M%S')}.folded"
+            await message.reply(summary)
+            await message.reply_document(types.InputFile(io.BytesIO(stacks.encode('utf-8')), filename=filename))
+            
+        except Exception as e:
+            logger.error(f"Error in profile: {e}")
+            await message.reply("❌ Error running profile")
+
+    @dp.message_handler(commands=['profile'])
+    @admin_required
+    async def profile(message: types.Message):
+        """Profile the running bot and send collapsed stacks (Admin only)."""
+        try:
+            args = message.get_args().split()
+            try:
+                seconds = int(args[0]) if args else 30
+            except ValueError:
+                await message.reply(f"❌ Usage: /profile [seconds] (1-{PROFILE_MAX_SECONDS})")
+                return
+            if not 1 <= seconds <= PROFILE_MAX_SECONDS:
+                await message.reply(f"❌ Profile length must be between 1 and {PROFILE_MAX_SECONDS} seconds")
+                return
+            if profiler.running():
+                await message.reply("⏳ A profile is already running")
+                return
+            
+            # Awaiting the profile here would hold up this admin's updates (and a
+            # handler slot) for its whole length, so results are sent when it ends
+            task = profiler.start(seconds)
+            asyncio.get_event_loop().create_task(send_profile(message, task))
+            await message.reply(f"🔬 Profiling for {seconds} s, results will follow...")
+            logger.info(f"Profile of {seconds}s started by admin {message.from_user.id}")
+            
+        except Exception as e:
+            logger.error(f"Error in profile: {e}")
+            await message.reply("❌ Error running profile")
+
     @dp.message_handler(commands=['update_order_status'])
     @admin_required
     async def update_order_status(message: types.Message):
@@ -373,9 +789,8 @@ def register_admin_handlers(dp: Dispatcher, bot: Bot):
                 await message.reply(f"❌ Order {order_id} not found")
                 return
             
-            order = pending_payments[order_id]
-            old_status = order['status']
-            order['status'] = new_status
+            old_status = pending_payments[order_id]['status']
+            order = update_order(order_id, new_status, status=new_status)
             
             # Notify customer of status update
             status_messages = {
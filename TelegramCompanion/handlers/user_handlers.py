@@ -3,8 +3,15 @@ from aiogram import Bot, Dispatcher, types
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters.state import State, StatesGroup
-from config import BOT_MESSAGES, PAYMENT_METHODS, ADMIN_IDS
-from data.storage import categories, products, cart, pending_payments, order_counter
+from config import PAYMENT_METHODS, RECOMMENDATIONS_BUTTONS
+from data.storage import (
+    categories, cart, pending_payments, set_user_language, next_order_id, create_order, update_order,
+    get_product_by_id, get_products_by_category, cart_item_stock, cart_line
+)
+from data.recommendations import recommendations
+from utils.navigation import HOME, Screen, action_of, back_button, encode, navigator, push, split
+from utils.order_routing import order_router
+from utils.templates import messages
 
 logger = logging.getLogger(__name__)
 
@@ -12,246 +19,429 @@ class OrderState(StatesGroup):
     waiting_for_payment_method = State()
     waiting_for_payment_proof = State()
 
+def add_also_buttons(product_ids, stack=()) -> list:
+    """"Add also" buttons for suggested products; the screen on top of `stack` is refreshed after adding."""
+    buttons = []
+    for product_id in product_ids:
+        product = get_product_by_id(product_id)
+        # Variant products need the option picker, which lives on their own page
+        if product and product.get('stock', 0) > 0 and not product.get('variants'):
+            buttons.append(InlineKeyboardButton(
+                f"➕ Add also: {product['name']}", callback_data=encode(f"add_{product_id}", stack)
+            ))
+            if len(buttons) == RECOMMENDATIONS_BUTTONS:
+                break
+    return buttons
+
+def text_screen(text: str, stack, parse_mode: str = None) -> Screen:
+    """A plain text screen with a back button."""
+    keyboard = InlineKeyboardMarkup()
+    keyboard.add(back_button(stack))
+    return Screen(text, keyboard, parse_mode=parse_mode)
+
+def home_screen(locale: str) -> Screen:
+    """Welcome message with the category and utility buttons."""
+    keyboard = InlineKeyboardMarkup()
+    stack = [HOME]
+
+    # Add category buttons
+    for cat in categories:
+        keyboard.add(InlineKeyboardButton(f"📦 {cat}", callback_data=encode(f"cat_{cat}", stack)))
+
+    # Add utility buttons
+    keyboard.add(
+        InlineKeyboardButton("🛺 My Cart", callback_data=encode('cart', stack)),
+        InlineKeyboardButton("📦 My Order", callback_data=encode('order', stack)),
+    )
+    keyboard.add(
+        InlineKeyboardButton("☎️ Contact", callback_data=encode('contact', stack)),
+        InlineKeyboardButton("📘 Help", callback_data=encode('help', stack))
+    )
+    return Screen(messages.text(locale, 'welcome'), keyboard)
+
+def product_page_screen(locale: str, category: str, page: int, stack) -> Screen:
+    """One product of a category per page, with paging buttons."""
+    filtered_products = get_products_by_category(category)
+    if not filtered_products:
+        return text_screen(messages.render(locale, 'no_products_in_category', category=category), stack)
+
+    pages = len(filtered_products)
+    page = min(max(page, 0), pages - 1)
+    product = filtered_products[page]
+    here = push(f"catp_{page}_{category}", stack)
+
+    keyboard = InlineKeyboardMarkup()
+    variants = product.get('variants')
+    price = product['price']
+    if variants:
+        keyboard.add(InlineKeyboardButton("🎛️ Choose Options", callback_data=encode(f"opt_{product['id']}", here)))
+        low, high = variants.price_range()
+        price = low if low == high else f"{low}-{high}"
+    else:
+        keyboard.add(
+            InlineKeyboardButton("💼 Add to Cart", callback_data=encode(f"add_{product['id']}", here))
+        )
+    for button in add_also_buttons(recommendations.suggest(product['id']), here):
+        keyboard.add(button)
+
+    if pages > 1:
+        keyboard.row(
+            InlineKeyboardButton("◀️", callback_data=encode(f"catp_{(page - 1) % pages}_{category}", stack)),
+            InlineKeyboardButton(f"{page + 1}/{pages}", callback_data=encode(f"catp_{page}_{category}", stack)),
+            InlineKeyboardButton("▶️", callback_data=encode(f"catp_{(page + 1) % pages}_{category}", stack))
+        )
+    keyboard.row(
+        back_button(stack),
+        InlineKeyboardButton("🛺 My Cart", callback_data=encode('cart', here))
+    )
+
+    stock = product.get('stock', 0)
+    if stock > 0:
+        stock_info = messages.render(locale, 'stock_available', stock=stock)
+    else:
+        stock_info = messages.text(locale, 'out_of_stock')
+    if variants:
+        stock_info += messages.render(
+            locale, 'variant_options', axes=", ".join(name for name, _ in variants.axes)
+        )
+    caption = messages.render(
+        locale, 'product_caption',
+        name=product['name'],
+        price=price,
+        stock_info=stock_info,
+        description=product['description']
+    )
+    return Screen(caption, keyboard, photo=product['image'], parse_mode='Markdown')
+
+def cart_screen(user_id: int, locale: str, stack) -> Screen:
+    """Cart contents with checkout, clear and "add also" buttons."""
+    cart_items = cart.get(user_id, [])
+    if not cart_items:
+        return text_screen(messages.text(locale, 'cart_empty'), stack)
+
+    lines = [line for line in map(cart_line, cart_items) if line]
+    total = sum(line['price'] for line in lines)
+
+    text = "".join([
+        messages.text(locale, 'cart_header'),
+        messages.render_lines(locale, 'cart_line', lines),
+        messages.render(locale, 'total_label', total=total)
+    ])
+
+    here = push('cart', stack)
+    keyboard = InlineKeyboardMarkup()
+    cart_product_ids = [line['id'] for line in lines]
+    for button in add_also_buttons(recommendations.suggest_for_cart(cart_product_ids), here):
+        keyboard.add(button)
+    keyboard.add(InlineKeyboardButton("🛒 Buy Now", callback_data=encode('checkout', here)))
+    keyboard.add(InlineKeyboardButton("🗑️ Clear Cart", callback_data=encode('clear_cart', here)))
+    keyboard.add(back_button(stack))
+    return Screen(text, keyboard)
+
+def checkout_screen(locale: str, stack) -> Screen:
+    """Payment method choice."""
+    keyboard = InlineKeyboardMarkup()
+    keyboard.add(
+        InlineKeyboardButton("📱 Telebirr", callback_data="pay_telebirr"),
+        InlineKeyboardButton("💰 M-Pesa", callback_data="pay_mpesa")
+    )
+    keyboard.add(
+        InlineKeyboardButton("🏦 CBE", callback_data="pay_cbe"),
+        InlineKeyboardButton("🏛️ Dashen", callback_data="pay_dashen")
+    )
+    keyboard.add(
+        InlineKeyboardButton("🤝 Coop Bank", callback_data="pay_coop")
+    )
+    keyboard.add(back_button(stack))
+    return Screen(messages.text(locale, 'payment_prompt'), keyboard)
+
+def orders_screen(user_id: int, locale: str, stack) -> Screen:
+    """The user's orders and their status."""
+    user_orders = [
+        (order_id, order) for order_id, order in pending_payments.items()
+        if order['user_id'] == user_id
+    ]
+    if not user_orders:
+        return text_screen(messages.text(locale, 'no_orders'), stack)
+    orders_text = messages.text(locale, 'orders_header') + messages.render_orders(locale, user_orders)
+    return text_screen(orders_text, stack, parse_mode='Markdown')
+
+def render_screen(action: str, user: types.User, stack):
+    """Build the screen for a navigation action, or None if the action is not a screen."""
+    locale = messages.locale_for(user)
+    if action == HOME:
+        return home_screen(locale)
+    if action.startswith('catp_'):
+        _, page, category = action.split('_', 2)
+        return product_page_screen(locale, category, int(page), stack)
+    if action.startswith('cat_'):
+        return product_page_screen(locale, action[4:], 0, stack)
+    if action == 'cart':
+        return cart_screen(user.id, locale, stack)
+    if action == 'order':
+        return orders_screen(user.id, locale, stack)
+    if action == 'contact':
+        return text_screen(messages.text(locale, 'contact_info'), stack)
+    if action == 'help':
+        return text_screen(messages.text(locale, 'help_text'), stack)
+    return None
+
 def register_user_handlers(dp: Dispatcher, bot: Bot):
     """Register all user-related handlers."""
-    
-    @dp.message_handler(commands=['start'])
-    async def send_welcome(message: types.Message):
+    # Navigation callbacks work in any state, so Back from checkout still leads somewhere;
+    # leaving the payment method choice ends it, so commands work again.
+    # Checkout itself does not: restarting it would drop an order waiting for its proof.
+
+    async def navigate(callback_query: types.CallbackQuery):
+        """Render the screen named by a callback into the message it came from."""
+        action, stack = split(callback_query.data)
+        state = dp.current_state(chat=callback_query.message.chat.id, user=callback_query.from_user.id)
+        if await state.get_state() == OrderState.waiting_for_payment_method.state:
+            await state.finish()
+        screen = render_screen(action, callback_query.from_user, stack)
+        await navigator.show(bot, callback_query.message, screen)
+        await bot.answer_callback_query(callback_query.id)
+
+    @dp.message_handler(commands=['start'], state=[None, OrderState.waiting_for_payment_method])
+    async def send_welcome(message: types.Message, state: FSMContext):
         """Handle /start command."""
         try:
-            keyboard = InlineKeyboardMarkup()
-            
-            # Add category buttons
-            for cat in categories:
-                keyboard.add(InlineKeyboardButton(f"📦 {cat}", callback_data=f"cat_{cat}"))
-            
-            # Add utility buttons
-            keyboard.add(
-                InlineKeyboardButton("🛺 My Cart", callback_data="cart"),
-                InlineKeyboardButton("📦 My Order", callback_data="order"),
-            )
-            keyboard.add(
-                InlineKeyboardButton("☎️ Contact", callback_data="contact"),
-                InlineKeyboardButton("📘 Help", callback_data="help")
-            )
-            
-            await message.answer(BOT_MESSAGES['welcome'], reply_markup=keyboard)
-            
+            await state.finish()
+            locale = messages.locale_for(message.from_user)
+            await navigator.send(bot, message.chat.id, home_screen(locale))
+        
         except Exception as e:
             logger.error(f"Error in send_welcome: {e}")
             await message.answer("❌ Something went wrong. Please try again.")
 
-    @dp.callback_query_handler(lambda c: c.data.startswith('cat_'))
+    @dp.callback_query_handler(lambda c: action_of(c.data) == HOME, state='*')
+    async def show_home(callback_query: types.CallbackQuery):
+        """Go back to the welcome screen."""
+        try:
+            await navigate(callback_query)
+        except Exception as e:
+            logger.error(f"Error in show_home: {e}")
+            await bot.answer_callback_query(callback_query.id, text="❌ Something went wrong. Please try again.")
+
+    @dp.callback_query_handler(lambda c: action_of(c.data).startswith(('cat_', 'catp_')), state='*')
     async def show_products(callback_query: types.CallbackQuery):
-        """Show products for selected category."""
+        """Show products for selected category, one page per product in a single message."""
         try:
-            category = callback_query.data[4:]
-            filtered_products = [p for p in products if p['category'].lower() == category.lower()]
-            
-            if not filtered_products:
-                await bot.send_message(
-                    callback_query.from_user.id,
-                    f"📦 No products found in category '{category}'"
-                )
-                await bot.answer_callback_query(callback_query.id)
+            await navigate(callback_query)
+        except Exception as e:
+            logger.error(f"Error in show_products: {e}")
+            await bot.answer_callback_query(callback_query.id, text="❌ Error loading products")
+
+    @dp.callback_query_handler(lambda c: action_of(c.data).startswith('opt_'), state='*')
+    async def choose_variant(callback_query: types.CallbackQuery):
+        """Variant picker: pick one option per axis by editing the product's keyboard in place."""
+        try:
+            action, stack = split(callback_query.data)
+            parts = action.split('_')
+            product_id = int(parts[1])
+            prefix = [int(choice) for choice in parts[2].split('.')] if len(parts) > 2 and parts[2] else []
+            locale = messages.locale_for(callback_query.from_user)
+            
+            product = get_product_by_id(product_id)
+            variants = product.get('variants') if product else None
+            if not variants:
+                await bot.answer_callback_query(callback_query.id, text="❌ Product not found")
+                return
+            if prefix and not variants.prefix_available(prefix):
+                await bot.answer_callback_query(callback_query.id, text="❌ Product out of stock")
                 return
             
-            for product in filtered_products:
-                keyboard = InlineKeyboardMarkup()
-                keyboard.add(
-                    InlineKeyboardButton("💼 Add to Cart", callback_data=f"add_{product['id']}")
+            keyboard = InlineKeyboardMarkup(row_width=3)
+            if len(prefix) < len(variants.axes):
+                axis_name, values = variants.axes[len(prefix)]
+                buttons = []
+                for choice, value in enumerate(values):
+                    path = ".".join(map(str, prefix + [choice]))
+                    mark = "" if variants.prefix_available(prefix + [choice]) else " ❌"
+                    buttons.append(InlineKeyboardButton(
+                        f"{value}{mark}", callback_data=encode(f"opt_{product_id}_{path}", stack)
+                    ))
+                keyboard.add(*buttons)
+                prompt = messages.render(locale, 'choose_option', axis=axis_name)
+            else:
+                variant = variants.index(prefix)
+                keyboard.add(InlineKeyboardButton(
+                    f"💼 Add {variants.label(variant)} - {variants.prices[variant]} ETB",
+                    callback_data=encode(f"add_{product_id}_{variant}", stack)
+                ))
+                prompt = messages.render(locale, 'stock_available', stock=variants.available(variant)).strip()
+            if prefix:
+                back = ".".join(map(str, prefix[:-1]))
+                keyboard.add(InlineKeyboardButton("◀️ Back", callback_data=encode(f"opt_{product_id}_{back}", stack)))
+            elif stack:
+                keyboard.add(back_button(stack))
+            
+            # Keep the product page's photo and caption, only swap its buttons
+            page = render_screen(stack[0], callback_query.from_user, stack[1:]) if stack else None
+            if page:
+                await navigator.show(bot, callback_query.message, Screen(page.text, keyboard, page.photo, page.parse_mode))
+            else:
+                await bot.edit_message_reply_markup(
+                    callback_query.from_user.id, callback_query.message.message_id, reply_markup=keyboard
                 )
-                
-                stock_info = f"\n📦 Stock: {product.get('stock', 0)} available" if product.get('stock', 0) > 0 else "\n❌ Out of Stock"
-                caption = f"**{product['name']}**\n💵 {product['price']} ETB{stock_info}\n\n{product['description']}"
-                
-                try:
-                    await bot.send_photo(
-                        callback_query.from_user.id,
-                        product['image'],
-                        caption=caption,
-                        reply_markup=keyboard,
-                        parse_mode='Markdown'
-                    )
-                except Exception as img_error:
-                    # If image fails, send text message
-                    logger.warning(f"Failed to send image for product {product['id']}: {img_error}")
-                    await bot.send_message(
-                        callback_query.from_user.id,
-                        caption,
-                        reply_markup=keyboard,
-                        parse_mode='Markdown'
-                    )
-            
-            await bot.answer_callback_query(callback_query.id)
-            
+            await bot.answer_callback_query(callback_query.id, text=prompt)
+        
         except Exception as e:
-            logger.error(f"Error in show_products: {e}")
-            await bot.answer_callback_query(callback_query.id, text="❌ Error loading products")
+            logger.error(f"Error in choose_variant: {e}")
+            await bot.answer_callback_query(callback_query.id, text="❌ Error loading options")
 
-    @dp.callback_query_handler(lambda c: c.data.startswith('add_'))
+    @dp.callback_query_handler(lambda c: action_of(c.data).startswith('add_'), state='*')
     async def add_to_cart(callback_query: types.CallbackQuery):
-        """Add product to cart."""
+        """Add product (or one of its variants: add_<product_id>_<variant>) to cart."""
         try:
             user_id = callback_query.from_user.id
-            product_id = int(callback_query.data.split('_')[1])
+            action, stack = split(callback_query.data)
+            parts = action.split('_')
+            product_id = int(parts[1])
             
             # Verify product exists and has stock
-            product = next((p for p in products if p['id'] == product_id), None)
+            product = get_product_by_id(product_id)
             if not product:
                 await bot.answer_callback_query(callback_query.id, text="❌ Product not found")
                 return
             
-            if product.get('stock', 0) <= 0:
+            if product.get('variants'):
+                if len(parts) < 3:
+                    await bot.answer_callback_query(callback_query.id, text="🎛️ Please choose options first")
+                    return
+                item = (product_id, int(parts[2]))
+            else:
+                item = product_id
+            
+            # Items already in the cart hold on to their share of the stock
+            if cart_item_stock(item) - cart.get(user_id, []).count(item) <= 0:
                 await bot.answer_callback_query(callback_query.id, text="❌ Product out of stock")
                 return
             
             # Add to cart
             if user_id not in cart:
                 cart[user_id] = []
-            cart[user_id].append(product_id)
+            cart[user_id].append(item)
             
-            await bot.answer_callback_query(callback_query.id, text=BOT_MESSAGES['added_to_cart'])
+            # Refresh the screen the button was on (e.g. the cart total); unchanged screens cost nothing
+            screen = render_screen(stack[0], callback_query.from_user, stack[1:]) if stack else None
+            if screen:
+                await navigator.show(bot, callback_query.message, screen)
             
+            locale = messages.locale_for(callback_query.from_user)
+            await bot.answer_callback_query(callback_query.id, text=messages.text(locale, 'added_to_cart'))
+        
         except Exception as e:
             logger.error(f"Error in add_to_cart: {e}")
             await bot.answer_callback_query(callback_query.id, text="❌ Error adding to cart")
 
-    @dp.callback_query_handler(lambda c: c.data == 'cart')
+    @dp.callback_query_handler(lambda c: action_of(c.data) == 'cart', state='*')
     async def show_cart(callback_query: types.CallbackQuery):
         """Show user's cart contents."""
         try:
-            user_id = callback_query.from_user.id
-            cart_items = cart.get(user_id, [])
-            
-            if not cart_items:
-                await bot.send_message(user_id, BOT_MESSAGES['cart_empty'])
-                await bot.answer_callback_query(callback_query.id)
-                return
-            
-            total = 0
-            message = BOT_MESSAGES['cart_header']
-            
-            for item_id in cart_items:
-                product = next((p for p in products if p['id'] == item_id), None)
-                if product:
-                    message += f"- {product['name']} ({product['price']} ETB)\n"
-                    total += product['price']
-            
-            message += BOT_MESSAGES['total_label'].format(total=total)
-            
-            keyboard = InlineKeyboardMarkup()
-            keyboard.add(InlineKeyboardButton("🛒 Buy Now", callback_data="checkout"))
-            keyboard.add(InlineKeyboardButton("🗑️ Clear Cart", callback_data="clear_cart"))
-            
-            await bot.send_message(user_id, message, reply_markup=keyboard)
-            await bot.answer_callback_query(callback_query.id)
-            
+            await navigate(callback_query)
         except Exception as e:
             logger.error(f"Error in show_cart: {e}")
             await bot.answer_callback_query(callback_query.id, text="❌ Error loading cart")
 
-    @dp.callback_query_handler(lambda c: c.data == 'clear_cart')
+    @dp.callback_query_handler(lambda c: action_of(c.data) == 'clear_cart', state='*')
     async def clear_cart_handler(callback_query: types.CallbackQuery):
         """Clear user's cart."""
         try:
             user_id = callback_query.from_user.id
             cart[user_id] = []
-            await bot.send_message(user_id, "🗑️ Cart cleared!")
-            await bot.answer_callback_query(callback_query.id)
+            locale = messages.locale_for(callback_query.from_user)
             
+            # Back skips the (now empty) cart screen
+            _, stack = split(callback_query.data)
+            if stack[:1] == ['cart']:
+                stack = stack[1:]
+            await navigator.show(bot, callback_query.message, text_screen(messages.text(locale, 'cart_cleared'), stack))
+            await bot.answer_callback_query(callback_query.id)
+        
         except Exception as e:
             logger.error(f"Error in clear_cart: {e}")
             await bot.answer_callback_query(callback_query.id, text="❌ Error clearing cart")
 
-    @dp.callback_query_handler(lambda c: c.data == 'checkout')
+    @dp.callback_query_handler(lambda c: action_of(c.data) == 'checkout',
+                               state=[None, OrderState.waiting_for_payment_method])
     async def checkout(callback_query: types.CallbackQuery):
         """Start checkout process."""
         try:
             user_id = callback_query.from_user.id
             cart_items = cart.get(user_id, [])
+            _, stack = split(callback_query.data)
+            
+            locale = messages.locale_for(callback_query.from_user)
             
             if not cart_items:
-                await bot.send_message(user_id, BOT_MESSAGES['cart_empty'])
+                await navigator.show(bot, callback_query.message, text_screen(messages.text(locale, 'cart_empty'), stack))
                 await bot.answer_callback_query(callback_query.id)
                 return
             
-            keyboard = InlineKeyboardMarkup()
-            keyboard.add(
-                InlineKeyboardButton("📱 Telebirr", callback_data="pay_telebirr"),
-                InlineKeyboardButton("💰 M-Pesa", callback_data="pay_mpesa")
-            )
-            keyboard.add(
-                InlineKeyboardButton("🏦 CBE", callback_data="pay_cbe"),
-                InlineKeyboardButton("🏛️ Dashen", callback_data="pay_dashen")
-            )
-            keyboard.add(
-                InlineKeyboardButton("🤝 Coop Bank", callback_data="pay_coop")
-            )
-            
-            await bot.send_message(user_id, BOT_MESSAGES['payment_prompt'], reply_markup=keyboard)
+            await navigator.show(bot, callback_query.message, checkout_screen(locale, stack))
             await OrderState.waiting_for_payment_method.set()
             await bot.answer_callback_query(callback_query.id)
-            
+        
         except Exception as e:
             logger.error(f"Error in checkout: {e}")
             await bot.answer_callback_query(callback_query.id, text="❌ Error starting checkout")
 
+    @dp.callback_query_handler(lambda c: action_of(c.data) == 'checkout', state=OrderState.waiting_for_payment_proof)
+    async def checkout_awaiting_proof(callback_query: types.CallbackQuery):
+        """Keep the open order and ask for its payment proof instead of checking out again."""
+        locale = messages.locale_for(callback_query.from_user)
+        await bot.answer_callback_query(callback_query.id, text=messages.text(locale, 'payment_proof_prompt'),
+                                        show_alert=True)
+
     @dp.callback_query_handler(lambda c: c.data.startswith("pay_"), state=OrderState.waiting_for_payment_method)
     async def handle_payment(callback_query: types.CallbackQuery, state: FSMContext):
         """Handle payment method selection."""
         try:
-            global order_counter
             method = callback_query.data.split("_")[1]
             user_id = callback_query.from_user.id
             username = callback_query.from_user.username or "Unknown"
             first_name = callback_query.from_user.first_name or "Unknown"
+            locale = messages.locale_for(callback_query.from_user)
             
             # Calculate total and prepare order
             cart_items = cart.get(user_id, [])
-            total = 0
-            order_details = []
-            
-            for item_id in cart_items:
-                product = next((p for p in products if p['id'] == item_id), None)
-                if product:
-                    order_details.append({
-                        'id': product['id'],
-                        'name': product['name'],
-                        'price': product['price']
-                    })
-                    total += product['price']
+            order_details = [line for line in map(cart_line, cart_items) if line]
+            total = sum(item['price'] for item in order_details)
             
             # Generate order ID
-            order_id = f"ORD{order_counter}"
-            order_counter += 1
+            order_id = next_order_id()
             
             # Store pending payment
-            pending_payments[order_id] = {
+            create_order(order_id, {
                 'user_id': user_id,
                 'username': username,
                 'first_name': first_name,
                 'items': order_details,
                 'total': total,
                 'payment_method': method,
-                'status': 'pending_proof'
-            }
+                'status': 'pending_proof',
+                'locale': locale
+            })
             
             # Store order ID in state for next step
             await state.update_data(order_id=order_id)
             
             payment_info = PAYMENT_METHODS.get(method, "Payment method not available")
             
-            message = f"✅ Order Created: {order_id}\n"
-            message += f"💰 Total: {total} ETB\n\n"
-            message += f"📱 Payment Method: {method.upper()}\n"
-            message += f"{payment_info}\n\n"
-            message += "📸 Please send a screenshot or photo of your payment confirmation to complete your order."
+            message = messages.render(
+                locale, 'order_created',
+                order_id=order_id,
+                total=total,
+                method=method.upper(),
+                payment_info=payment_info
+            )
             
-            await bot.send_message(user_id, message)
+            # The payment method menu turns into the payment instructions
+            await navigator.show(bot, callback_query.message, Screen(message))
             await OrderState.waiting_for_payment_proof.set()
             await bot.answer_callback_query(callback_query.id)
-            
+        
         except Exception as e:
             logger.error(f"Error in handle_payment: {e}")
             await bot.answer_callback_query(callback_query.id, text="❌ Error processing payment")
@@ -263,48 +453,25 @@ def register_user_handlers(dp: Dispatcher, bot: Bot):
         try:
             user_data = await state.get_data()
             order_id = user_data.get('order_id')
+            locale = messages.locale_for(message.from_user)
             
             if not order_id or order_id not in pending_payments:
-                await message.reply("❌ Order not found. Please start checkout again.")
+                await message.reply(messages.text(locale, 'order_not_found_checkout'))
                 await state.finish()
                 return
             
-            order = pending_payments[order_id]
-            
             # Update order status
-            order['status'] = 'pending_approval'
-            order['payment_proof'] = message.photo[-1].file_id
+            order = update_order(
+                order_id, 'payment_proof_received',
+                status='pending_approval',
+                payment_proof=message.photo[-1].file_id
+            )
             
             # Notify user
-            await message.reply(f"✅ Payment proof received for order {order_id}!\n📋 Your order is pending admin approval.\n🔔 You will be notified once approved.")
-            
-            # Notify admin with approval buttons
-            admin_message = f"🔔 NEW ORDER - PENDING APPROVAL\n\n"
-            admin_message += f"📋 Order ID: {order_id}\n"
-            admin_message += f"👤 Customer: {order['first_name']} (@{order['username']})\n"
-            admin_message += f"💰 Total: {order['total']} ETB\n"
-            admin_message += f"💳 Payment: {order['payment_method'].upper()}\n\n"
-            admin_message += "📦 Items:\n"
+            await message.reply(messages.render(locale, 'payment_proof_received', order_id=order_id))
             
-            for item in order['items']:
-                admin_message += f"• {item['name']} - {item['price']} ETB\n"
-            
-            admin_message += f"\n📱 Customer ID: {order['user_id']}"
-            
-            # Create approval buttons
-            approval_keyboard = InlineKeyboardMarkup()
-            approval_keyboard.add(
-                InlineKeyboardButton("✅ Approve", callback_data=f"approve_{order_id}"),
-                InlineKeyboardButton("❌ Decline", callback_data=f"decline_{order_id}")
-            )
-            
-            # Send to all admins
-            for admin_id in ADMIN_IDS:
-                try:
-                    await bot.send_message(admin_id, admin_message, reply_markup=approval_keyboard)
-                    await bot.send_photo(admin_id, message.photo[-1].file_id, caption=f"Payment Proof for Order {order_id}")
-                except Exception as e:
-                    logger.error(f"Failed to notify admin {admin_id}: {e}")
+            # Route the order to an admin for approval
+            await order_router.dispatch(bot, order_id)
             
             await state.finish()
             
@@ -316,93 +483,90 @@ def register_user_handlers(dp: Dispatcher, bot: Bot):
     @dp.message_handler(state=OrderState.waiting_for_payment_proof)
     async def handle_invalid_payment_proof(message: types.Message, state: FSMContext):
         """Handle non-photo messages during payment proof upload."""
-        await message.reply("📸 Please send a photo/screenshot of your payment confirmation.")
+        locale = messages.locale_for(message.from_user)
+        await message.reply(messages.text(locale, 'payment_proof_prompt'))
 
     @dp.message_handler(commands=['myorder'])
     async def track_order(message: types.Message):
         """Handle order tracking."""
         try:
             user_id = message.from_user.id
-            user_orders = []
+            locale = messages.locale_for(message.from_user)
             
             # Find user's orders
-            for order_id, order in pending_payments.items():
-                if order['user_id'] == user_id:
-                    user_orders.append((order_id, order))
+            user_orders = [
+                (order_id, order) for order_id, order in pending_payments.items()
+                if order['user_id'] == user_id
+            ]
             
             if not user_orders:
-                await message.reply("📦 You have no orders yet.")
+                await message.reply(messages.text(locale, 'no_orders'))
                 return
             
-            orders_text = "📋 **Your Orders:**\n\n"
-            for order_id, order in user_orders:
-                status_emoji = {
-                    'pending_approval': '⏳',
-                    'approved': '✅',
-                    'preparing': '📦',
-                    'shipped': '🚚',
-                    'delivered': '🏠',
-                    'declined': '❌'
-                }.get(order['status'], '❓')
-                
-                status_text = {
-                    'pending_approval': 'Pending Payment Approval',
-                    'approved': 'Payment Approved - Preparing Order',
-                    'preparing': 'Preparing for Shipment',
-                    'shipped': 'Shipped - On the Way',
-                    'delivered': 'Delivered',
-                    'declined': 'Payment Declined'
-                }.get(order['status'], 'Unknown Status')
-                
-                orders_text += f"{status_emoji} **{order_id}**\n"
-                orders_text += f"💰 {order['total']} ETB\n"
-                orders_text += f"📊 Status: {status_text}\n\n"
-            
+            orders_text = messages.text(locale, 'orders_header') + messages.render_orders(locale, user_orders)
             await message.reply(orders_text, parse_mode='Markdown')
             
         except Exception as e:
             logger.error(f"Error in track_order: {e}")
             await message.reply("❌ Error tracking order")
 
-    @dp.callback_query_handler(lambda c: c.data == 'order')
+    @dp.callback_query_handler(lambda c: action_of(c.data) == 'order', state='*')
     async def show_order_inline(callback_query: types.CallbackQuery):
         """Handle order tracking via inline button."""
         try:
-            await bot.send_message(
-                callback_query.from_user.id,
-                BOT_MESSAGES['order_processing']
-            )
-            await bot.answer_callback_query(callback_query.id)
+            await navigate(callback_query)
         except Exception as e:
             logger.error(f"Error in show_order_inline: {e}")
             await bot.answer_callback_query(callback_query.id, text="❌ Error tracking order")
 
-    @dp.callback_query_handler(lambda c: c.data == 'contact')
+    @dp.callback_query_handler(lambda c: action_of(c.data) == 'contact', state='*')
     async def show_contact(callback_query: types.CallbackQuery):
         """Show contact information."""
         try:
-            await bot.send_message(
-                callback_query.from_user.id,
-                BOT_MESSAGES['contact_info']
-            )
-            await bot.answer_callback_query(callback_query.id)
+            await navigate(callback_query)
         except Exception as e:
             logger.error(f"Error in show_contact: {e}")
             await bot.answer_callback_query(callback_query.id, text="❌ Error loading contact info")
 
-    @dp.callback_query_handler(lambda c: c.data == 'help')
+    @dp.callback_query_handler(lambda c: action_of(c.data) == 'help', state='*')
     async def show_help(callback_query: types.CallbackQuery):
         """Show help information."""
         try:
-            await bot.send_message(
-                callback_query.from_user.id,
-                BOT_MESSAGES['help_text']
-            )
-            await bot.answer_callback_query(callback_query.id)
+            await navigate(callback_query)
         except Exception as e:
             logger.error(f"Error in show_help: {e}")
             await bot.answer_callback_query(callback_query.id, text="❌ Error loading help")
 
+    @dp.message_handler(commands=['language'])
+    async def choose_language(message: types.Message):
+        """Let the user pick a language."""
+        try:
+            keyboard = InlineKeyboardMarkup()
+            keyboard.add(
+                InlineKeyboardButton("🇬🇧 English", callback_data="lang_en"),
+                InlineKeyboardButton("🇪🇹 አማርኛ", callback_data="lang_am")
+            )
+            locale = messages.locale_for(message.from_user)
+            await message.reply(messages.text(locale, 'language_prompt'), reply_markup=keyboard)
+        except Exception as e:
+            logger.error(f"Error in choose_language: {e}")
+            await message.reply("❌ Error loading languages")
+
+    @dp.callback_query_handler(lambda c: c.data.startswith('lang_'))
+    async def set_language(callback_query: types.CallbackQuery):
+        """Save the user's language preference."""
+        try:
+            locale = callback_query.data.split('_')[1]
+            if locale not in messages.locales:
+                await bot.answer_callback_query(callback_query.id, text="❌ Language not available")
+                return
+            
+            set_user_language(callback_query.from_user.id, locale)
+            await bot.answer_callback_query(callback_query.id, text=messages.text(locale, 'language_set'))
+        except Exception as e:
+            logger.error(f"Error in set_language: {e}")
+            await bot.answer_callback_query(callback_query.id, text="❌ Error setting language")
+
     @dp.message_handler(commands=['myid'])
     async def show_my_id(message: types.Message):
         """Show user's Telegram ID."""
@@ -0,0 +1,147 @@
+"""
+Batched admin notifications for orders waiting on approval.
+
+Instead of sending a text and a photo to every admin for each order, orders are
+buffered for a configurable window and each admin receives a single paginated
+summary message. Payment proofs are only sent when an admin asks for them.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from aiogram import Bot, types
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from config import ADMIN_IDS, ADMIN_DIGEST_WINDOW, ADMIN_DIGEST_PAGE_SIZE
+from data.storage import pending_payments
+
+logger = logging.getLogger(__name__)
+
+STATUS_MARKS = {
+    'pending_approval': '⏳',
+    'approved': '✅',
+    'declined': '❌'
+}
+
+
+class AdminDigest:
+    """Buffer pending-approval orders and send one summary per admin per window."""
+
+    def __init__(self, window: int = ADMIN_DIGEST_WINDOW, page_size: int = ADMIN_DIGEST_PAGE_SIZE,
+                 max_tracked_messages: int = 500):
+        self.window = window
+        self.page_size = page_size
+        self.max_tracked_messages = max_tracked_messages
+        self._buffers = {}  # admin_id -> [order_id, ...]
+        self._flush_task = None
+        # (chat_id, message_id) -> [order_ids, current_page]
+        self._messages = OrderedDict()
+
+    def add(self, bot: Bot, order_id: str, admin_ids: list = None):
+        """Queue an order for the next digest of the given admins (default: all)."""
+        for admin_id in admin_ids or ADMIN_IDS:
+            self._buffers.setdefault(admin_id, []).append(order_id)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_event_loop().create_task(self._flush_later(bot))
+
+    async def _flush_later(self, bot: Bot):
+        await asyncio.sleep(self.window)
+        await self.flush(bot)
+
+    async def flush(self, bot: Bot):
+        """Send each admin their buffered orders as one digest message."""
+        buffers, self._buffers = self._buffers, {}
+        for admin_id, order_ids in buffers.items():
+            text, keyboard = self.render(order_ids, 0)
+            try:
+                sent = await bot.send_message(admin_id, text, reply_markup=keyboard)
+                self._remember(admin_id, sent.message_id, order_ids)
+                logger.info(f"Order digest with {len(order_ids)} orders sent to admin {admin_id}")
+            except Exception as e:
+                logger.error(f"Failed to send order digest to admin {admin_id}: {e}")
+
+    def _remember(self, chat_id: int, message_id: int, order_ids: list):
+        self._messages[(chat_id, message_id)] = [order_ids, 0]
+        while len(self._messages) > self.max_tracked_messages:
+            self._messages.popitem(last=False)
+
+    def page_count(self, order_ids: list) -> int:
+        return max(1, -(-len(order_ids) // self.page_size))
+
+    def page_orders(self, order_ids: list, page: int) -> list:
+        start = page * self.page_size
+        return order_ids[start:start + self.page_size]
+
+    def render(self, order_ids: list, page: int):
+        """Render one page of a digest as (text, keyboard)."""
+        pages = self.page_count(order_ids)
+        page = min(max(page, 0), pages - 1)
+        lines = [f"🔔 ORDER DIGEST - {len(order_ids)} orders (page {page + 1}/{pages})\n"]
+        keyboard = InlineKeyboardMarkup()
+
+        for order_id in self.page_orders(order_ids, page):
+            order = pending_payments.get(order_id)
+            if not order:
+                continue
+            mark = STATUS_MARKS.get(order['status'], '❓')
+            items = ", ".join(item['name'] for item in order['items'])
+            lines.append(
+                f"{mark} {order_id} | {order['total']} ETB | {order['payment_method'].upper()}\n"
+                f"👤 {order['first_name']} (@{order['username']}) | ID: {order['user_id']}\n"
+                f"📦 {items}\n"
+            )
+            if order['status'] == 'pending_approval':
+                keyboard.add(
+                    InlineKeyboardButton(f"✅ {order_id}", callback_data=f"approve_{order_id}"),
+                    InlineKeyboardButton(f"❌ {order_id}", callback_data=f"decline_{order_id}")
+                )
+
+        navigation = []
+        if page > 0:
+            navigation.append(InlineKeyboardButton("◀️", callback_data=f"digest_{page - 1}"))
+        navigation.append(InlineKeyboardButton("🧾 Proofs", callback_data=f"proofs_{page}"))
+        if page < pages - 1:
+            navigation.append(InlineKeyboardButton("▶️", callback_data=f"digest_{page + 1}"))
+        keyboard.row(*navigation)
+
+        return "\n".join(lines), keyboard
+
+    async def show_page(self, bot: Bot, chat_id: int, message_id: int, page: int = None):
+        """Re-render a digest message in place, optionally switching page."""
+        entry = self._messages.get((chat_id, message_id))
+        if not entry:
+            return False
+        order_ids, current_page = entry
+        if page is None:
+            page = current_page
+        page = min(max(page, 0), self.page_count(order_ids) - 1)
+        entry[1] = page
+
+        text, keyboard = self.render(order_ids, page)
+        await bot.edit_message_text(text, chat_id, message_id, reply_markup=keyboard)
+        return True
+
+    async def send_proofs(self, bot: Bot, chat_id: int, message_id: int, page: int):
+        """Send the payment proofs for one digest page as a single media group."""
+        entry = self._messages.get((chat_id, message_id))
+        if not entry:
+            return 0
+
+        proofs = []
+        for order_id in self.page_orders(entry[0], page):
+            order = pending_payments.get(order_id)
+            if order and order.get('payment_proof'):
+                proofs.append((order_id, order['payment_proof']))
+
+        if len(proofs) == 1:
+            order_id, file_id = proofs[0]
+            await bot.send_photo(chat_id, file_id, caption=f"Payment Proof for Order {order_id}")
+        elif proofs:
+            media = types.MediaGroup()
+            for order_id, file_id in proofs:
+                media.attach_photo(file_id, caption=f"Payment Proof for Order {order_id}")
+            await bot.send_media_group(chat_id, media)
+
+        return len(proofs)
+
+
+admin_digest = AdminDigest()
@@ -0,0 +1,247 @@
+"""
+Resumable, rate-limited broadcasts to every registered user.
+
+A broadcast snapshots the reachable user IDs and walks them in chunks. Sends are
+paced to BROADCAST_RATE messages per second (below Telegram's ~30/s global
+limit, so regular handler traffic keeps flowing) with a few requests in flight.
+After every chunk the cursor is checkpointed to BROADCAST_DIR, so a restarted
+bot resumes where it stopped; at most one chunk is delivered twice. Users who
+blocked the bot are pruned from the registry, and the admin's status message is
+edited in place with live progress.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from array import array
+from aiogram import Bot
+from aiogram.utils.exceptions import (
+    BotBlocked, BotKicked, CantInitiateConversation, ChatNotFound, RetryAfter, TelegramAPIError, UserDeactivated
+)
+from config import (
+    BROADCAST_DIR, BROADCAST_RATE, BROADCAST_CONCURRENCY, BROADCAST_CHUNK_SIZE, BROADCAST_PROGRESS_INTERVAL
+)
+from data.users import user_registry
+
+logger = logging.getLogger(__name__)
+
+# Errors meaning the user can no longer be reached
+UNREACHABLE = (BotBlocked, BotKicked, CantInitiateConversation, ChatNotFound, UserDeactivated)
+
+
+class RateLimiter:
+    """Spaces calls evenly at `rate` per second; pause() pushes the schedule back."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+
+    async def acquire(self):
+        now = time.monotonic()
+        self._next = max(self._next, now)
+        wait = self._next - now
+        self._next += self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        self._next = max(self._next, time.monotonic() + seconds)
+
+
+class Broadcaster:
+    """Run one broadcast at a time and checkpoint its progress."""
+
+    def __init__(self, directory: str = BROADCAST_DIR, rate: float = BROADCAST_RATE,
+                 concurrency: int = BROADCAST_CONCURRENCY, chunk_size: int = BROADCAST_CHUNK_SIZE,
+                 progress_interval: float = BROADCAST_PROGRESS_INTERVAL):
+        self.directory = directory
+        self.rate = rate
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.progress_interval = progress_interval
+        self.job = None
+        self.recipients = None
+        self._task = None
+        self._cancelled = False
+        self._limiter = None
+        self._run_started = None
+        self._run_start_cursor = 0
+
+    @property
+    def job_path(self):
+        return os.path.join(self.directory, 'broadcast.json')
+
+    @property
+    def recipients_path(self):
+        return os.path.join(self.directory, 'broadcast.recipients')
+
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # Checkpoints
+
+    def _save_job(self):
+        tmp_path = f"{self.job_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.job, f)
+        os.replace(tmp_path, self.job_path)
+
+    def _clear_checkpoint(self):
+        for path in (self.job_path, self.recipients_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    # Control
+
+    async def start(self, bot: Bot, admin_chat_id: int, text: str = None, source: tuple = None):
+        """
+        Start broadcasting either `text` or a copy of `source` (chat_id, message_id).
+
+        Raises RuntimeError if a broadcast is already running.
+        """
+        if self.running():
+            raise RuntimeError("A broadcast is already running")
+
+        recipients = array('q', user_registry.active_ids())
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.recipients_path, 'wb') as f:
+            recipients.tofile(f)
+
+        status = await bot.send_message(admin_chat_id, f"📣 Broadcast to {len(recipients)} users starting...")
+        self.recipients = recipients
+        self.job = {
+            'text': text,
+            'source': list(source) if source else None,
+            'admin_chat_id': admin_chat_id,
+            'status_message_id': status.message_id,
+            'total': len(recipients),
+            'cursor': 0,
+            'sent': 0,
+            'blocked': 0,
+            'failed': 0,
+            'started_at': time.time()
+        }
+        self._save_job()
+        self._launch(bot)
+        logger.info(f"Broadcast to {len(recipients)} users started by admin {admin_chat_id}")
+        return self.job
+
+    async def resume(self, bot: Bot) -> bool:
+        """Continue a broadcast interrupted by a restart, if there is one."""
+        if self.running() or not os.path.exists(self.job_path):
+            return False
+        try:
+            with open(self.job_path) as f:
+                self.job = json.load(f)
+            recipients = array('q')
+            with open(self.recipients_path, 'rb') as f:
+                recipients.frombytes(f.read())
+            self.recipients = recipients
+        except (OSError, ValueError) as e:
+            logger.error(f"Discarding unreadable broadcast checkpoint: {e}")
+            self._clear_checkpoint()
+            return False
+
+        logger.info(f"Resuming broadcast at {self.job['cursor']}/{self.job['total']}")
+        self._launch(bot)
+        return True
+
+    def cancel(self) -> bool:
+        if not self.running():
+            return False
+        self._cancelled = True
+        return True
+
+    def _launch(self, bot: Bot):
+        self._cancelled = False
+        self._limiter = RateLimiter(self.rate)
+        self._run_started = time.monotonic()
+        self._run_start_cursor = self.job['cursor']
+        self._task = asyncio.get_event_loop().create_task(self._run(bot))
+
+    # Sending
+
+    async def _send_one(self, bot: Bot, user_id: int, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            for _ in range(3):
+                await self._limiter.acquire()
+                try:
+                    if self.job['source']:
+                        from_chat_id, message_id = self.job['source']
+                        await bot.copy_message(user_id, from_chat_id, message_id)
+                    else:
+                        await bot.send_message(user_id, self.job['text'])
+                    return 'sent'
+                except RetryAfter as e:
+                    # Flood control applies to the whole bot, so everyone waits
+                    logger.warning(f"Broadcast hit flood control, pausing {e.timeout}s")
+                    self._limiter.pause(e.timeout)
+                except UNREACHABLE:
+                    user_registry.mark_blocked(user_id)
+                    return 'blocked'
+                except TelegramAPIError as e:
+                    logger.warning(f"Broadcast to {user_id} failed: {e}")
+                    return 'failed'
+            return 'failed'
+
+    async def _run(self, bot: Bot):
+        job = self.job
+        semaphore = asyncio.Semaphore(self.concurrency)
+        last_progress = time.monotonic()
+        try:
+            while job['cursor'] < job['total'] and not self._cancelled:
+                chunk = self.recipients[job['cursor']:job['cursor'] + self.chunk_size]
+                results = await asyncio.gather(*(self._send_one(bot, user_id, semaphore) for user_id in chunk))
+                for result in results:
+                    job[result] += 1
+                job['cursor'] += len(chunk)
+                self._save_job()
+
+                if time.monotonic() - last_progress >= self.progress_interval:
+                    last_progress = time.monotonic()
+                    await self._report(bot)
+
+            if self._cancelled:
+                logger.info(f"Broadcast cancelled at {job['cursor']}/{job['total']}")
+            else:
+                logger.info(f"Broadcast finished: {job['sent']} sent, {job['blocked']} blocked, {job['failed']} failed")
+            self._clear_checkpoint()
+            await self._report(bot, final=True)
+        except Exception as e:
+            # The checkpoint stays in place, so the broadcast resumes on the next start
+            logger.error(f"Broadcast stopped at {job['cursor']}/{job['total']}: {e}")
+
+    # Progress
+
+    def progress_text(self, final: bool = False) -> str:
+        job = self.job
+        if final:
+            title = "🛑 Broadcast cancelled" if self._cancelled else "✅ Broadcast finished"
+        else:
+            title = "📣 Broadcast in progress"
+        elapsed = max(time.monotonic() - self._run_started, 1e-6)
+        rate = (job['cursor'] - self._run_start_cursor) / elapsed
+        remaining = job['total'] - job['cursor']
+        eta = f"{remaining / rate / 60:.0f} min" if rate > 0 and not final else "-"
+        return (
+            f"{title}\n\n"
+            f"📬 Processed: {job['cursor']}/{job['total']}\n"
+            f"✅ Delivered: {job['sent']}\n"
+            f"🚫 Blocked (pruned): {job['blocked']}\n"
+            f"❌ Failed: {job['failed']}\n"
+            f"⏱️ {rate:.1f} msg/s | ETA: {eta}"
+        )
+
+    async def _report(self, bot: Bot, final: bool = False):
+        try:
+            await bot.edit_message_text(
+                self.progress_text(final), self.job['admin_chat_id'], self.job['status_message_id']
+            )
+        except TelegramAPIError as e:
+            logger.warning(f"Failed to update broadcast progress: {e}")
+
+
+broadcaster = Broadcaster()
+
@@ -0,0 +1,210 @@
+"""
+Single-message navigation for inline keyboards.
+
+Instead of sending a new message for every button tap, a callback re-renders
+the message it came from: the text, caption, photo or keyboard is edited in
+place, using the cheapest edit that covers what changed. A hash of the last
+rendered text, photo and keyboard is kept per message, so taps that would
+render the same thing cost no API call at all.
+
+The back stack travels in the callback data itself: "cart~cat_Books~home" is
+the action "cart", reached from "cat_Books", reached from "home". Stacks are
+trimmed from the bottom to fit Telegram's 64-byte callback limit; an empty
+stack goes back to "home".
+"""
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from aiogram import Bot, types
+from aiogram.types import InlineKeyboardButton, InputMediaPhoto
+from aiogram.utils.exceptions import MessageNotModified, TelegramAPIError
+
+logger = logging.getLogger(__name__)
+
+SEPARATOR = '~'
+MAX_CALLBACK_BYTES = 64
+HOME = 'home'
+
+
+def split(data: str):
+    """Split callback data into (action, back_stack)."""
+    action, *stack = (data or '').split(SEPARATOR)
+    return action, stack
+
+
+def action_of(data: str) -> str:
+    return (data or '').split(SEPARATOR, 1)[0]
+
+
+def encode(action: str, stack=()) -> str:
+    """Callback data for an action with a back stack, trimmed to Telegram's limit."""
+    stack = list(stack)
+    data = SEPARATOR.join([action] + stack)
+    while stack and len(data.encode('utf-8')) > MAX_CALLBACK_BYTES:
+        stack.pop()
+        data = SEPARATOR.join([action] + stack)
+    return data
+
+
+def push(action: str, stack) -> list:
+    """Back stack for screens opened from `action`."""
+    return [action] + list(stack)
+
+
+def back_button(stack, text: str = "◀️ Back") -> InlineKeyboardButton:
+    """Button returning to the previous screen (home when the stack is empty)."""
+    if stack:
+        return InlineKeyboardButton(text, callback_data=encode(stack[0], stack[1:]))
+    return InlineKeyboardButton(text, callback_data=HOME)
+
+
+class Screen:
+    """What a message should show: text (or caption), optional photo and keyboard."""
+
+    __slots__ = ('text', 'keyboard', 'photo', 'parse_mode')
+
+    def __init__(self, text: str, keyboard=None, photo: str = None, parse_mode: str = None):
+        self.text = text
+        self.keyboard = keyboard
+        self.photo = photo
+        self.parse_mode = parse_mode
+
+    def fingerprint(self) -> tuple:
+        """(content hash, photo, keyboard hash) used to pick or skip an edit."""
+        markup = self.keyboard.as_json() if self.keyboard else ''
+        content = hashlib.blake2b(f"{self.parse_mode}\0{self.text}".encode('utf-8'), digest_size=8).digest()
+        return content, self.photo, hashlib.blake2b(markup.encode('utf-8'), digest_size=8).digest()
+
+
+class Navigator:
+    """Render screens into the message a callback came from, skipping no-op edits."""
+
+    def __init__(self, max_tracked_messages: int = 10000, broken_photo_ttl: float = 3600):
+        self.max_tracked_messages = max_tracked_messages
+        self.broken_photo_ttl = broken_photo_ttl
+        self._rendered = OrderedDict()  # (chat_id, message_id) -> Screen.fingerprint()
+        self._broken_photos = {}  # file_id or URL -> time it failed
+        self.counters = {'sent': 0, 'edited': 0, 'skipped': 0, 'deleted': 0}
+
+    def _remember(self, chat_id: int, message_id: int, fingerprint: tuple):
+        key = (chat_id, message_id)
+        self._rendered[key] = fingerprint
+        self._rendered.move_to_end(key)
+        while len(self._rendered) > self.max_tracked_messages:
+            self._rendered.popitem(last=False)
+
+    def _photo_failed(self, photo: str):
+        self._broken_photos[photo] = time.monotonic()
+
+    def _is_broken(self, photo: str) -> bool:
+        """Whether a photo failed recently; it is tried again after broken_photo_ttl."""
+        failed_at = self._broken_photos.get(photo)
+        if failed_at is None:
+            return False
+        if time.monotonic() - failed_at >= self.broken_photo_ttl:
+            del self._broken_photos[photo]
+            return False
+        return True
+
+    @staticmethod
+    def _as_text(screen: Screen) -> Screen:
+        return Screen(screen.text, screen.keyboard, parse_mode=screen.parse_mode)
+
+    async def _send_photo(self, bot: Bot, chat_id: int, screen: Screen):
+        """Send a photo screen, or return None if its photo cannot be sent."""
+        if self._is_broken(screen.photo):
+            return None
+        try:
+            return await bot.send_photo(chat_id, screen.photo, caption=screen.text,
+                                        reply_markup=screen.keyboard, parse_mode=screen.parse_mode)
+        except TelegramAPIError as e:
+            logger.warning(f"Failed to send photo {screen.photo}: {e}")
+            self._photo_failed(screen.photo)
+            return None
+
+    async def send(self, bot: Bot, chat_id: int, screen: Screen) -> types.Message:
+        """Send a screen as a new message (photo falls back to text if it cannot be sent)."""
+        message = await self._send_photo(bot, chat_id, screen) if screen.photo else None
+        if message is None:
+            # Remember what was actually sent, so later renders edit this text in place
+            screen = self._as_text(screen)
+            message = await bot.send_message(chat_id, screen.text, reply_markup=screen.keyboard,
+                                             parse_mode=screen.parse_mode)
+        self.counters['sent'] += 1
+        self._remember(chat_id, message.message_id, screen.fingerprint())
+        return message
+
+    async def _replace(self, bot: Bot, message: types.Message, sent: types.Message) -> types.Message:
+        chat_id, message_id = message.chat.id, message.message_id
+        try:
+            await bot.delete_message(chat_id, message_id)
+            self.counters['deleted'] += 1
+        except TelegramAPIError:
+            pass
+        self._rendered.pop((chat_id, message_id), None)
+        return sent
+
+    async def show(self, bot: Bot, message: types.Message, screen: Screen) -> types.Message:
+        """Turn `message` into `screen` with the smallest edit that does it."""
+        chat_id, message_id = message.chat.id, message.message_id
+        is_photo = bool(message.photo)
+        photo_broken = bool(screen.photo) and self._is_broken(screen.photo)
+        if photo_broken and not is_photo:
+            # The photo could not be sent before: show this screen as text
+            screen = self._as_text(screen)
+        fingerprint = screen.fingerprint()
+        previous = self._rendered.get((chat_id, message_id))
+        if previous == fingerprint:
+            self.counters['skipped'] += 1
+            return message
+
+        # A text message cannot become a photo (and vice versa): replace it
+        if is_photo and not screen.photo:
+            return await self._replace(bot, message, await self.send(bot, chat_id, screen))
+        if screen.photo and not is_photo:
+            sent = await self._send_photo(bot, chat_id, screen)
+            if sent is not None:
+                self.counters['sent'] += 1
+                self._remember(chat_id, sent.message_id, fingerprint)
+                return await self._replace(bot, message, sent)
+            # The photo cannot be sent: edit this text message instead
+            screen = self._as_text(screen)
+            fingerprint = screen.fingerprint()
+            if previous == fingerprint:
+                self.counters['skipped'] += 1
+                return message
+
+        try:
+            if previous and previous[:2] == fingerprint[:2]:
+                await bot.edit_message_reply_markup(chat_id, message_id, reply_markup=screen.keyboard)
+            elif not is_photo:
+                await bot.edit_message_text(screen.text, chat_id, message_id, reply_markup=screen.keyboard,
+                                            parse_mode=screen.parse_mode)
+            elif (previous and previous[1] == screen.photo) or photo_broken:
+                # Same photo, or one that cannot be shown: only the caption changes
+                await bot.edit_message_caption(chat_id, message_id, caption=screen.text,
+                                               reply_markup=screen.keyboard, parse_mode=screen.parse_mode)
+            else:
+                try:
+                    await bot.edit_message_media(
+                        InputMediaPhoto(screen.photo, caption=screen.text, parse_mode=screen.parse_mode),
+                        chat_id, message_id, reply_markup=screen.keyboard
+                    )
+                except MessageNotModified:
+                    raise
+                except TelegramAPIError as e:
+                    # Broken image URL: keep the old photo, still update caption and buttons
+                    logger.warning(f"Failed to edit photo to {screen.photo}: {e}")
+                    self._photo_failed(screen.photo)
+                    await bot.edit_message_caption(chat_id, message_id, caption=screen.text,
+                                                   reply_markup=screen.keyboard, parse_mode=screen.parse_mode)
+            self.counters['edited'] += 1
+        except MessageNotModified:
+            self.counters['skipped'] += 1
+        self._remember(chat_id, message_id, fingerprint)
+        return message
+
+
+navigator = Navigator()
@@ -0,0 +1,279 @@
+"""
+Routing of pending orders to admins.
+
+Each order waiting for approval is assigned to a single admin (round-robin or
+least outstanding, see ORDER_ROUTING_STRATEGY). The first admin to approve or
+decline takes an atomic claim on the order, so other admins cannot act on it
+twice. Orders nobody claims within ORDER_CLAIM_TIMEOUT seconds are reassigned to
+another admin; when there is none (a single admin, or the broadcast strategy)
+the assigned admins get one reminder instead. Orders recovered from the journal
+are routed again at startup. Per-admin queue depth and review latency are
+tracked for /routing_stats.
+"""
+
+import asyncio
+import logging
+import time
+from aiogram import Bot
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from config import ADMIN_IDS, ADMIN_DIGEST_ENABLED, ORDER_ROUTING_STRATEGY, ORDER_CLAIM_TIMEOUT
+from data.storage import pending_payments
+from utils.admin_digest import admin_digest
+from utils.templates import messages
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('round_robin', 'least_outstanding', 'broadcast')
+
+
+class Assignment:
+    """Routing state of one pending order."""
+
+    __slots__ = ('admin_ids', 'assigned_at', 'deadline', 'claimed_by', 'claimed_at', 'reassignments', 'reminded')
+
+    def __init__(self, admin_ids: list, now: float, claim_timeout: float):
+        self.admin_ids = admin_ids
+        self.assigned_at = now
+        self.deadline = now + claim_timeout
+        self.claimed_by = None
+        self.claimed_at = None
+        self.reassignments = 0
+        self.reminded = False
+
+
+class AdminStats:
+    """Review counters for one admin."""
+
+    __slots__ = ('reviewed', 'latency_total', 'latency_max', 'reassigned_away')
+
+    def __init__(self):
+        self.reviewed = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.reassigned_away = 0
+
+
+def render_admin_order(order_id: str, order: dict):
+    """Render the approval request for one order as (text, keyboard)."""
+    locale = messages.default_locale
+    text = messages.render(
+        locale, 'admin_new_order',
+        order_id=order_id,
+        first_name=order['first_name'],
+        username=order['username'],
+        total=order['total'],
+        method=order['payment_method'].upper(),
+        items=messages.render_lines(locale, 'admin_order_item', order['items']),
+        user_id=order['user_id']
+    )
+    keyboard = InlineKeyboardMarkup()
+    keyboard.add(
+        InlineKeyboardButton("✅ Approve", callback_data=f"approve_{order_id}"),
+        InlineKeyboardButton("❌ Decline", callback_data=f"decline_{order_id}")
+    )
+    return text, keyboard
+
+
+class OrderRouter:
+    """Assign pending orders to admins and guard them with claims."""
+
+    def __init__(self, admin_ids: list = ADMIN_IDS, strategy: str = ORDER_ROUTING_STRATEGY,
+                 claim_timeout: float = ORDER_CLAIM_TIMEOUT):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown order routing strategy '{strategy}', expected one of {STRATEGIES}")
+        self.admin_ids = list(admin_ids)
+        self.strategy = strategy
+        self.claim_timeout = claim_timeout
+        self.assignments = {}
+        self.outstanding = {admin_id: set() for admin_id in self.admin_ids}
+        self.stats = {admin_id: AdminStats() for admin_id in self.admin_ids}
+        self._next = 0
+        self._watchdog = None
+
+    # Assignment
+
+    def _pick(self, exclude=()) -> list:
+        if self.strategy == 'broadcast':
+            return list(self.admin_ids)
+
+        candidates = [admin_id for admin_id in self.admin_ids if admin_id not in exclude] or self.admin_ids
+        if self.strategy == 'least_outstanding':
+            return [min(candidates, key=lambda admin_id: len(self.outstanding[admin_id]))]
+
+        admin_id = candidates[self._next % len(candidates)]
+        self._next += 1
+        return [admin_id]
+
+    def assign(self, order_id: str, exclude=()) -> list:
+        """Choose the admin(s) responsible for an order."""
+        previous = self.assignments.get(order_id)
+        if previous:
+            for admin_id in previous.admin_ids:
+                self.outstanding[admin_id].discard(order_id)
+
+        admin_ids = self._pick(exclude)
+        assignment = Assignment(admin_ids, time.monotonic(), self.claim_timeout)
+        if previous:
+            assignment.reassignments = previous.reassignments + 1
+        self.assignments[order_id] = assignment
+        for admin_id in admin_ids:
+            self.outstanding[admin_id].add(order_id)
+        return admin_ids
+
+    async def dispatch(self, bot: Bot, order_id: str, exclude=()):
+        """Assign an order and notify its admin(s), directly or through the digest."""
+        admin_ids = self.assign(order_id, exclude)
+        order = pending_payments[order_id]
+
+        if ADMIN_DIGEST_ENABLED:
+            admin_digest.add(bot, order_id, admin_ids)
+        else:
+            text, keyboard = render_admin_order(order_id, order)
+            for admin_id in admin_ids:
+                try:
+                    await bot.send_message(admin_id, text, reply_markup=keyboard)
+                    if order.get('payment_proof'):
+                        await bot.send_photo(admin_id, order['payment_proof'],
+                                             caption=f"Payment Proof for Order {order_id}")
+                except Exception as e:
+                    logger.error(f"Failed to notify admin {admin_id}: {e}")
+
+        self._ensure_watchdog(bot)
+        logger.info(f"Order {order_id} routed to admin(s) {admin_ids}")
+        return admin_ids
+
+    async def route_recovered(self, bot: Bot):
+        """Route orders recovered from the journal that still wait for approval."""
+        recovered = [
+            order_id for order_id, order in pending_payments.items()
+            if order['status'] == 'pending_approval' and order_id not in self.assignments
+        ]
+        for order_id in recovered:
+            try:
+                await self.dispatch(bot, order_id)
+            except Exception as e:
+                logger.error(f"Failed to route recovered order {order_id}: {e}")
+        if recovered:
+            logger.info(f"Routed {len(recovered)} recovered pending orders")
+
+    # Claims
+
+    def claim(self, order_id: str, admin_id: int):
+        """
+        Atomically claim an order for review.
+
+        Returns (claimed, holder). Claiming again as the holder succeeds. This
+        runs without awaiting, so two admins can never both win the claim.
+        """
+        assignment = self.assignments.get(order_id)
+        if assignment is None:
+            # Not routed (e.g. routing failed at startup); first claim wins
+            assignment = self.assignments[order_id] = Assignment([admin_id], time.monotonic(), self.claim_timeout)
+            self.outstanding.setdefault(admin_id, set()).add(order_id)
+
+        if assignment.claimed_by is not None and assignment.claimed_by != admin_id:
+            return False, assignment.claimed_by
+
+        assignment.claimed_by = admin_id
+        assignment.claimed_at = time.monotonic()
+        return True, admin_id
+
+    def release(self, order_id: str, admin_id: int):
+        """Give up a claim, e.g. when the review failed."""
+        assignment = self.assignments.get(order_id)
+        if assignment and assignment.claimed_by == admin_id:
+            assignment.claimed_by = None
+            assignment.claimed_at = None
+
+    def complete(self, order_id: str, admin_id: int):
+        """Finish an order's review and record the admin's latency."""
+        assignment = self.assignments.pop(order_id, None)
+        if assignment is None:
+            return
+        for assigned_id in assignment.admin_ids:
+            self.outstanding.get(assigned_id, set()).discard(order_id)
+
+        latency = time.monotonic() - assignment.assigned_at
+        stats = self.stats.setdefault(admin_id, AdminStats())
+        stats.reviewed += 1
+        stats.latency_total += latency
+        stats.latency_max = max(stats.latency_max, latency)
+
+    # Reassignment
+
+    def expired(self, now: float = None) -> list:
+        """Orders assigned longer than the claim timeout without being claimed."""
+        now = time.monotonic() if now is None else now
+        return [
+            order_id for order_id, assignment in self.assignments.items()
+            if assignment.claimed_by is None and now - assignment.assigned_at >= self.claim_timeout
+        ]
+
+    def _can_reassign(self, admin_ids: list) -> bool:
+        """Whether another admin than the current one(s) could take an order over."""
+        if self.strategy == 'broadcast':
+            return False
+        return any(admin_id not in admin_ids for admin_id in self.admin_ids)
+
+    async def _remind(self, bot: Bot, order_id: str, admin_ids: list):
+        text, keyboard = render_admin_order(order_id, pending_payments[order_id])
+        for admin_id in admin_ids:
+            try:
+                await bot.send_message(admin_id, f"⏰ STILL WAITING FOR APPROVAL\n\n{text}", reply_markup=keyboard)
+            except Exception as e:
+                logger.error(f"Failed to remind admin {admin_id} of order {order_id}: {e}")
+
+    def _ensure_watchdog(self, bot: Bot):
+        if self._watchdog is None or self._watchdog.done():
+            self._watchdog = asyncio.get_event_loop().create_task(self._watch(bot))
+
+    async def _watch(self, bot: Bot):
+        while self.assignments:
+            await asyncio.sleep(max(self.claim_timeout / 4, 1))
+            now = time.monotonic()
+            due = [
+                order_id for order_id, assignment in self.assignments.items()
+                if assignment.claimed_by is None and now >= assignment.deadline
+            ]
+            for order_id in due:
+                order = pending_payments.get(order_id)
+                if not order or order['status'] != 'pending_approval':
+                    self.assignments.pop(order_id, None)
+                    continue
+
+                assignment = self.assignments[order_id]
+                previous = assignment.admin_ids
+                if not self._can_reassign(previous):
+                    # Re-sending to the same admin(s) every timeout is spam; nudge once
+                    assignment.deadline = now + self.claim_timeout
+                    if not assignment.reminded:
+                        assignment.reminded = True
+                        await self._remind(bot, order_id, previous)
+                    continue
+
+                for admin_id in previous:
+                    self.stats.setdefault(admin_id, AdminStats()).reassigned_away += 1
+                try:
+                    new_admins = await self.dispatch(bot, order_id, exclude=previous)
+                    logger.info(f"Order {order_id} unclaimed by {previous}, reassigned to {new_admins}")
+                except Exception as e:
+                    logger.error(f"Failed to reassign order {order_id}: {e}")
+
+    # Metrics
+
+    def stats_snapshot(self) -> list:
+        """Per-admin (admin_id, queue_depth, reviewed, avg_latency, max_latency, reassigned_away)."""
+        return [
+            (
+                admin_id,
+                len(self.outstanding.get(admin_id, ())),
+                stats.reviewed,
+                stats.latency_total / stats.reviewed if stats.reviewed else 0.0,
+                stats.latency_max,
+                stats.reassigned_away
+            )
+            for admin_id, stats in self.stats.items()
+        ]
+
+
+order_router = OrderRouter()
@@ -0,0 +1,220 @@
+"""
+On-demand profiling of the running bot.
+
+A profile combines three views of the same time window:
+
+- Stack samples. SIGPROF fires every PROFILE_SAMPLE_INTERVAL seconds of CPU
+  time and the handler records the interrupted Python stack, so an idle bot
+  costs nothing and a busy one pays a dict increment per sample. Where
+  setitimer is not available (Windows, or not on the main thread) a helper
+  thread samples the main thread's stack on wall-clock time instead.
+- Event-loop lag: a watcher sleeps PROFILE_LAG_INTERVAL and measures how late
+  it wakes up; any lag means a callback blocked the loop.
+- Asyncio tasks: the number of live tasks and which coroutines they run,
+  counted on every lag tick.
+
+Stacks are exported in the collapsed format ("root;caller;leaf count"), which
+flamegraph.pl, speedscope and inferno read directly.
+"""
+
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+from config import PROFILE_SAMPLE_INTERVAL, PROFILE_LAG_INTERVAL
+
+MAX_STACK_DEPTH = 64
+STALL_THRESHOLD = 0.1  # seconds of loop lag reported as a stall
+
+
+class StackSampler:
+    """Count Python stacks of the main thread, on CPU time when possible."""
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()  # tuple of code objects, leaf first -> samples
+        self.samples = 0
+        self.mode = None
+        self._labels = {}
+        self._previous_handler = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _record(self, frame):
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        self.stacks[tuple(stack)] += 1
+        self.samples += 1
+
+    def _on_signal(self, signum, frame):
+        self._record(frame)
+
+    def _sample_thread(self, thread_id: int):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                self._record(frame)
+
+    def start(self):
+        if hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread():
+            self.mode = 'cpu'
+            self._previous_handler = signal.signal(signal.SIGPROF, self._on_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self.mode = 'wall'
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._sample_thread, args=(threading.main_thread().ident,), daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        if self.mode == 'cpu':
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+        elif self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            label = label.replace(';', ':')
+            self._labels[code] = label
+        return label
+
+    def collapsed(self) -> str:
+        """Stacks in collapsed format, root first, heaviest first."""
+        lines = []
+        for stack, count in self.stacks.most_common():
+            lines.append(f"{';'.join(self._label(code) for code in reversed(stack))} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def top_functions(self, limit: int = 5) -> list:
+        """(label, self samples) of the functions most often on top of the stack."""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            if stack:
+                leaves[stack[0]] += count
+        return [(self._label(code), count) for code, count in leaves.most_common(limit)]
+
+
+class LoopMonitor:
+    """Measure event-loop lag and count live asyncio tasks while running."""
+
+    def __init__(self, interval: float = PROFILE_LAG_INTERVAL):
+        self.interval = interval
+        self.lags = array('d')
+        self.task_counts = array('I')
+        self.coroutines = Counter()  # coroutine name -> ticks it was seen alive
+
+    @staticmethod
+    def _coroutine_name(task: asyncio.Task) -> str:
+        coro = task.get_coro()
+        return getattr(coro, '__qualname__', None) or type(coro).__name__
+
+    async def run(self, seconds: float):
+        loop = asyncio.get_event_loop()
+        current = asyncio.current_task()
+        deadline = loop.time() + seconds
+        while loop.time() < deadline:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - started - self.interval))
+
+            tasks = [task for task in asyncio.all_tasks() if task is not current and not task.done()]
+            self.task_counts.append(len(tasks))
+            self.coroutines.update(self._coroutine_name(task) for task in tasks)
+
+    def lag_percentile(self, q: float) -> float:
+        if not self.lags:
+            return 0.0
+        ordered = sorted(self.lags)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Profiler:
+    """Run one profile at a time and summarise it."""
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL, lag_interval: float = PROFILE_LAG_INTERVAL):
+        self.interval = interval
+        self.lag_interval = lag_interval
+        self._running = False
+        self._task = None
+
+    def running(self) -> bool:
+        return self._running
+
+    def _claim(self):
+        if self._running:
+            raise RuntimeError("A profile is already running")
+        self._running = True
+
+    async def run(self, seconds: float):
+        """
+        Profile the process for `seconds`; returns (summary text, collapsed stacks).
+
+        Raises RuntimeError if a profile is already running.
+        """
+        self._claim()
+        return await self._profile(seconds)
+
+    def start(self, seconds: float) -> asyncio.Task:
+        """
+        Start a profile in the background; the task's result is the same as run()'s.
+
+        Raises RuntimeError right away if a profile is already running.
+        """
+        self._claim()
+        self._task = asyncio.get_event_loop().create_task(self._profile(seconds))
+        return self._task
+
+    async def _profile(self, seconds: float):
+        sampler = StackSampler(self.interval)
+        monitor = LoopMonitor(self.lag_interval)
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        sampler.start()
+        try:
+            await monitor.run(seconds)
+        finally:
+            sampler.stop()
+            self._running = False
+        elapsed = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+        return self._summary(sampler, monitor, elapsed, cpu), sampler.collapsed()
+
+    def _summary(self, sampler: StackSampler, monitor: LoopMonitor, elapsed: float, cpu: float) -> str:
+        lags = monitor.lags
+        mean_lag = sum(lags) / len(lags) if lags else 0.0
+        stalls = sum(1 for lag in lags if lag >= STALL_THRESHOLD)
+        peak_tasks = max(monitor.task_counts) if monitor.task_counts else 0
+        mode = "CPU time" if sampler.mode == 'cpu' else "wall clock"
+        lines = [
+            f"🔬 Profile: {elapsed:.1f} s, {sampler.samples} samples every {sampler.interval * 1000:g} ms of {mode}",
+            f"🧮 CPU: {cpu:.2f} s ({cpu / max(elapsed, 1e-9) * 100:.0f}% of one core)",
+            f"⏳ Loop lag: mean {mean_lag * 1000:.1f} ms | p99 {monitor.lag_percentile(0.99) * 1000:.1f} ms | "
+            f"max {max(lags, default=0.0) * 1000:.1f} ms | stalls ≥{STALL_THRESHOLD * 1000:.0f} ms: {stalls}",
+            f"🧵 Tasks: peak {peak_tasks}, at end {monitor.task_counts[-1] if monitor.task_counts else 0}",
+        ]
+        if monitor.coroutines:
+            ticks = max(len(monitor.task_counts), 1)
+            lines.append("\nBusiest coroutines (avg. live tasks):")
+            for name, seen in monitor.coroutines.most_common(5):
+                lines.append(f"• {name}: {seen / ticks:.1f}")
+        if sampler.samples:
+            lines.append("\nHottest functions (self samples):")
+            for label, count in sampler.top_functions():
+                lines.append(f"• {label}: {count / sampler.samples * 100:.0f}%")
+        return '\n'.join(lines)
+
+
+profiler = Profiler()
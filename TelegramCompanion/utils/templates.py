@@ -0,0 +1,143 @@
+"""
+Localized message templates.
+
+Templates from LOCALE_MESSAGES in config.py are compiled once when this module is
+imported. Rendering uses the bound str.format of each template and repeated
+lines (cart items, order lists) are built with a single join instead of +=.
+"""
+
+import logging
+from string import Formatter
+from config import LOCALE_MESSAGES, DEFAULT_LOCALE, ORDER_STATUS_EMOJI
+from data.storage import get_user_language
+
+logger = logging.getLogger(__name__)
+
+
+class Template:
+    """A compiled message template."""
+
+    __slots__ = ('key', 'text', 'fields', 'render', 'render_map')
+
+    def __init__(self, key: str, text: str):
+        self.key = key
+        self.text = text
+        self.fields = frozenset(name for _, name, _, _ in Formatter().parse(text) if name)
+        # Templates without placeholders are returned as-is so literal braces survive
+        self.render = text.format if self.fields else self._literal
+        self.render_map = text.format_map if self.fields else self._literal
+
+    def _literal(self, *args, **values):
+        return self.text
+
+    def partial(self, **values) -> 'Template':
+        """Compile a new template with some fields already filled in."""
+        parts = []
+        for literal, name, spec, conversion in Formatter().parse(self.text):
+            parts.append(literal.replace('{', '{{').replace('}', '}}'))
+            if name is None:
+                continue
+            if name in values:
+                value = values[name]
+                if conversion:
+                    value = {'r': repr, 's': str, 'a': ascii}[conversion](value)
+                parts.append(format(value, spec).replace('{', '{{').replace('}', '}}'))
+            else:
+                parts.append('{' + name + ('!' + conversion if conversion else '') + (':' + spec if spec else '') + '}')
+        return Template(self.key, "".join(parts))
+
+
+class TemplateCatalog:
+    """Compiled templates for every configured locale."""
+
+    def __init__(self, locales: dict, default_locale: str):
+        if default_locale not in locales:
+            raise ValueError(f"Default locale '{default_locale}' has no templates")
+
+        self.default_locale = default_locale
+        default = {key: Template(key, text) for key, text in locales[default_locale].items()}
+        self._locales = {default_locale: default}
+
+        for locale, texts in locales.items():
+            if locale == default_locale:
+                continue
+            compiled = dict(default)
+            for key, text in texts.items():
+                template = Template(key, text)
+                if key in default and template.fields != default[key].fields:
+                    raise ValueError(
+                        f"Template '{key}' for locale '{locale}' uses fields {sorted(template.fields)}, "
+                        f"expected {sorted(default[key].fields)}"
+                    )
+                compiled[key] = template
+            self._locales[locale] = compiled
+
+        # Status labels are looked up for every listed order, so resolve them once per
+        # locale and bake them into one order line template per status
+        self._statuses = {}
+        self._order_lines = {}
+        for locale, compiled in self._locales.items():
+            statuses = {
+                key[len('status_'):]: (ORDER_STATUS_EMOJI.get(key[len('status_'):], '❓'), template.text)
+                for key, template in compiled.items() if key.startswith('status_')
+            }
+            self._statuses[locale] = statuses
+            self._order_lines[locale] = {
+                status: compiled['order_line'].partial(emoji=emoji, status=label).render
+                for status, (emoji, label) in statuses.items()
+            }
+
+        logger.info(f"Compiled message templates for locales: {', '.join(self._locales)}")
+
+    @property
+    def locales(self):
+        return tuple(self._locales)
+
+    def get(self, locale: str, key: str) -> Template:
+        """Get a compiled template, falling back to the default locale."""
+        return self._locales.get(locale, self._locales[self.default_locale])[key]
+
+    def text(self, locale: str, key: str) -> str:
+        """Get the raw text of a template that takes no values."""
+        return self.get(locale, key).text
+
+    def render(self, locale: str, key: str, **values) -> str:
+        """Render a single template."""
+        return self.get(locale, key).render(**values)
+
+    def render_lines(self, locale: str, key: str, rows) -> str:
+        """Render a template once per row (a dict of values) and join the results."""
+        render_map = self.get(locale, key).render_map
+        return "".join([render_map(row) for row in rows])
+
+    def status(self, locale: str, status: str):
+        """Get (emoji, label) for an order status."""
+        statuses = self._statuses.get(locale, self._statuses[self.default_locale])
+        return statuses.get(status) or ('❓', statuses['unknown'][1])
+
+    def render_orders(self, locale: str, orders) -> str:
+        """Render (order_id, order) pairs as order list lines."""
+        lines = self._order_lines.get(locale, self._order_lines[self.default_locale])
+        unknown = lines['unknown']
+        return "".join([
+            lines.get(order['status'], unknown)(order_id=order_id, total=order['total'])
+            for order_id, order in orders
+        ])
+
+    def locale_for(self, user) -> str:
+        """Pick the locale for a Telegram user: saved preference, then client language."""
+        locale = get_user_language(user.id)
+        if locale in self._locales:
+            return locale
+        language_code = getattr(user, 'language_code', None)
+        if language_code and language_code[:2] in self._locales:
+            return language_code[:2]
+        return self.default_locale
+
+    def locale_for_id(self, user_id: int) -> str:
+        """Pick the locale for a user known only by ID."""
+        locale = get_user_language(user_id)
+        return locale if locale in self._locales else self.default_locale
+
+
+messages = TemplateCatalog(LOCALE_MESSAGES, DEFAULT_LOCALE)
@@ -0,0 +1,153 @@
+"""
+Per-user throttling and anti-flood middleware.
+
+Each user gets a token bucket per command or callback prefix (see THROTTLE_RATES
+in config.py). Repeated identical callbacks inside a short window are dropped
+without any API call, and a throttled user gets a single "slow down" reply per
+burst. State for idle users is evicted so memory stays bounded.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from aiogram import types
+from aiogram.dispatcher.handler import CancelHandler
+from aiogram.dispatcher.middlewares import BaseMiddleware
+from config import (
+    ADMIN_IDS, THROTTLE_RATES, THROTTLE_COALESCE_WINDOW, THROTTLE_IDLE_TTL, THROTTLE_MAX_USERS
+)
+from utils.navigation import action_of
+from utils.templates import messages
+
+logger = logging.getLogger(__name__)
+
+
+class UserThrottle:
+    """Throttle state for one user."""
+
+    __slots__ = ('buckets', 'last_callback', 'last_callback_at', 'warned', 'last_seen')
+
+    def __init__(self, now: float):
+        self.buckets = {}  # bucket key -> [tokens, updated_at]
+        self.last_callback = None
+        self.last_callback_at = 0.0
+        self.warned = False
+        self.last_seen = now
+
+
+class ThrottleRegistry:
+    """Bounded LRU of per-user token buckets."""
+
+    def __init__(self, rates: dict = THROTTLE_RATES, idle_ttl: float = THROTTLE_IDLE_TTL,
+                 max_users: int = THROTTLE_MAX_USERS, coalesce_window: float = THROTTLE_COALESCE_WINDOW):
+        self.rates = rates
+        self.idle_ttl = idle_ttl
+        self.max_users = max_users
+        self.coalesce_window = coalesce_window
+        self._users = OrderedDict()
+
+    def __len__(self):
+        return len(self._users)
+
+    def _user(self, user_id: int, now: float) -> UserThrottle:
+        state = self._users.get(user_id)
+        if state is None:
+            state = self._users[user_id] = UserThrottle(now)
+        else:
+            self._users.move_to_end(user_id)
+        state.last_seen = now
+        self._evict(now)
+        return state
+
+    def _evict(self, now: float):
+        # Least recently seen users sit at the front
+        while self._users:
+            user_id, state = next(iter(self._users.items()))
+            if len(self._users) <= self.max_users and now - state.last_seen < self.idle_ttl:
+                break
+            del self._users[user_id]
+
+    def bucket_key(self, key: str) -> str:
+        return key if key in self.rates else 'default'
+
+    def is_duplicate_callback(self, user_id: int, data: str, now: float = None) -> bool:
+        """Check (and record) whether a callback repeats the previous one within the window."""
+        now = time.monotonic() if now is None else now
+        state = self._user(user_id, now)
+        duplicate = state.last_callback == data and now - state.last_callback_at < self.coalesce_window
+        state.last_callback = data
+        state.last_callback_at = now
+        return duplicate
+
+    def consume(self, user_id: int, key: str, now: float = None):
+        """
+        Take a token for the given key.
+
+        Returns (allowed, warn): warn is True only for the first rejected request
+        of a burst, so the caller sends a single slow-down reply.
+        """
+        now = time.monotonic() if now is None else now
+        state = self._user(user_id, now)
+        key = self.bucket_key(key)
+        rate, burst = self.rates[key]
+
+        bucket = state.buckets.get(key)
+        if bucket is None:
+            bucket = state.buckets[key] = [float(burst), now]
+        else:
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            state.warned = False
+            return True, False
+
+        warn = not state.warned
+        state.warned = True
+        return False, warn
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Drop updates from users that exceed their rate before any filter runs."""
+
+    def __init__(self, registry: ThrottleRegistry = None):
+        super().__init__()
+        self.registry = registry or ThrottleRegistry()
+
+    async def on_pre_process_message(self, message: types.Message, data: dict):
+        user_id = message.from_user.id
+        if user_id in ADMIN_IDS:
+            return
+
+        key = message.get_command(pure=True) if message.is_command() else 'message'
+        allowed, warn = self.registry.consume(user_id, key)
+        if allowed:
+            return
+
+        if warn:
+            await message.answer(messages.text(messages.locale_for(message.from_user), 'slow_down'))
+        logger.info(f"Throttled message '{key}' from user {user_id}")
+        raise CancelHandler()
+
+    async def on_pre_process_callback_query(self, callback_query: types.CallbackQuery, data: dict):
+        user_id = callback_query.from_user.id
+        if user_id in ADMIN_IDS:
+            return
+
+        if self.registry.is_duplicate_callback(user_id, callback_query.data):
+            # Stop the button's spinner; the first tap is already being handled
+            await callback_query.answer()
+            raise CancelHandler()
+
+        key = action_of(callback_query.data).split('_', 1)[0]
+        allowed, warn = self.registry.consume(user_id, key)
+        if allowed:
+            return
+
+        if warn:
+            await callback_query.answer(messages.text(messages.locale_for(callback_query.from_user), 'slow_down'))
+        else:
+            await callback_query.answer()
+        logger.info(f"Throttled callback '{key}' from user {user_id}")
+        raise CancelHandler()
@@ -0,0 +1,345 @@
+"""
+Per-update tracing.
+
+A sampled update gets a trace id and a root span; child spans cover dispatcher
+filtering, the handler that ran, storage and FSM calls, and every Bot API
+request it made. When the update finishes, its spans are written to a rotating
+JSON-lines file (TRACE_PATH), one span per line, using OpenTelemetry's OTLP/JSON
+field names (traceId, spanId, parentSpanId, startTimeUnixNano, ...) with the
+attributes as a flat map, so they can be loaded into Jaeger/Tempo tooling or
+read with jq.
+
+Only TRACE_SAMPLE_RATE of updates are traced. For the others every hook and
+wrapper returns after a single context variable lookup.
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from aiogram import Bot, types
+from aiogram.dispatcher.handler import current_handler
+from aiogram.dispatcher.middlewares import BaseMiddleware
+from aiogram.dispatcher.storage import BaseStorage
+from config import TRACE_PATH, TRACE_SAMPLE_RATE, TRACE_MAX_BYTES, TRACE_BACKUP_COUNT
+from utils.navigation import action_of
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = 'yene-gebeya-bot'
+INTERNAL, SERVER, CLIENT = 'SPAN_KIND_INTERNAL', 'SPAN_KIND_SERVER', 'SPAN_KIND_CLIENT'
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    """One timed operation inside a trace."""
+
+    __slots__ = ('trace', 'span_id', 'parent', 'name', 'kind', 'start', 'end', 'attributes', 'error')
+
+    def __init__(self, trace, parent, name: str, kind: str, attributes: dict):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent = parent
+        self.name = name
+        self.kind = kind
+        self.start = time.time_ns()
+        self.end = None
+        self.attributes = attributes
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict:
+        return {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent.span_id if self.parent else '',
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': self.start,
+            'endTimeUnixNano': self.end,
+            'attributes': self.attributes,
+            'status': {'code': 'STATUS_CODE_ERROR', 'message': self.error} if self.error else {'code': 'STATUS_CODE_OK'},
+            'resource': {'service.name': SERVICE_NAME}
+        }
+
+
+class Trace:
+    """The spans of one update."""
+
+    __slots__ = ('trace_id', 'root', 'spans')
+
+    def __init__(self):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.root = None
+        self.spans = []
+
+
+class Tracer:
+    """Start and end spans in the current context and export finished traces."""
+
+    def __init__(self, path: str = TRACE_PATH, sample_rate: float = TRACE_SAMPLE_RATE,
+                 max_bytes: int = TRACE_MAX_BYTES, backup_count: int = TRACE_BACKUP_COUNT):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.exported = 0
+        self._handler = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def current(self):
+        return _current_span.get()
+
+    def start_trace(self, name: str, kind: str = SERVER, **attributes):
+        """Open a root span for a sampled update; returns None if the update is not sampled."""
+        if random.random() >= self.sample_rate:
+            return None
+        trace = Trace()
+        span = trace.root = Span(trace, None, name, kind, attributes)
+        trace.spans.append(span)
+        _current_span.set(span)
+        return span
+
+    def start_span(self, name: str, kind: str = INTERNAL, **attributes):
+        """Open a child of the current span; returns None outside a sampled trace."""
+        parent = _current_span.get()
+        # Tasks spawned by a handler inherit its context but outlive the trace
+        if parent is None or parent.trace.root.end is not None:
+            return None
+        span = Span(parent.trace, parent, name, kind, attributes)
+        parent.trace.spans.append(span)
+        _current_span.set(span)
+        return span
+
+    def end_span(self, span: Span, error: BaseException = None):
+        if span is None or span.end is not None:
+            return
+        span.end = time.time_ns()
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        _current_span.set(span.parent)
+        if span.parent is None:
+            self._export(span.trace)
+
+    def end_trace(self):
+        """End the current trace, closing spans cut short (e.g. by CancelHandler)."""
+        span = _current_span.get()
+        if span is None:
+            return
+        root = span.trace.root
+        now = time.time_ns()
+        for open_span in span.trace.spans:
+            if open_span.end is None and open_span is not root:
+                open_span.end = now
+                open_span.attributes['span.unfinished'] = True
+        self.end_span(root)
+
+    @contextmanager
+    def span(self, name: str, kind: str = INTERNAL, **attributes):
+        """`with tracer.span(...)`: a child span around a block (no-op outside a trace)."""
+        span = self.start_span(name, kind, **attributes)
+        if span is None:
+            yield None
+            return
+        try:
+            yield span
+        except BaseException as e:
+            self.end_span(span, e)
+            raise
+        self.end_span(span)
+
+    # Export
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._handler = RotatingFileHandler(
+            self.path, maxBytes=self.max_bytes, backupCount=self.backup_count, encoding='utf-8'
+        )
+
+    def _export(self, trace: Trace):
+        try:
+            if self._handler is None:
+                self._open()
+            lines = '\n'.join(json.dumps(span.to_dict(), ensure_ascii=False, default=str) for span in trace.spans)
+            record = logging.LogRecord('traces', logging.INFO, self.path, 0, lines, None, None)
+            self._handler.emit(record)
+            self.exported += 1
+        except Exception as e:
+            logger.error(f"Failed to export trace {trace.trace_id}: {e}")
+
+    def close(self):
+        if self._handler:
+            self._handler.close()
+            self._handler = None
+
+
+tracer = Tracer()
+
+
+def traced(name: str = None, kind: str = INTERNAL):
+    """Decorator wrapping a function (sync or async) in a span when a trace is active."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current_span.get() is None:
+                    return await func(*args, **kwargs)
+                with tracer.span(span_name, kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with tracer.span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracedBot(Bot):
+    """Bot whose API requests become client spans of the current trace."""
+
+    async def request(self, method, data=None, files=None, **kwargs):
+        if _current_span.get() is None:
+            return await super().request(method, data, files, **kwargs)
+        with tracer.span(f"telegram.{method}", CLIENT, **{'rpc.system': 'telegram', 'rpc.method': method}):
+            return await super().request(method, data, files, **kwargs)
+
+
+class TracedStorage(BaseStorage):
+    """FSM storage wrapper recording a span per state/data access."""
+
+    def __init__(self, storage: BaseStorage):
+        self.storage = storage
+
+    async def close(self):
+        await self.storage.close()
+
+    async def wait_closed(self):
+        await self.storage.wait_closed()
+
+    async def get_state(self, **kwargs):
+        with tracer.span('fsm.get_state'):
+            return await self.storage.get_state(**kwargs)
+
+    async def get_data(self, **kwargs):
+        with tracer.span('fsm.get_data'):
+            return await self.storage.get_data(**kwargs)
+
+    async def set_state(self, **kwargs):
+        with tracer.span('fsm.set_state'):
+            return await self.storage.set_state(**kwargs)
+
+    async def set_data(self, **kwargs):
+        with tracer.span('fsm.set_data'):
+            return await self.storage.set_data(**kwargs)
+
+    async def update_data(self, **kwargs):
+        with tracer.span('fsm.update_data'):
+            return await self.storage.update_data(**kwargs)
+
+    def has_bucket(self):
+        return self.storage.has_bucket()
+
+    async def get_bucket(self, **kwargs):
+        return await self.storage.get_bucket(**kwargs)
+
+    async def set_bucket(self, **kwargs):
+        return await self.storage.set_bucket(**kwargs)
+
+    async def update_bucket(self, **kwargs):
+        return await self.storage.update_bucket(**kwargs)
+
+
+class TracingMiddleware(BaseMiddleware):
+    """
+    Open a trace per sampled update with spans for filtering and the handler.
+
+    Set it up after the throttling middleware: updates dropped as floods are
+    then traced as a bare root span.
+    """
+
+    def __init__(self, tracer: Tracer = tracer):
+        super().__init__()
+        self.tracer = tracer
+
+    async def on_pre_process_update(self, update: types.Update, data: dict):
+        self.tracer.start_trace('telegram.update', SERVER, **{'telegram.update_id': update.update_id})
+
+    async def on_post_process_update(self, update: types.Update, results, data: dict):
+        self.tracer.end_trace()
+
+    async def on_pre_process_error(self, update: types.Update, exception: BaseException, data: dict):
+        # Runs after post_process_message/callback_query closed the handler span,
+        # but before the root span is exported
+        span = _current_span.get()
+        if span is None:
+            return
+        root = span.trace.root
+        error = f"{type(exception).__name__}: {exception}"
+        # The filter or handler span the exception escaped from is the last child of the root
+        stage = next((s for s in reversed(span.trace.spans) if s.parent is root), None)
+        if stage is not None:
+            stage.error = error
+        root.error = error
+
+    def _start_filtering(self, event: str, user: types.User, **attributes):
+        span = _current_span.get()
+        if span is None:
+            return
+        span.set(**{'telegram.event': event, 'telegram.user_id': user.id if user else None}, **attributes)
+        self.tracer.start_span('dispatcher.filter')
+
+    def _start_handler(self):
+        span = _current_span.get()
+        if span is None:
+            return
+        # A handler that raised SkipHandler is followed by the next match
+        if span.name == 'dispatcher.filter' or span.name.startswith('handler.'):
+            self.tracer.end_span(span)
+        handler = current_handler.get(None)
+        name = getattr(handler, '__name__', 'unknown')
+        self.tracer.start_span(f"handler.{name}", **{
+            'code.function': name, 'code.namespace': getattr(handler, '__module__', '')
+        })
+
+    def _end_handler(self):
+        span = _current_span.get()
+        while span is not None and span.parent is not None:
+            self.tracer.end_span(span)
+            span = _current_span.get()
+
+    async def on_pre_process_message(self, message: types.Message, data: dict):
+        self._start_filtering('message', message.from_user, **{'telegram.command': message.get_command() or ''})
+
+    async def on_process_message(self, message: types.Message, data: dict):
+        self._start_handler()
+
+    async def on_post_process_message(self, message: types.Message, results, data: dict):
+        self._end_handler()
+
+    async def on_pre_process_callback_query(self, callback_query: types.CallbackQuery, data: dict):
+        self._start_filtering('callback_query', callback_query.from_user,
+                              **{'telegram.callback': action_of(callback_query.data)})
+
+    async def on_process_callback_query(self, callback_query: types.CallbackQuery, data: dict):
+        self._start_handler()
+
+    async def on_post_process_callback_query(self, callback_query: types.CallbackQuery, results, data: dict):
+        self._end_handler()
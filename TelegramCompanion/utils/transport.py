@@ -0,0 +1,145 @@
+"""
+Tuned HTTP transport for Bot API calls.
+
+aiogram's default session opens up to 100 connections with aiohttp's 15-second
+keep-alive, resolves DNS through a 10-second cache and gives every method the
+same (unbounded) timeout. PooledBot instead:
+
+- sizes the keep-alive pool for our concurrency (BOT_API_POOL_SIZE, by default
+  enough for every running handler, the broadcast senders and the long poll)
+  and keeps idle connections for BOT_API_KEEPALIVE seconds, so bursts reuse
+  warm TLS connections instead of handshaking again;
+- caches DNS answers for BOT_API_DNS_TTL seconds;
+- bounds each request by a per-method timeout (BOT_API_TIMEOUTS): callback
+  answers fail fast, uploads get longer, and getUpdates gets its long-poll
+  timeout plus a margin;
+- talks to a self-hosted Bot API server when BOT_API_SERVER_URL is set (lower
+  latency when it runs next to the bot, uploads up to 2000 MB and downloads
+  of any size);
+- counts pool usage through an aiohttp TraceConfig (see /api_stats).
+"""
+
+import time
+import aiohttp
+from aiogram.bot.api import TELEGRAM_PRODUCTION, TelegramAPIServer
+from aiogram.utils import json
+from config import (
+    BOT_API_SERVER_URL, BOT_API_POOL_SIZE, BOT_API_KEEPALIVE, BOT_API_DNS_TTL, BOT_API_CONNECT_TIMEOUT,
+    BOT_API_TIMEOUTS, BOT_API_POLL_MARGIN
+)
+from utils.tracing import TracedBot
+
+
+def api_server(url: str = BOT_API_SERVER_URL) -> TelegramAPIServer:
+    """Bot API endpoint: a self-hosted server if configured, api.telegram.org otherwise."""
+    return TelegramAPIServer.from_base(url) if url else TELEGRAM_PRODUCTION
+
+
+class PoolMetrics:
+    """Connection pool counters fed by aiohttp's request tracing hooks."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.queued = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.dns_hits = 0
+        self.dns_misses = 0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        config = aiohttp.TraceConfig()
+        config.on_request_start.append(self._on_request_start)
+        config.on_request_end.append(self._on_request_end)
+        config.on_request_exception.append(self._on_request_exception)
+        config.on_connection_create_end.append(self._on_connection_create_end)
+        config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        config.on_connection_queued_start.append(self._on_connection_queued_start)
+        config.on_connection_queued_end.append(self._on_connection_queued_end)
+        config.on_dns_cache_hit.append(self._on_dns_cache_hit)
+        config.on_dns_cache_miss.append(self._on_dns_cache_miss)
+        return config
+
+    async def _on_request_start(self, session, context, params):
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    async def _on_request_end(self, session, context, params):
+        self.in_flight -= 1
+
+    async def _on_request_exception(self, session, context, params):
+        self.in_flight -= 1
+        self.errors += 1
+
+    async def _on_connection_create_end(self, session, context, params):
+        self.connections_created += 1
+
+    async def _on_connection_reuseconn(self, session, context, params):
+        self.connections_reused += 1
+
+    async def _on_connection_queued_start(self, session, context, params):
+        # Every connection in the pool is busy
+        self.queued += 1
+        context.queued_at = time.monotonic()
+
+    async def _on_connection_queued_end(self, session, context, params):
+        waited = time.monotonic() - context.queued_at
+        self.queue_wait_total += waited
+        self.queue_wait_max = max(self.queue_wait_max, waited)
+
+    async def _on_dns_cache_hit(self, session, context, params):
+        self.dns_hits += 1
+
+    async def _on_dns_cache_miss(self, session, context, params):
+        self.dns_misses += 1
+
+    def reuse_ratio(self) -> float:
+        connections = self.connections_created + self.connections_reused
+        return self.connections_reused / connections if connections else 0.0
+
+
+class PooledBot(TracedBot):
+    """Bot with a tuned keep-alive pool, DNS cache, per-method timeouts and pool metrics."""
+
+    def __init__(self, token: str, server_url: str = BOT_API_SERVER_URL, pool_size: int = BOT_API_POOL_SIZE,
+                 keepalive: float = BOT_API_KEEPALIVE, dns_ttl: int = BOT_API_DNS_TTL,
+                 timeouts: dict = BOT_API_TIMEOUTS, **kwargs):
+        kwargs.setdefault('server', api_server(server_url))
+        super().__init__(token, connections_limit=pool_size, **kwargs)
+        self.pool_size = pool_size
+        self.is_local_server = bool(server_url)
+        self.metrics = PoolMetrics()
+        if self._connector_class is aiohttp.TCPConnector:
+            self._connector_init.update(
+                limit_per_host=pool_size, keepalive_timeout=keepalive,
+                use_dns_cache=True, ttl_dns_cache=dns_ttl, enable_cleanup_closed=True
+            )
+        self._timeouts = {
+            method: aiohttp.ClientTimeout(total=seconds, connect=BOT_API_CONNECT_TIMEOUT)
+            for method, seconds in timeouts.items()
+        }
+
+    async def get_new_session(self) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(
+            connector=self._connector_class(**self._connector_init),
+            json_serialize=json.dumps,
+            trace_configs=[self.metrics.trace_config()]
+        )
+
+    def timeout_for(self, method: str, data: dict = None) -> aiohttp.ClientTimeout:
+        if method == 'getUpdates':
+            poll = float((data or {}).get('timeout') or 0)
+            return aiohttp.ClientTimeout(total=poll + BOT_API_POLL_MARGIN, connect=BOT_API_CONNECT_TIMEOUT)
+        return self._timeouts.get(method) or self._timeouts['default']
+
+    async def request(self, method, data=None, files=None, **kwargs):
+        # A timeout set by the caller (bot.request_timeout(...)) wins
+        if self._ctx_timeout.get(None) is not None:
+            return await super().request(method, data, files, **kwargs)
+        with self.request_timeout(self.timeout_for(method, data)):
+            return await super().request(method, data, files, **kwargs)
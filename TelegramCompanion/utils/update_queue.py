@@ -0,0 +1,136 @@
+"""
+Per-user ordered update processing.
+
+aiogram processes every update of a polling batch concurrently, so two quick
+taps from one user can interleave at any `await` (both "pay" callbacks pass the
+FSM state filter before either moves the state on, and two orders are created).
+
+SerializedDispatcher routes each update to a queue keyed by the user it comes
+from. Each user's queue is drained by one worker, so a user's updates run
+strictly one after another, in the order Telegram sent them; different users'
+queues are drained in parallel, with at most UPDATE_CONCURRENCY handlers
+running at once. Queues and workers exist only while a user has updates
+waiting.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from aiogram import Dispatcher, types
+from config import UPDATE_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+# Update fields carrying the user an update belongs to, in the order aiogram checks them
+USER_FIELDS = (
+    'message', 'edited_message', 'callback_query', 'inline_query', 'chosen_inline_result',
+    'shipping_query', 'pre_checkout_query', 'poll_answer', 'my_chat_member', 'chat_member', 'chat_join_request'
+)
+
+WAIT_SAMPLES = 1024  # recent queue waits kept for percentiles
+
+
+def update_key(update: types.Update):
+    """The user (or, for channel posts, the chat) whose updates must stay ordered."""
+    for field in USER_FIELDS:
+        event = getattr(update, field, None)
+        if event is not None:
+            user = getattr(event, 'from_user', None) or getattr(event, 'user', None)
+            if user is not None:
+                return user.id
+    for field in ('channel_post', 'edited_channel_post'):
+        event = getattr(update, field, None)
+        if event is not None:
+            return event.chat.id
+    return ('update', update.update_id)
+
+
+class UserQueues:
+    """Per-key FIFO queues drained by one worker each, under a global concurrency limit."""
+
+    def __init__(self, process, concurrency: int = UPDATE_CONCURRENCY):
+        self.process = process
+        self.concurrency = concurrency
+        self._semaphore = None
+        self._queues = {}  # key -> deque of (update, future, enqueued_at)
+        self.queued = 0
+        self.running = 0
+        self.processed = 0
+        self.peak_queued = 0
+        self.peak_user_depth = 0
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+
+    def submit(self, update: types.Update) -> asyncio.Future:
+        """Queue an update behind earlier ones from the same user; the future gets the handler results."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        key = update_key(update)
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque()
+            loop.create_task(self._drain(key, queue))
+        queue.append((update, future, time.monotonic()))
+
+        self.queued += 1
+        self.peak_queued = max(self.peak_queued, self.queued)
+        self.peak_user_depth = max(self.peak_user_depth, len(queue))
+        return future
+
+    async def _drain(self, key, queue: deque):
+        try:
+            while queue:
+                update, future, enqueued_at = queue[0]
+                async with self._semaphore:
+                    self._waits.append(time.monotonic() - enqueued_at)
+                    self.running += 1
+                    try:
+                        # Own task per update, so context set by one update never leaks into the next
+                        result = await asyncio.ensure_future(self.process(update))
+                    except Exception as e:
+                        if not future.done():
+                            future.set_exception(e)
+                    else:
+                        if not future.done():
+                            future.set_result(result)
+                    finally:
+                        self.running -= 1
+                queue.popleft()
+                self.queued -= 1
+                self.processed += 1
+        finally:
+            del self._queues[key]
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+        p95 = waits[min(len(waits) - 1, int(0.95 * len(waits)))] if waits else 0.0
+        return {
+            'queued': self.queued,
+            'running': self.running,
+            'users_waiting': len(self._queues),
+            'processed': self.processed,
+            'peak_queued': self.peak_queued,
+            'peak_user_depth': self.peak_user_depth,
+            'wait_p95': p95,
+            'wait_max': waits[-1] if waits else 0.0
+        }
+
+
+class SerializedDispatcher(Dispatcher):
+    """Dispatcher that processes each user's updates in order and different users in parallel."""
+
+    def __init__(self, *args, concurrency: int = UPDATE_CONCURRENCY, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user_queues = UserQueues(self.updates_handler.notify, concurrency)
+
+    async def process_updates(self, updates, fast=True):
+        futures = [self.user_queues.submit(update) for update in updates]
+        results = []
+        for outcome in await asyncio.gather(*futures, return_exceptions=True):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error processing update: {outcome}")
+            else:
+                results.append(outcome)
+        return results
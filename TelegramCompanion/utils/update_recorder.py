@@ -0,0 +1,149 @@
+"""
+Recording of incoming updates for offline replay.
+
+With RECORD_UPDATES on, every update is appended to a gzip-compressed JSON-lines
+file in RECORD_DIR (one file per bot start), each line holding the seconds
+since the recording started and the anonymized update. The file is sync-flushed
+every RECORD_FLUSH_EVERY updates, so a crash loses at most that many.
+
+Anonymization keeps what handlers branch on (commands, callback data, entities,
+content types, admin IDs) and drops what identifies customers: user and chat
+IDs become stable pseudonyms (keyed with a random per-file salt), names and
+usernames are replaced, free text is masked and contacts and locations are
+removed. benchmarks/replay_updates.py feeds a recording back into the bot.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from aiogram import types
+from aiogram.dispatcher.middlewares import BaseMiddleware
+from config import ADMIN_IDS, RECORD_DIR, RECORD_FLUSH_EVERY
+
+logger = logging.getLogger(__name__)
+
+# Fields that identify a person and carry nothing the handlers need
+DROPPED_FIELDS = ('contact', 'location', 'venue', 'phone_number', 'last_name', 'bio')
+TEXT_FIELDS = ('text', 'caption')
+CHAT_TYPES = ('private', 'group', 'supergroup', 'channel')
+
+
+class Anonymizer:
+    """Replace user-identifying values in an update's JSON with stable pseudonyms."""
+
+    def __init__(self, salt: bytes = None, keep_ids=ADMIN_IDS):
+        self.salt = salt or os.urandom(16)
+        self.keep_ids = set(keep_ids)
+
+    def pseudonym(self, value: int) -> int:
+        if abs(value) in self.keep_ids:
+            return value
+        digest = hashlib.blake2b(str(abs(value)).encode(), key=self.salt, digest_size=5).digest()
+        # Keep the sign: negative IDs are groups and channels
+        return (int.from_bytes(digest, 'big') + 1) * (-1 if value < 0 else 1)
+
+    @staticmethod
+    def mask(text: str) -> str:
+        # Commands and their arguments drive handlers; anything else is private
+        if text.startswith('/'):
+            return text
+        return ''.join(ch if ch.isspace() else 'x' for ch in text)
+
+    def scrub(self, value):
+        if isinstance(value, list):
+            return [self.scrub(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+
+        result = {}
+        # Users and chats; polls and other objects with a 'type' keep their (string) ids
+        is_party = isinstance(value.get('id'), int) and (
+            'first_name' in value or 'is_bot' in value or value.get('type') in CHAT_TYPES
+        )
+        for key, item in value.items():
+            if key in DROPPED_FIELDS:
+                continue
+            if is_party and key == 'id':
+                result[key] = self.pseudonym(item)
+            elif key in ('user_id', 'chat_id') and isinstance(item, int):
+                result[key] = self.pseudonym(item)
+            elif is_party and key in ('first_name', 'title'):
+                result[key] = 'User'
+            elif is_party and key == 'username':
+                result[key] = f"user{self.pseudonym(value['id']) % 100000}"
+            elif key in TEXT_FIELDS and isinstance(item, str):
+                result[key] = self.mask(item)
+            else:
+                result[key] = self.scrub(item)
+        return result
+
+
+class UpdateRecorder:
+    """Append anonymized updates to a gzip-compressed JSON-lines file."""
+
+    def __init__(self, directory: str = RECORD_DIR, flush_every: int = RECORD_FLUSH_EVERY):
+        self.directory = directory
+        self.flush_every = flush_every
+        self.path = None
+        self.recorded = 0
+        self._file = None
+        self._started = None
+        self._anonymizer = Anonymizer()
+
+    def open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"updates-{time.strftime('%Y%m%d-%H%M%S')}.jsonl.gz")
+        self._file = gzip.open(self.path, 'wt', encoding='utf-8', compresslevel=6)
+        self._started = time.monotonic()
+        logger.info(f"Recording updates to {self.path}")
+
+    def record(self, update: types.Update):
+        if self._file is None:
+            self.open()
+        line = {'t': round(time.monotonic() - self._started, 4),
+                'update': self._anonymizer.scrub(update.to_python())}
+        self._file.write(json.dumps(line, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self.recorded += 1
+        if self.recorded % self.flush_every == 0:
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+            logger.info(f"Recorded {self.recorded} updates to {self.path}")
+
+
+def read_recording(path: str):
+    """Yield (seconds since start, update dict) from a recording, tolerating a torn tail."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                yield record['t'], record['update']
+        except (EOFError, gzip.BadGzipFile):
+            # The bot stopped without closing the file; everything flushed is still readable
+            return
+
+
+update_recorder = UpdateRecorder()
+
+
+class UpdateRecorderMiddleware(BaseMiddleware):
+    """Record every update before any other middleware can drop it."""
+
+    def __init__(self, recorder: UpdateRecorder = update_recorder):
+        super().__init__()
+        self.recorder = recorder
+
+    async def on_pre_process_update(self, update: types.Update, data: dict):
+        try:
+            self.recorder.record(update)
+        except Exception as e:
+            logger.error(f"Failed to record update {update.update_id}: {e}")
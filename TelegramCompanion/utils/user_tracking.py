@@ -0,0 +1,20 @@
+"""
+Middleware that records every user who talks to the bot in the user registry.
+"""
+
+from aiogram import types
+from aiogram.dispatcher.middlewares import BaseMiddleware
+from data.users import user_registry
+
+
+class UserRegistryMiddleware(BaseMiddleware):
+    """Register users on their first message or button tap (one dict lookup afterwards)."""
+
+    async def on_pre_process_message(self, message: types.Message, data: dict):
+        user = message.from_user
+        if user and message.chat.type == 'private':
+            user_registry.touch(user.id, user.first_name, user.username)
+
+    async def on_pre_process_callback_query(self, callback_query: types.CallbackQuery, data: dict):
+        user = callback_query.from_user
+        user_registry.touch(user.id, user.first_name, user.username)